@@ -0,0 +1,382 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import gc
+import struct
+from errno import EAGAIN
+
+from network_platform import mem_free
+
+from helpers import reported_metrics, wait_for
+
+PACKET_HEADER = ">IQ"
+PACKET_HEADER_SIZE = struct.calcsize(PACKET_HEADER)
+PACKET_END_OF_STREAM = 0xFFFFFFFF
+PATTERN = bytes(range(256))
+
+
+class NativeStream:
+    def __init__(self, sock, timeout):
+        self._sock = sock
+        self._timeout = timeout
+        self._sock.settimeout(timeout)
+        self.native_socket = sock
+
+    def close(self):
+        self._sock.close()
+
+    def recv_into(self, buffer, nbytes):
+        bytes_read = self._sock.recv_into(buffer, nbytes)
+        if not bytes_read:
+            raise OSError("Connection closed by client")
+        return bytes_read
+
+    def recv_exactly(self, buffer, nbytes):
+        view = memoryview(buffer)
+        received = 0
+        while received < nbytes:
+            received += self.recv_into(view[received:], nbytes - received)
+
+    def start_nowait(self):
+        # for recv_nowait(), the socket stays non-blocking from here on
+        self._sock.setblocking(False)
+
+    def recv_nowait(self, buffer):
+        try:
+            bytes_read = self._sock.recv_into(buffer, len(buffer))
+        except OSError as exc:
+            if exc.errno != EAGAIN:
+                raise
+            return 0
+        # None tells a closed connection apart from one with nothing pending
+        return bytes_read or None
+
+    def send_all(self, data):
+        view = memoryview(data)
+        sent = 0
+        while sent < len(view):
+            try:
+                sent_now = self._sock.send(view[sent:])
+            except OSError as exc:
+                # after start_nowait() a full send buffer doesn't block
+                if exc.errno != EAGAIN:
+                    raise
+                continue
+            # ESP32SPI sockets, as connection_manager hands them out, write it all and
+            # return None
+            if sent_now is None:
+                return
+            sent += sent_now
+
+
+class ESP32SPIStream:
+    # there is nothing select can poll, waits back off instead
+    native_socket = None
+
+    def __init__(self, radio, sock, timeout):
+        self._radio = radio
+        self._sock = sock
+        self._timeout = timeout
+
+    def close(self):
+        self._sock.close()
+
+    def recv_into(self, buffer, nbytes):
+        def read():
+            bytes_available = self._radio.socket_available(self._sock._socknum)
+            if not bytes_available:
+                return None
+            data = self._radio.socket_read(
+                self._sock._socknum, min(bytes_available, nbytes)
+            )
+            buffer[: len(data)] = data
+            return len(data)
+
+        return wait_for(read, self._timeout, progress=False)
+
+    def recv_exactly(self, buffer, nbytes):
+        view = memoryview(buffer)
+        received = 0
+        while received < nbytes:
+            received += self.recv_into(view[received:], nbytes - received)
+
+    def start_nowait(self):
+        pass
+
+    def recv_nowait(self, buffer):
+        bytes_available = self._radio.socket_available(self._sock._socknum)
+        if bytes_available:
+            data = self._radio.socket_read(
+                self._sock._socknum, min(bytes_available, len(buffer))
+            )
+            buffer[: len(data)] = data
+            return len(data)
+        if not self._radio.socket_connected(self._sock._socknum):
+            return None
+        return 0
+
+    def send_all(self, data):
+        self._sock.send(data)
+
+
+class NativeDatagram:
+    def __init__(self, sock):
+        self._sock = sock
+        self._sock.setblocking(False)
+        self.client_address = None
+        self.native_socket = sock
+
+    def close(self):
+        self._sock.close()
+
+    def recv_into(self, buffer):
+        try:
+            bytes_read, self.client_address = self._sock.recvfrom_into(buffer)
+        except OSError as exc:
+            if exc.errno != EAGAIN:
+                raise
+            return 0
+        return bytes_read
+
+    def send(self, data):
+        self._sock.sendto(data, self.client_address)
+
+
+class ESP32SPIDatagram:
+    native_socket = None
+
+    def __init__(self, radio, sock):
+        self._radio = radio
+        self._sock = sock
+
+    def close(self):
+        self._sock.close()
+
+    def recv_into(self, buffer):
+        bytes_available = self._radio.socket_available(self._sock._socknum)
+        if not bytes_available:
+            return 0
+        data = self._radio.socket_read(
+            self._sock._socknum, min(bytes_available, len(buffer))
+        )
+        buffer[: len(data)] = data
+        return len(data)
+
+    def send(self, data):
+        self._radio.socket_write(
+            self._sock._socknum, data, conn_mode=self._radio.UDP_MODE
+        )
+
+
+class PacketStats:
+    def __init__(self, count):
+        self.count = count
+        self.received = 0
+        self.duplicates = 0
+        self.reordered = 0
+        self.jitter_us = 0
+        self._seen = bytearray((count + 7) // 8)
+        self._highest = -1
+        self._first_ns = None
+        self._last_ns = None
+        self._last_transit_us = None
+
+    def add(self, sequence, sent_us, arrival_ns):
+        if sequence >= self.count:
+            return
+        index, bit = divmod(sequence, 8)
+        if self._seen[index] & (1 << bit):
+            self.duplicates += 1
+            return
+        self._seen[index] |= 1 << bit
+        self.received += 1
+
+        if sequence < self._highest:
+            self.reordered += 1
+        else:
+            self._highest = sequence
+
+        if self._first_ns is None:
+            self._first_ns = arrival_ns
+        self._last_ns = arrival_ns
+
+        # RFC 3550 interarrival jitter, the clocks only need to tick at the same rate
+        transit_us = arrival_ns // 1000 - sent_us
+        if self._last_transit_us is not None:
+            delta = abs(transit_us - self._last_transit_us)
+            self.jitter_us += (delta - self.jitter_us) / 16
+        self._last_transit_us = transit_us
+
+    def loss_percent(self):
+        return 100 * (self.count - self.received) / self.count
+
+    def packets_per_second(self):
+        if self.received < 2:  # noqa: PLR2004 Magic value used in comparison
+            return 0
+        return per_second(self.received - 1, self._last_ns - self._first_ns)
+
+
+class PatternStream:
+    # A binary file of `size` bytes of PATTERN, made up as it is read, so an
+    # upload never has to fit in memory.
+    def __init__(self, size):
+        self._size = size
+        self._offset = 0
+
+    def read(self, size=-1):
+        remaining = self._size - self._offset
+        buffer = bytearray(remaining if size < 0 else min(size, remaining))
+        return bytes(buffer[: self.readinto(buffer)])
+
+    def readinto(self, buffer):
+        count = min(len(buffer), self._size - self._offset)
+        written = 0
+        while written < count:
+            start = (self._offset + written) % len(PATTERN)
+            piece = min(len(PATTERN) - start, count - written)
+            buffer[written : written + piece] = PATTERN[start : start + piece]
+            written += piece
+        self._offset += count
+        return count
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._offset
+        elif whence == 2:  # noqa: PLR2004
+            offset += self._size
+        self._offset = max(0, min(offset, self._size))
+        return self._offset
+
+    def tell(self):
+        return self._offset
+
+
+class HeapSampler:
+    # Follows mem_free() through a transfer: the most heap it took, how much was
+    # allocated and how often a collection gave memory back between samples.
+    def __init__(self):
+        gc.collect()
+        self.start = self.low = self.last = mem_free()
+        self.allocated = 0
+        self.collections = 0
+
+    def report(self, name):
+        report_metric(f"{name}_heap_used", self.start - self.low, "B")
+        report_metric(f"{name}_allocated", self.allocated, "B")
+        report_metric(f"{name}_collections", self.collections, "gcs")
+
+    def sample(self):
+        free = mem_free()
+        if free > self.last:
+            self.collections += 1
+        else:
+            self.allocated += self.last - free
+        self.low = min(self.low, free)
+        self.last = free
+
+
+class LatencyStats:
+    HISTOGRAM_WIDTH = 20
+
+    def __init__(self):
+        self.samples = []
+        self.lost = 0
+
+    def add(self, elapsed_ns):
+        self.samples.append(elapsed_ns // 1000)
+
+    def histogram(self):
+        self.samples.sort()
+        upper_us = 1
+        while upper_us < self.samples[0]:
+            upper_us *= 2
+        buckets = [[upper_us, 0]]
+        for sample in self.samples:
+            while sample > buckets[-1][0]:
+                buckets.append([buckets[-1][0] * 2, 0])
+            buckets[-1][1] += 1
+        return buckets
+
+    def percentile(self, percent):
+        self.samples.sort()
+        rank = max(1, -(-len(self.samples) * percent // 100))
+        return self.samples[rank - 1]
+
+    def report(self, name, lost_unit="round trips"):
+        if not self.samples:
+            report_metric(f"{name}_lost", self.lost, lost_unit)
+            return
+        self.samples.sort()
+        report_metric(f"{name}_min", self.samples[0], "us")
+        for percent in (50, 95, 99):
+            report_metric(f"{name}_p{percent}", self.percentile(percent), "us")
+        report_metric(f"{name}_max", self.samples[-1], "us")
+        report_metric(f"{name}_lost", self.lost, lost_unit)
+        buckets = self.histogram()
+        most = max(count for _, count in buckets)
+        for upper_us, count in buckets:
+            bar = "#" * (count * self.HISTOGRAM_WIDTH // most)
+            bar += " " * (self.HISTOGRAM_WIDTH - len(bar))
+            print(f"   <={upper_us:8}us |{bar}| {count}")
+
+
+def esp32spi_accept(radio, pool, sock, timeout):
+    def accept_client():
+        sock_client_num = radio.socket_available(sock._socknum)
+        if sock_client_num == pool.NO_SOCKET_AVAIL:
+            return None
+        sock_client = pool.socket()
+        sock_client._socknum = sock_client_num
+        return sock_client
+
+    return wait_for(accept_client, timeout)
+
+
+def native_accept(sock, timeout):
+    def accept_client():
+        try:
+            sock_client, client_address = sock.accept()
+        except OSError as exc:
+            if exc.errno != EAGAIN:
+                raise
+            return None
+        return sock_client
+
+    return wait_for(accept_client, timeout, sock)
+
+
+def wait_recv_into(datagram, buffer, timeout):
+    def receive():
+        return datagram.recv_into(buffer) or None
+
+    try:
+        return wait_for(receive, timeout, datagram.native_socket, progress=False)
+    except TimeoutError:
+        return 0
+
+
+def parse_sizes(value):
+    if isinstance(value, int):
+        return [value]
+    return [int(size) for size in value.split(",")]
+
+
+def per_second(count, elapsed_ns):
+    if not elapsed_ns:
+        return 0
+    return count * 1_000_000_000 // elapsed_ns
+
+
+def split_url(url):
+    # "http://host:port/..." to ("http:", host, port)
+    proto, _, host = url.split("/", 3)[:3]
+    port = 443 if proto == "https:" else 80
+    if ":" in host:
+        host, port = host.split(":", 1)
+    return proto, host, int(port)
+
+
+def report_metric(name, value, unit):
+    print(f"  {name}: {value} {unit}")
+    reported_metrics.append((name, value, unit))
@@ -2,27 +2,59 @@
 #
 # SPDX-License-Identifier: MIT
 
+import gc
+import json
 import os
 import sys
 import time
 import unittest
 
-import adafruit_connection_manager
-import alarm
-import board
-import supervisor
-from connection_helper import enable_log, get_radio
-from network_test_case import NetworkTestCase
+from network_platform import (
+    WatchDogTimeout,
+    board_id,
+    enable_log,
+    get_radio,
+    get_radio_socketpool,
+    import_module,
+    mem_free,
+    prompt,
+    reload,
+    sleep_memory,
+    start_watchdog,
+    stop_watchdog,
+)
+from network_test_case import NetworkTestCase, close_fixtures, selected_tests
+from result_store import (
+    RESULT_METRIC_SIZE,
+    STATE_DESELECTED,
+    STATE_FINISHED,
+    STATE_NOT_RUN,
+    STATE_RUNNING,
+    STATE_TIMED_OUT,
+    FileResult,
+    ResultStore,
+)
 
 from helpers import (
-    RESULT_BLOCKS,
-    RESULT_NOT_RUN,
+    BATCH_RESERVE,
+    FILE_BUDGET,
+    MANIFEST_FILE,
+    MANIFEST_VERSION,
+    ORDER,
+    ORDER_DURATION,
+    ORDER_FAIL_FIRST,
+    RECORD_VERSION,
+    SELECT,
     SLEEP_DELAY,
     TEST_PATH,
     ValidationMatrix,
+    emit_record,
     get_ipv4_address,
     get_radio_force,
+    parse_selection,
+    reported_metrics,
     select_radio,
+    timing_stats,
 )
 
 try:
@@ -35,6 +67,9 @@ class NetworkTests:
     def __init__(self, sleep_delay=SLEEP_DELAY):
         self._sleep_delay = sleep_delay
         self._test_files = []
+        self._manifest = None
+        self._result_store = ResultStore(sleep_memory)
+        self._unwatched = False
 
     def board_info(self):
         machine = getattr(sys.implementation, "_machine", "Unknown")
@@ -45,11 +80,15 @@ class NetworkTests:
         print(f"Testing on:")
         print(f" {machine}")
         print(f" {sys.implementation.name} v{version}")
-        print(f" {board.board_id}")
+        print(f" {board_id}")
         print(f" Has ssl: {has_ssl}")
 
     def find_test_files(self):
-        self._test_files = os.listdir(TEST_PATH)
+        self._manifest = self.load_manifest()
+        if self._manifest is None:
+            self._test_files = os.listdir(TEST_PATH)
+        else:
+            self._test_files = list(self._manifest)
         self._test_files.sort()
 
     def finish(self):
@@ -64,91 +103,153 @@ class NetworkTests:
         total_errored = 0
         total_skipped = 0
         total_exceptioned = 0
-        for pos, test_file in enumerate(self._test_files, 1):
-            test_file_path = self.get_import_name(test_file)
-            validates = self.get_test_validates(test_file_path)
-
-            test_pos = self.get_test_pos(pos)
-            passed = alarm.sleep_memory[test_pos]
-            failed = alarm.sleep_memory[test_pos + 1]
-            errored = alarm.sleep_memory[test_pos + 2]
-            skipped = alarm.sleep_memory[test_pos + 3]
-            exceptioned = alarm.sleep_memory[test_pos + 4]
-
-            if failed or errored or exceptioned:
-                validation = "N"
-            elif passed:
-                validation = "Y"
-            elif skipped:
-                validation = "S"
-            else:
-                validation = "U"
+        total_duration_ms = 0
+        total_setup_ms = 0
+        total_saved_ms = 0
+        total_waited_ms = 0
+        total_deselected = 0
+        total_timed_out = 0
+        for index, test_file in enumerate(self._test_files):
+            file_result = self._result_store.read_file(index)
+            if file_result.state == STATE_DESELECTED:
+                total_deselected += 1
+                continue
 
+            validates = self.get_test_validates(test_file)
+            validation = self.get_validation(file_result)
             for validate in validates:
                 all_validations[validate] = validation
 
-            total_passed += passed
-            total_failed += failed
-            total_errored += errored
-            total_skipped += skipped
-            total_exceptioned += exceptioned
+            total_passed += file_result.passed
+            total_failed += file_result.failed
+            total_errored += file_result.errored
+            total_skipped += file_result.skipped
+            total_exceptioned += file_result.exceptioned
+            total_duration_ms += file_result.duration_ms
+            total_setup_ms += file_result.setup_ms
+            total_saved_ms += file_result.saved_ms
+            total_waited_ms += file_result.waited_ms
+            total_timed_out += file_result.state == STATE_TIMED_OUT
 
-            print(f" {test_file} - ", end="")
-            print(f"passed: {passed}, failed: {failed}, errored: {errored}, ", end="")
-            print(f"skipped: {skipped}, exceptioned: {exceptioned}")
+            self.print_file_result(test_file, index, file_result)
 
         print(f"passed:     {total_passed}")
         print(f"failed:     {total_failed}")
         print(f"errored:    {total_errored}")
         print(f"skipped:    {total_skipped}")
         print(f"exceptions: {total_exceptioned}")
+        if total_timed_out:
+            print(f"timed out:  {total_timed_out} file(s)")
+        if total_deselected:
+            print(f"not selected: {total_deselected} file(s)")
+        print(f"time:       {total_duration_ms / 1000:.2f}s")
+        print(f"in setUp:   {total_setup_ms / 1000:.2f}s")
+        print(f"waiting:    {total_waited_ms / 1000:.2f}s")
+        if total_saved_ms:
+            print(f"saved:      {total_saved_ms / 1000:.2f}s by shared fixtures")
+        self.print_store_usage()
+        emit_record(
+            "summary",
+            {
+                "passed": total_passed,
+                "failed": total_failed,
+                "errored": total_errored,
+                "skipped": total_skipped,
+                "exceptioned": total_exceptioned,
+                "duration_ms": total_duration_ms,
+                "setup_ms": total_setup_ms,
+                "saved_ms": total_saved_ms,
+                "waited_ms": total_waited_ms,
+                "timed_out": total_timed_out,
+                "deselected": total_deselected,
+                "dropped": self._result_store.dropped,
+                "validation": all_validations,
+                "libraries": dict(self.find_library_versions()),
+            },
+        )
 
-        enable_log(False)
-        self.board_info()
-        self.radio_check()
-        self.libary_versions()
-        print()
-        print("Validation:")
-        for validation, result in all_validations.items():
-            print(f" {validation:20}: {ValidationMatrix.TEST_RESULTS[result]}")
-
-        alarm.sleep_memory[0] = 0
+        self.print_run_info(all_validations)
+        self.warn_dropped()
+        self._result_store.close()
+
+    def get_validation(self, file_result):
+        if file_result.state == STATE_TIMED_OUT:
+            return "N"
+        if file_result.failed or file_result.errored or file_result.exceptioned:
+            return "N"
+        if file_result.passed:
+            return "Y"
+        if file_result.skipped:
+            return "S"
+        return "U"
 
     def get_import_name(self, test_file):
         test_file = test_file.split(".")[0]
         return f"{TEST_PATH}/{test_file}"
 
-    def get_test_count(self, test_suite):
-        test_case_count = 0
-        test_count = 0
-        for test_case in test_suite.tests:
-            test_case_count += 1
-            for test_case_attribute in dir(test_case):
-                if test_case_attribute.startswith("test"):
-                    test_count += 1
-        return test_case_count, test_count
+    def fits_in_boot(self, file_result):
+        # What the file needed last time has to leave BATCH_RESERVE free, and be
+        # available in one piece. Files never measured get a boot of their own.
+        if file_result.mem_cost is None:
+            return False
+        gc.collect()
+        if mem_free() - file_result.mem_cost < BATCH_RESERVE:
+            return False
+        try:
+            bytearray(file_result.mem_cost)
+        except MemoryError:
+            return False
+        return True
+
+    def get_test_cases(self, test_file):
+        if self._manifest is not None:
+            return self._manifest[test_file]
+
+        test_cases = []
+        for test_case in self.get_test_suite(test_file).tests:
+            tests = [name for name in dir(test_case) if name.startswith("test")]
+            test_cases.append(
+                {
+                    "name": test_case.__name__,
+                    "tests": tests,
+                    "validates": test_case.VALIDATES,
+                    "radio_destructive": test_case.RADIO_DESTRUCTIVE,
+                }
+            )
+        return test_cases
 
-    def get_test_pos(self, pos):
-        return len(TEST_PATH) + 1 + ((pos - 1) * RESULT_BLOCKS)
+    def get_test_count(self, test_cases):
+        test_count = 0
+        for test_case in test_cases:
+            test_count += len(test_case["tests"])
+        return len(test_cases), test_count
 
-    def get_test_suite(self, module_name):
+    def get_test_suite(self, test_file):
         test_suite = unittest.TestSuite()
-        imported_module = __import__(module_name, None, None, ["*"])
+        imported_module = import_module(self.get_import_name(test_file))
+        if self._manifest is not None:
+            for test_case in self._manifest[test_file]:
+                test_suite.addTest(getattr(imported_module, test_case["name"]))
+            return test_suite
+
         for module_attribute in dir(imported_module):
             attribute = getattr(imported_module, module_attribute)
             if self.is_test_case(attribute):
                 test_suite.addTest(attribute)
         return test_suite
 
-    def get_test_validates(self, module_name):
+    def get_test_validates(self, test_file):
         validates = []
-        imported_module = __import__(module_name, None, None, ["*"])
-        for module_attribute in dir(imported_module):
-            attribute = getattr(imported_module, module_attribute)
-            if self.is_test_case(attribute):
-                validates.extend(attribute.VALIDATES)
+        for test_case in self.get_test_cases(test_file):
+            validates.extend(test_case["validates"])
         return validates
 
+    def is_radio_destructive(self, test_file):
+        for test_case in self.get_test_cases(test_file):
+            if test_case.get("radio_destructive"):
+                return True
+        return False
+
     def is_test_case(self, attribute):
         return (
             isinstance(attribute, type)
@@ -157,9 +258,8 @@ class NetworkTests:
             and attribute is not NetworkTestCase
         )
 
-    def libary_versions(self):
-        print()
-        print("Library versions:")
+    def find_library_versions(self):
+        library_versions = []
         for library_full_name in [
             "adafruit_esp32spi.adafruit_esp32spi",
             "adafruit_minimqtt.adafruit_minimqtt",
@@ -171,9 +271,93 @@ class NetworkTests:
             try:
                 library = __import__(library_full_name, None, None, ["*"])
                 library_name = library_full_name.split(".")[0]
-                print(f" {library_name}: {library.__version__}")
+                library_versions.append((library_name, library.__version__))
             except ImportError:
                 pass
+        return library_versions
+
+    def libary_versions(self):
+        print()
+        print("Library versions:")
+        for library_name, version in self.find_library_versions():
+            print(f" {library_name}: {version}")
+
+    def load_manifest(self):
+        # built by helpers/build_manifest.py, saves importing every test module
+        try:
+            with open(MANIFEST_FILE) as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        return {entry["file"]: entry["cases"] for entry in manifest["files"]}
+
+    def match_selection(self, test_file, selection):
+        # None when nothing in the file is selected, otherwise the test case and test
+        # names to run in it, all of them when empty
+        if not selection:
+            return set()
+        names = set()
+        validates = self.get_test_validates(test_file)
+        for name in selection:
+            if name in (test_file, test_file.split(".")[0]) or name in validates:
+                return set()
+            for test_case in self.get_test_cases(test_file):
+                if name == test_case["name"] or name in test_case["tests"]:
+                    names.add(name)
+        return names or None
+
+    def print_run_info(self, all_validations):
+        enable_log(False)
+        self.board_info()
+        self.radio_check()
+        self.libary_versions()
+        print()
+        print("Validation:")
+        for validation, result in all_validations.items():
+            print(f" {validation:20}: {ValidationMatrix.TEST_RESULTS[result]}")
+
+    def print_file_result(self, test_file, index, file_result):
+        print(f" {test_file} - ", end="")
+        print(f"passed: {file_result.passed}, failed: {file_result.failed}, ", end="")
+        print(
+            f"errored: {file_result.errored}, skipped: {file_result.skipped}, ", end=""
+        )
+        print(f"exceptioned: {file_result.exceptioned}, ", end="")
+        print(f"time: {file_result.duration_ms / 1000:.2f}s", end="")
+        print(" TIMED OUT" if file_result.state == STATE_TIMED_OUT else "")
+        self.print_timing(file_result)
+        self.print_metrics(index)
+
+    def print_metrics(self, index):
+        for name, value, unit in self._result_store.metrics(index):
+            if isinstance(value, float):
+                print(f"   {name}: {value:.2f} {unit}")
+            else:
+                print(f"   {name}: {value} {unit}")
+
+    def print_store_usage(self):
+        used = self._result_store.used
+        print(f"results:    {used} of {len(sleep_memory)} bytes of sleep_memory")
+
+    def print_timing(self, file_result):
+        if file_result.state == STATE_NOT_RUN:
+            return
+        print(f"   setUp: {file_result.setup_ms / 1000:.2f}s, ", end="")
+        print(f"test: {file_result.test_ms / 1000:.2f}s, ", end="")
+        print(f"tearDown: {file_result.teardown_ms / 1000:.2f}s", end="")
+        if file_result.saved_ms:
+            print(f", setUp saved: {file_result.saved_ms / 1000:.2f}s", end="")
+        if file_result.mem_free_min is not None:
+            print(f", mem_free min: {file_result.mem_free_min}", end="")
+            print(f", mem_free change: {file_result.mem_delta}", end="")
+        if file_result.heap_peak is not None:
+            print(f", heap peak: {file_result.heap_peak}", end="")
+        if file_result.timeout_ms:
+            print(f", waited: {file_result.waited_ms / 1000:.2f}s", end="")
+            print(f" (shortest timeout {file_result.timeout_ms / 1000:.2f}s)", end="")
+        print()
 
     def radio_check(self, pick=False):
         if pick:
@@ -184,7 +368,7 @@ class NetworkTests:
 
         try:
             radio = get_radio(force=force_radio)
-            pool = adafruit_connection_manager.get_radio_socketpool(radio)
+            pool = get_radio_socketpool(radio)
             mac_addess = ":".join(f"{byte:02X}" for byte in radio.mac_address)
 
             try:
@@ -216,68 +400,174 @@ class NetworkTests:
             print(e)
             return -1
 
-    def run_test(self, test_file, test_pos):
+    def run_order(self):
+        # the order is worked out again every boot, from what the last run kept
+        indexes = list(range(len(self._test_files)))
+        if ORDER not in (ORDER_DURATION, ORDER_FAIL_FIRST):
+            return indexes
+        file_results = [self._result_store.read_file(index) for index in indexes]
+
+        def duration_key(index):
+            # files never timed go last
+            duration_ms = file_results[index].last_duration_ms
+            key = (duration_ms is None, duration_ms or 0, index)
+            if ORDER == ORDER_FAIL_FIRST:
+                return (not file_results[index].last_failed,) + key
+            return key
+
+        return sorted(indexes, key=duration_key)
+
+    def run_test(self, test_file, index):
         test_file_path = self.get_import_name(test_file)
         print(f"Running: {test_file_path}")
 
+        selected_tests.clear()
+        selected_tests.update(
+            self.match_selection(
+                test_file, parse_selection(self._result_store.selection)
+            )
+        )
+
+        # a file still running when the board comes back didn't finish in its boot
+        file_result = self._result_store.read_file(index)
+        file_result.state = STATE_RUNNING
+        self._result_store.write_file(index, file_result)
+
+        reported_metrics.clear()
+        timing_stats.reset()
+        file_result = FileResult()
+        file_result.state = STATE_FINISHED
+        gc.collect()
+        start_free = mem_free()
+        start = time.monotonic_ns()
+        self.watch(FILE_BUDGET)
         try:
-            results = self.run_test_file(test_file_path)
-            passed = results.testsRun - results.failuresNum - results.errorsNum
-            failed = results.failuresNum
-            errored = results.errorsNum
-            skipped = results.skippedNum
-            exceptioned = 0
+            results = self.run_test_file(test_file)
+            file_result.passed = (
+                results.testsRun - results.failuresNum - results.errorsNum
+            )
+            file_result.failed = results.failuresNum
+            file_result.errored = results.errorsNum
+            file_result.skipped = results.skippedNum
+        except WatchDogTimeout:
+            print()
+            print(f"Timed out, {test_file} took longer than {FILE_BUDGET}s")
+            file_result.state = STATE_TIMED_OUT
         except Exception as e:
             print(e)
-            passed = 0
-            failed = 0
-            errored = 0
-            skipped = 0
-            exceptioned = 1
-
-        alarm.sleep_memory[test_pos] = passed
-        alarm.sleep_memory[test_pos + 1] = failed
-        alarm.sleep_memory[test_pos + 2] = errored
-        alarm.sleep_memory[test_pos + 3] = skipped
-        alarm.sleep_memory[test_pos + 4] = exceptioned
-        supervisor.reload()
-
-    def run_test_file(self, module_name):
+            file_result.exceptioned = 1
+        finally:
+            stop_watchdog()
+            # the next file may run in the same boot, whatever this one ended with
+            close_fixtures()
+
+        file_result.duration_ms = (time.monotonic_ns() - start) // 1_000_000
+        setup_ns, test_ns, teardown_ns = timing_stats.phases_ns
+        file_result.setup_ms = setup_ns // 1_000_000
+        file_result.test_ms = test_ns // 1_000_000
+        file_result.teardown_ms = teardown_ns // 1_000_000
+        file_result.saved_ms = timing_stats.saved_ns // 1_000_000
+        file_result.mem_free_min = timing_stats.mem_free_min
+        file_result.mem_delta = timing_stats.mem_delta
+        file_result.heap_peak = timing_stats.heap_peak
+        file_result.waited_ms = int(timing_stats.waited * 1000)
+        if timing_stats.min_timeout is not None:
+            file_result.timeout_ms = int(timing_stats.min_timeout * 1000)
+        if timing_stats.mem_free_min is not None:
+            file_result.mem_cost = max(0, start_free - timing_stats.mem_free_min)
+
+        # let the module go, the next file may run in the same boot
+        sys.modules.pop(self.get_import_name(test_file), None)
+        self._result_store.add_metrics(index, reported_metrics)
+        self.write_file_result(test_file, index, file_result, reported_metrics)
+        return file_result.state == STATE_FINISHED and not file_result.exceptioned
+
+    def run_test_file(self, test_file):
         test_runner = unittest.TestRunner()
-        test_suite = self.get_test_suite(module_name)
+        test_suite = self.get_test_suite(test_file)
         results = test_runner.run(test_suite)
 
         return results
 
-    def run_tests(self, new_run, selected_radio):
+    def run_tests(self, new_run, selected_radio, selection=""):
         print()
         print("----------------------------------------")
         print()
 
         if new_run:
-            self.setup(selected_radio)
+            self.setup(selected_radio, selection)
             print("Starting...")
-            supervisor.reload()
-
-        for pos, test_file in enumerate(self._test_files, 1):
-            test_pos = self.get_test_pos(pos)
-            if alarm.sleep_memory[test_pos] != RESULT_NOT_RUN:
+            reload()
+
+        self.time_out_unfinished()
+
+        # Files run back to back in one boot while memory allows, a radio
+        # destructive file or one that raised or timed out gets a fresh boot after it.
+        files_run = 0
+        isolate = False
+        for index in self.run_order():
+            test_file = self._test_files[index]
+            file_result = self._result_store.read_file(index)
+            if file_result.state != STATE_NOT_RUN:
                 continue
-            self.run_test(test_file, test_pos)
-
+            radio_destructive = self.is_radio_destructive(test_file)
+            if files_run and (
+                isolate or radio_destructive or not self.fits_in_boot(file_result)
+            ):
+                reload()
+            if files_run:
+                print(f"Continuing in the same boot, {mem_free()} bytes free")
+            completed = self.run_test(test_file, index)
+            isolate = radio_destructive or not completed
+            files_run += 1
+
+        if isolate:
+            reload()
         self.finish()
 
-    def setup(self, selected_radio):
-        result_data = [RESULT_NOT_RUN] * (len(self._test_files) * RESULT_BLOCKS)
-        initial_data = (
-            [ord(c) for c in TEST_PATH]
-            + [
-                selected_radio,
+    def select_tests(self):
+        print()
+        while True:
+            selection = prompt(
+                f"Select by tag, file or test name [{SELECT or 'all'}]: "
+            ).strip()
+            if selection == "all":
+                return ""
+            selection = selection or SELECT
+            selected = [
+                test_file
+                for test_file in self._test_files
+                if self.match_selection(test_file, parse_selection(selection))
+                is not None
             ]
-            + result_data
+            if selected:
+                print(f"{len(selected)} of {len(self._test_files)} test file(s)")
+                return selection
+            print("Nothing matches, try again")
+
+    def setup(self, selected_radio, selection=""):
+        self._result_store.create(selected_radio, len(self._test_files), selection)
+        for index, test_file in enumerate(self._test_files):
+            if self.match_selection(test_file, parse_selection(selection)) is None:
+                file_result = self._result_store.read_file(index)
+                file_result.state = STATE_DESELECTED
+                self._result_store.write_file(index, file_result)
+        emit_record(
+            "run",
+            {
+                "version": RECORD_VERSION,
+                "board": board_id,
+                "machine": getattr(sys.implementation, "_machine", "Unknown"),
+                "implementation": sys.implementation.name,
+                "implementation_version": ".".join(
+                    str(part) for part in sys.implementation.version
+                ),
+                "radio": selected_radio,
+                "files": self._test_files,
+                "selection": selection,
+                "order": ORDER,
+            },
         )
-        for pos in range(len(initial_data)):
-            alarm.sleep_memory[pos] = initial_data[pos]
 
     def start(self):
         self.find_test_files()
@@ -285,7 +575,12 @@ class NetworkTests:
         run = False
         new_run = False
         selected_radio = None
-        if bytes(alarm.sleep_memory[0 : len(TEST_PATH)]) != TEST_PATH.encode():
+        selection = ""
+        if (
+            not self._result_store.load()
+            or self._result_store.finished
+            or self._result_store.file_count != len(self._test_files)
+        ):
             print("========================================")
             print("Welcome to the network test runner")
             print("========================================")
@@ -293,8 +588,9 @@ class NetworkTests:
             self.test_info()
             selected_radio = self.radio_check(pick=True)
             if selected_radio >= 0:
+                selection = self.select_tests()
                 print()
-                start = input("start tests [y/n]? ").lower() == "y"
+                start = prompt("start tests [y/n]? ").lower() == "y"
                 if start:
                     new_run = True
                     run = True
@@ -302,16 +598,25 @@ class NetworkTests:
             run = True
 
         if run:
-            self.run_tests(new_run, selected_radio)
+            self.run_tests(new_run, selected_radio, selection)
 
     def test_info(self):
         print()
         print("Tests:")
+        if self._manifest is None:
+            print(f" No {MANIFEST_FILE}, importing every test file to list them")
+        elif self._test_files != sorted(
+            test_file
+            for test_file in os.listdir(TEST_PATH)
+            if test_file.endswith(".py")
+        ):
+            print(f" {MANIFEST_FILE} doesn't match {TEST_PATH}/, rebuild it")
         total_test_case_count = 0
         total_test_count = 0
         for test_file in self._test_files:
-            test_suite = self.get_test_suite(self.get_import_name(test_file))
-            test_case_count, test_count = self.get_test_count(test_suite)
+            test_case_count, test_count = self.get_test_count(
+                self.get_test_cases(test_file)
+            )
             total_test_case_count += test_case_count
             total_test_count += test_count
             print(
@@ -322,6 +627,41 @@ class NetworkTests:
         print(f"Total tests: {total_test_count}")
         print()
 
+    def time_out_unfinished(self):
+        # the watchdog couldn't stop the file in time, or the board was reset under it
+        for index, test_file in enumerate(self._test_files):
+            file_result = self._result_store.read_file(index)
+            if file_result.state != STATE_RUNNING:
+                continue
+            print(f"{test_file} didn't finish before the board reset, timed out")
+            file_result.state = STATE_TIMED_OUT
+            self.write_file_result(test_file, index, file_result, [])
+
+    def watch(self, budget):
+        if not budget or start_watchdog(budget):
+            return
+        if not self._unwatched:
+            print(f"No watchdog, files run without the {budget}s budget")
+        self._unwatched = True
+
+    def warn_dropped(self):
+        # last, so it doesn't scroll away
+        if not self._result_store.dropped:
+            return
+        print()
+        print(
+            f"WARNING: {self._result_store.dropped} metric(s) didn't fit in sleep_memory"
+            f" and were dropped, each needs {RESULT_METRIC_SIZE} bytes and its name and unit"
+        )
+
+    def write_file_result(self, test_file, index, file_result, metrics):
+        self._result_store.write_file(index, file_result)
+        record = file_result.as_dict()
+        record["file"] = test_file
+        record["index"] = index
+        record["metrics"] = metrics
+        emit_record("file", record)
+
 
 network_tests = NetworkTests()
 network_tests.start()
@@ -0,0 +1,229 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import time
+
+from benchmark_helpers import report_metric
+
+# counting every SPI command slows them down a little, so it only happens when asked for
+SPI_PROFILE = os.getenv("NETWORK_TEST_SPI_PROFILE", None) in (1, "1", True, "true")
+
+# the ESP_SPIcontrol calls the socket layer and the tests make, each profiled on its own
+OPERATIONS = (
+    "get_socket",
+    "start_server",
+    "server_state",
+    "socket_available",
+    "socket_read",
+    "socket_write",
+    "socket_status",
+    "socket_connected",
+    "socket_close",
+    "get_remote_data",
+)
+# commands sent outside of those, like the IP address lookup
+OTHER = "other"
+# start, command, parameter count and end byte, the library pads a command to 4 bytes
+COMMAND_FRAME = 4
+COMMAND_ALIGN = 4
+# where conn_mode is in the arguments of start_server()
+START_SERVER_MODE = 2
+
+
+def command_size(params, param_len_16=False):
+    size = COMMAND_FRAME
+    for param in params or ():
+        size += len(param) + (2 if param_len_16 else 1)
+    return size + -size % COMMAND_ALIGN
+
+
+class OperationStats:
+    def __init__(self):
+        self.calls = 0
+        self.commands = 0
+        self.sent = 0
+        self.received = 0
+        # bytes of socket data, what the commands are overhead on
+        self.payload = 0
+        # calls that found nothing to read
+        self.empty = 0
+        self.ready_ns = 0
+        self.elapsed_ns = 0
+
+    @property
+    def wire(self):
+        return self.sent + self.received
+
+
+class SPIProfiler:
+    # Wraps the command layer of an ESP_SPIcontrol to count, for every socket operation,
+    # the SPI commands it took, the bytes they moved and the time spent waiting for the
+    # ready pin. Only does so when enabled, so a test can always use it.
+    def __init__(self, radio, enabled=SPI_PROFILE):
+        self._radio = radio
+        self.enabled = enabled
+        self.operations = {}
+        self._current = None
+        self._wrapped = []
+        # socket_available() on a TCP server answers with a client socket, 255 for none
+        self._servers = set()
+
+    def __enter__(self):
+        if self.enabled:
+            self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def stats(self, name):
+        if name not in self.operations:
+            self.operations[name] = OperationStats()
+        return self.operations[name]
+
+    def _current_stats(self):
+        return self._current or self.stats(OTHER)
+
+    def _wrap(self, name, wrapper):
+        setattr(self._radio, name, wrapper(getattr(self._radio, name)))
+        self._wrapped.append(name)
+
+    def _operation(self, name):
+        def wrapper(method):
+            def operation(*args, **kwargs):
+                # socket_connected() calls socket_status(), count it once
+                if self._current is not None:
+                    return method(*args, **kwargs)
+                stats = self._current = self.stats(name)
+                start = time.monotonic_ns()
+                try:
+                    result = method(*args, **kwargs)
+                finally:
+                    stats.elapsed_ns += time.monotonic_ns() - start
+                    stats.calls += 1
+                    self._current = None
+                self._count(name, args, kwargs, result)
+                return result
+
+            return operation
+
+        return wrapper
+
+    def _count(self, name, args, kwargs, result):
+        stats = self.operations[name]
+        if name == "start_server":
+            mode = kwargs.get("conn_mode")
+            if len(args) > START_SERVER_MODE:
+                mode = args[START_SERVER_MODE]
+            if mode != self._radio.UDP_MODE:
+                self._servers.add(args[1])
+        elif name == "socket_read":
+            stats.payload += len(result)
+            stats.empty += not result
+        elif name == "socket_write":
+            stats.payload += len(args[1])
+        elif name == "socket_available":
+            stats.empty += result == (255 if args[0] in self._servers else 0)
+
+    def _send_command(self, method):
+        def send_command(cmd, params=None, *, param_len_16=False):
+            stats = self._current_stats()
+            stats.commands += 1
+            stats.sent += command_size(params, param_len_16)
+            return method(cmd, params, param_len_16=param_len_16)
+
+        return send_command
+
+    def _read_byte(self, method):
+        def read_byte(spi):
+            self._current_stats().received += 1
+            return method(spi)
+
+        return read_byte
+
+    def _read_bytes(self, method):
+        def read_bytes(spi, buffer, start=0, end=None):
+            self._current_stats().received += (end or len(buffer)) - start
+            return method(spi, buffer, start, end)
+
+        return read_bytes
+
+    def _wait_for_ready(self, method):
+        def wait_for_ready():
+            start = time.monotonic_ns()
+            try:
+                return method()
+            finally:
+                self._current_stats().ready_ns += time.monotonic_ns() - start
+
+        return wait_for_ready
+
+    def start(self):
+        if self._wrapped:
+            return
+        for name in OPERATIONS:
+            if hasattr(self._radio, name):
+                self._wrap(name, self._operation(name))
+        self._wrap("_send_command", self._send_command)
+        self._wrap("_read_byte", self._read_byte)
+        self._wrap("_read_bytes", self._read_bytes)
+        self._wrap("_wait_for_ready", self._wait_for_ready)
+
+    def stop(self):
+        # the class methods show through again
+        for name in self._wrapped:
+            delattr(self._radio, name)
+        self._wrapped.clear()
+
+    def totals(self):
+        total = OperationStats()
+        for stats in self.operations.values():
+            total.calls += stats.calls
+            total.commands += stats.commands
+            total.sent += stats.sent
+            total.received += stats.received
+            total.payload += stats.payload
+            total.empty += stats.empty
+            total.ready_ns += stats.ready_ns
+            total.elapsed_ns += stats.elapsed_ns
+        return total
+
+    def report(self, prefix="spi"):
+        if not self.operations:
+            return
+        print()
+        print(
+            f"  {'operation':17} {'calls':>6} {'empty':>6} {'cmds':>6} {'out B':>7}"
+            f" {'in B':>7} {'payload':>7} {'ready ms':>8} {'total ms':>8}"
+        )
+        for name, stats in sorted(self.operations.items()):
+            print(
+                f"  {name:17} {stats.calls:6} {stats.empty:6} {stats.commands:6}"
+                f" {stats.sent:7} {stats.received:7} {stats.payload:7}"
+                f" {stats.ready_ns / 1_000_000:8.1f} {stats.elapsed_ns / 1_000_000:8.1f}"
+            )
+        total = self.totals()
+        print(f"  {total.commands} SPI commands moved {total.wire} bytes", end="")
+        print(f" for {total.payload} bytes of payload")
+
+        for name, stats in sorted(self.operations.items()):
+            if stats.calls and name != OTHER:
+                report_metric(
+                    f"{prefix}_{name}_us", stats.elapsed_ns // stats.calls // 1000, "us"
+                )
+        report_metric(f"{prefix}_commands", total.commands, "commands")
+        if total.payload:
+            overhead = (total.wire - total.payload) * 100 // total.payload
+            report_metric(f"{prefix}_overhead_percent", overhead, "%")
+        reads = self.operations.get("socket_read")
+        available = self.operations.get("socket_available")
+        if available is None:
+            return
+        if reads and reads.calls:
+            polls = round(available.calls / reads.calls, 1)
+            report_metric(f"{prefix}_polls_per_read", polls, "polls")
+        if total.elapsed_ns:
+            share = available.elapsed_ns * 100 // total.elapsed_ns
+            report_metric(f"{prefix}_available_time_percent", share, "%")
@@ -2,30 +2,170 @@
 #
 # SPDX-License-Identifier: MIT
 
+import json
+import os
 import random
 import time
+from errno import EAGAIN
 
-import alarm
+from network_platform import feed_watchdog, prompt, server_started, sleep_memory
+from result_store import ResultStore
+
+try:
+    import select
+except ImportError:
+    select = None
 
-RESULT_BLOCKS = 5
-RESULT_NOT_RUN = 255
 SLEEP_DELAY = 5
 TEST_PATH = "tests"
+MANIFEST_FILE = "test_manifest.json"
+MANIFEST_VERSION = 2
+
+# with NETWORK_TEST_RECORDS = 1 every result is also printed as a line of JSON after
+# RECORD_PREFIX, for helpers/record_collector.py
+RECORDS = os.getenv("NETWORK_TEST_RECORDS", None) in (1, "1", True, "true")
+RECORD_PREFIX = "@ntr "
+RECORD_VERSION = 1
+
+# socket buffer and write sizes, test_buffer_sweep.py recommends values per board and radio
+RECV_BUFFER = int(os.getenv("NETWORK_TEST_RECV_BUFFER", None) or 64)
+WRITE_SIZE = int(os.getenv("NETWORK_TEST_WRITE_SIZE", None) or 1024)
+
+# ValidationMatrix tags, file, test case or test names to run, comma separated
+SELECT = os.getenv("NETWORK_TEST_SELECT", None) or ""
+ORDER_NAME = "name"
+ORDER_DURATION = "duration"
+ORDER_FAIL_FIRST = "fail-first"
+ORDER = os.getenv("NETWORK_TEST_ORDER", None) or ORDER_NAME
+
+BATCH_RESERVE = int(os.getenv("NETWORK_TEST_BATCH_RESERVE", None) or 65536)
+# seconds a test file gets before the watchdog stops it, 0 for no limit
+FILE_BUDGET = int(os.getenv("NETWORK_TEST_FILE_BUDGET", "600"))
+
+# a CA certificate on the board, to trust the HTTPS stand-in of helpers/standin_helper.py
+CA_FILE = os.getenv("NETWORK_TEST_CA_FILE", None)
+
+DISCOVERY_HOST = os.getenv("NETWORK_TEST_DISCOVERY_HOST", None)
+DISCOVERY_PORT = int(os.getenv("NETWORK_TEST_DISCOVERY_PORT", None) or 5001)
+
+WAIT_BACKOFF_MIN = 0.0005
+WAIT_BACKOFF_MAX = 0.05
+# a progress dot is printed this often while waiting
+WAIT_PROGRESS_NS = 1_000_000_000
+
+# once a round trip has been timed, waits time out after this many of them per window of
+# data, but no sooner than the floor and no later than the test's own timeout, the
+# ceiling. A multiplier of 0 always waits for the ceiling.
+TIMEOUT_MULTIPLIER = float(os.getenv("NETWORK_TEST_TIMEOUT_MULTIPLIER", "10"))
+TIMEOUT_FLOOR = float(os.getenv("NETWORK_TEST_TIMEOUT_FLOOR", "2"))
+TIMEOUT_CEILING = float(os.getenv("NETWORK_TEST_TIMEOUT_CEILING", None) or 60)
+# bytes a transfer is assumed to move per round trip, two segments
+TIMEOUT_WINDOW = 2920
 
 RADIO_NATIVE = 1
 RADIO_ESP32SPI = 2
 RADIO_WIZNET5K = 3
 
 
+class WaitStats:
+    def __init__(self):
+        self.reset()
+
+    def record(self, polls, waited, timeout):
+        self.waits += 1
+        self.polls += polls
+        self.max_polls = max(self.max_polls, polls)
+        self.waited += waited
+        self.min_timeout = min(self.min_timeout or timeout, timeout)
+        self.max_timeout = max(self.max_timeout, timeout)
+
+    def reset(self):
+        self.waits = 0
+        self.polls = 0
+        self.max_polls = 0
+        self.waited = 0
+        self.min_timeout = None
+        self.max_timeout = 0
+
+
+wait_stats = WaitStats()
+
+
+class TimingStats:
+    def __init__(self):
+        self.reset()
+
+    def record(self, phases_ns, mem_before, mem_after, peak):
+        # phases_ns is the (setUp, test, tearDown) time of one test
+        self.tests += 1
+        for phase, elapsed in enumerate(phases_ns):
+            self.phases_ns[phase] += elapsed
+        low = min(mem_before, mem_after)
+        if self.mem_free_min is None or low < self.mem_free_min:
+            self.mem_free_min = low
+        self.mem_delta += mem_after - mem_before
+        if peak is not None and (self.heap_peak is None or peak > self.heap_peak):
+            self.heap_peak = peak
+
+    def record_waits(self, waits):
+        # the shortest timeout shows how far the adaptive ones came down
+        self.waited += waits.waited
+        if waits.min_timeout is not None:
+            self.min_timeout = min(
+                self.min_timeout or waits.min_timeout, waits.min_timeout
+            )
+
+    def record_fixture(self, created_ns=None):
+        # created_ns is None when a shared fixture was reused
+        if created_ns is None:
+            self.fixtures_reused += 1
+        else:
+            self.fixtures_created += 1
+            self.fixture_ns += created_ns
+
+    def reset(self):
+        self.tests = 0
+        self.phases_ns = [0, 0, 0]
+        self.mem_free_min = None
+        self.mem_delta = 0
+        self.heap_peak = None
+        self.fixtures_created = 0
+        self.fixtures_reused = 0
+        self.fixture_ns = 0
+        self.waited = 0
+        self.min_timeout = None
+
+    @property
+    def saved_ns(self):
+        # every reuse saved about what creating a fixture costs on average
+        if not self.fixtures_created:
+            return 0
+        return self.fixtures_reused * self.fixture_ns // self.fixtures_created
+
+
+timing_stats = TimingStats()
+# (name, value, unit) of every report_metric() since the test file started
+reported_metrics = []
+
+
 class ValidationMatrix:
     CORE_SSL = "core_ssl"
+    HANDSHAKE_TLS = "handshake_tls"
+    LATENCY_RTT = "latency_rtt"
     MQTT_CONNECTION = "mqtt_connection"
+    PACKET_RATE_UDP = "packet_rate_udp"
     REQUESTS_HTTP = "requests_http"
     REQUESTS_HTTPS = "requests_https"
     REQUESTS_NTP = "requests_ntp"
     REQUESTS_UDP = "requests_udp"
+    REQUEST_RATE_HTTP = "request_rate_http"
+    SCALING_TCP = "scaling_tcp"
     SERVER_TCP = "server_tcp"
     SERVER_UDP = "server_upd"
+    THROUGHPUT_MQTT = "throughput_mqtt"
+    STREAMING_HTTP = "streaming_http"
+    THROUGHPUT_TCP = "throughput_tcp"
+    TUNING_TCP = "tuning_tcp"
 
     TEST_RESULTS = {
         "U": "Unknown",
@@ -46,17 +186,131 @@ class ValidationMatrix:
         return validations
 
 
-def check_time(start, last_message, timeout):
-    elasped = time.monotonic()
+def announce_server(pool, ip_address, port, peer, protocol="TCP"):
+    announcement = f"Server started at: {ip_address}:{port} [{peer}]"
+    print(f" {announcement}", end="")
+    # ends the line, serial discovery reads whole lines and the progress dots follow below
+    print(f" - waiting for {protocol} client connection.")
+    if DISCOVERY_HOST:
+        send_discovery(pool, announcement)
+    server_started(peer, ip_address, port)
+
+
+def get_poller(sock):
+    # a socket or a list of them, readable when any of them is
+    if not sock or not hasattr(select, "poll"):
+        return None
+    poller = select.poll()
+    try:
+        for each in sock if isinstance(sock, list) else [sock]:
+            poller.register(each, select.POLLIN)
+    except (AttributeError, OSError, TypeError, ValueError):
+        return None
+    return poller
+
+
+def nonblocking_recv_into(sock, buffer):
+    # None while nothing is pending, a closed connection raises rather than waiting it out
+    try:
+        bytes_read = sock.recv_into(buffer, len(buffer))
+    except OSError as exc:
+        if exc.errno != EAGAIN:
+            raise
+        return None
+    if not bytes_read:
+        raise OSError("Connection closed by client")
+    return bytes_read
+
+
+class AdaptiveTimeout:
+    # Timeouts from the fastest round trip seen so far, the ceiling until there is one.
+    def __init__(self, ceiling=TIMEOUT_CEILING):
+        self.ceiling = ceiling
+        self.rtt = None
+        self.last = ceiling
+
+    def __call__(self, size=0):
+        self.last = self.ceiling
+        if self.rtt is not None and TIMEOUT_MULTIPLIER:
+            round_trips = 1 + size // TIMEOUT_WINDOW
+            timeout = TIMEOUT_MULTIPLIER * self.rtt * round_trips
+            self.last = min(self.ceiling, max(TIMEOUT_FLOOR, timeout))
+        return self.last
+
+    def add_rtt(self, start_ns):
+        rtt = (time.monotonic_ns() - start_ns) / 1_000_000_000
+        if self.rtt is None or rtt < self.rtt:
+            self.rtt = rtt
+
+    def measure_connect(self, pool, host, port, ssl_context=None):
+        # a TCP connect takes one round trip, the first one a name lookup as well, with an
+        # ssl_context the TLS handshake is timed with it. Only once, later calls keep it
+        if self.rtt is not None:
+            return
+        sock = pool.socket(pool.AF_INET, pool.SOCK_STREAM)
+        sock.settimeout(self())
+        if ssl_context is not None:
+            sock = ssl_context.wrap_socket(sock, server_hostname=host)
+        start = time.monotonic_ns()
+        try:
+            sock.connect((host, port))
+        finally:
+            sock.close()
+            self.record_wait(start)
+        self.add_rtt(start)
+
+    def record_wait(self, start_ns):
+        # for waits a library does, with the timeout last handed out
+        waited = (time.monotonic_ns() - start_ns) / 1_000_000_000
+        wait_stats.record(1, waited, self.last)
 
-    if int(elasped - start) > timeout:
-        raise TimeoutError(f"Didn't recieve message within {timeout} seconds")
 
-    if int(elasped - last_message) >= 1:
-        print(".", end="")
-        return elasped
+def wait_for(check, timeout, sock=None, progress=True):
+    # Calls check() until it returns something other than None. Sockets that
+    # select can poll block until readable, everything else backs off between polls.
+    poller = get_poller(sock)
+    backoff = WAIT_BACKOFF_MIN
+    polls = 0
+    timeout_ns = int(timeout * 1_000_000_000)
+    last_message = start = time.monotonic_ns()
+    while True:
+        feed_watchdog()
+        polls += 1
+        result = check()
+        now = time.monotonic_ns()
+        if result is not None:
+            wait_stats.record(polls, (now - start) / 1_000_000_000, timeout)
+            return result
+
+        remaining = (timeout_ns - (now - start)) / 1_000_000_000
+        if remaining <= 0:
+            wait_stats.record(polls, (now - start) / 1_000_000_000, timeout)
+            raise TimeoutError(f"Didn't recieve message within {timeout} seconds")
+
+        if progress and now - last_message >= WAIT_PROGRESS_NS:
+            print(".", end="")
+            last_message = now
+
+        if poller:
+            poller.poll(int(min(remaining, 1) * 1000) + 1)
+        else:
+            time.sleep(min(backoff, remaining))
+            backoff = min(backoff * 2, WAIT_BACKOFF_MAX)
+
+
+def load_ca_file(ssl_context):
+    # ESP32SPI keeps its certificates on the co-processor, its context can't load them
+    if not CA_FILE or not hasattr(ssl_context, "load_verify_locations"):
+        return ssl_context
+    with open(CA_FILE) as ca_file:
+        ssl_context.load_verify_locations(cadata=ca_file.read())
+    return ssl_context
 
-    return last_message
+
+def emit_record(record_type, record):
+    if RECORDS:
+        record["type"] = record_type
+        print(f"{RECORD_PREFIX}{json.dumps(record)}")
 
 
 def generate_random_number_values(value_min=1, value_max=9):
@@ -72,7 +326,9 @@ def get_ipv4_address(radio):
 
 def get_radio_force(value=None):
     if value is None:
-        value = alarm.sleep_memory[len(TEST_PATH)]
+        result_store = ResultStore(sleep_memory)
+        if result_store.load(verify=False):
+            value = result_store.radio
 
     if value == RADIO_NATIVE:
         return "wifi"
@@ -82,6 +338,18 @@ def get_radio_force(value=None):
         return "wiznet5k"
 
 
+def send_discovery(pool, announcement):
+    sock = pool.socket(pool.AF_INET, pool.SOCK_DGRAM)
+    try:
+        sock.sendto(announcement.encode(), (DISCOVERY_HOST, DISCOVERY_PORT))
+    finally:
+        sock.close()
+
+
+def parse_selection(selection):
+    return [name.strip() for name in selection.split(",") if name.strip()]
+
+
 def select_radio():
     while True:
         print("Radio options:")
@@ -89,7 +357,7 @@ def select_radio():
         print(" [2] ESP32SPI")
         print(" [3] WIZnet5k")
 
-        find_radio = input("Choose a radio [1-3]: ")
+        find_radio = prompt("Choose a radio [1-3]: ")
         print()
 
         if find_radio in ["1", "2", "3"]:
@@ -0,0 +1,131 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import sys
+import time
+
+"""
+Everything the runner needs from the board goes through here, so the same
+code can run on an MCU or on a dev box (see helpers/host_simulation.py).
+On CircuitPython these are the real modules, anywhere else the host
+implementation from helpers/host_platform.py is used.
+"""
+
+IS_HOST = sys.implementation.name != "circuitpython"
+
+if IS_HOST:
+    from host_platform import (
+        WatchDogTimeout,
+        board_id,
+        connection_manager_close_all,
+        deinit_radio,
+        enable_log,
+        feed_watchdog,
+        get_radio,
+        get_radio_socketpool,
+        get_radio_ssl_context,
+        heap_peak,
+        import_module,
+        mem_free,
+        prompt,
+        reload,
+        server_started,
+        sleep_memory,
+        start_watchdog,
+        stop_watchdog,
+    )
+else:
+    from gc import mem_free
+
+    import alarm
+    import board
+    import supervisor
+    from adafruit_connection_manager import (
+        connection_manager_close_all,
+        get_radio_socketpool,
+        get_radio_ssl_context,
+    )
+    from connection_helper import deinit_radio, enable_log, get_radio
+
+    board_id = board.board_id
+    sleep_memory = alarm.sleep_memory
+    prompt = input
+    reload = supervisor.reload
+
+    def heap_peak(reset=False):
+        # CircuitPython doesn't track the high water mark of the heap
+        return None
+
+    def import_module(module_name):
+        return __import__(module_name, None, None, ["*"])
+
+    def server_started(peer, ip_address, port):
+        pass
+
+    try:
+        from microcontroller import watchdog
+        from watchdog import WatchDogMode, WatchDogTimeout
+    except ImportError:
+        watchdog = None
+
+        class WatchDogTimeout(Exception):
+            pass
+
+    # how long a watchdog can wait varies, RP2040's stops at about 8.3s, so where the budget
+    # is too long it is fed to the watchdog in slices of this
+    WATCHDOG_SLICE = 8
+    # when the budget runs out, the slice the watchdog was fed, and whether it ran out
+    budget = {"deadline": None, "slice": None, "spent": False}
+
+    def start_watchdog(timeout):
+        # False when the board has no watchdog
+        if watchdog is None:
+            return False
+        try:
+            watchdog.timeout = timeout
+        except ValueError:
+            try:
+                watchdog.timeout = min(timeout, WATCHDOG_SLICE)
+            except ValueError:
+                return False
+        try:
+            watchdog.mode = WatchDogMode.RAISE
+        except NotImplementedError:
+            # the board resets instead, and the file is timed out when it comes back
+            watchdog.mode = WatchDogMode.RESET
+        budget["slice"] = watchdog.timeout
+        budget["deadline"] = time.monotonic() + timeout
+        budget["spent"] = False
+        return True
+
+    def feed_watchdog():
+        # called wherever the tests wait and between tests, keeps the watchdog going until
+        # the budget is spent
+        if budget["deadline"] is None:
+            return
+        remaining = budget["deadline"] - time.monotonic()
+        if not budget["spent"] and remaining > 0:
+            # the last slice ends with the budget, or a second after
+            if remaining < watchdog.timeout:
+                watchdog.timeout = max(remaining, 1)
+            watchdog.feed()
+            return
+        if not budget["spent"]:
+            budget["spent"] = True
+            # one more slice for the runner to stop the watchdog, if it doesn't get there,
+            # stuck in a driver or the exception swallowed, the board resets
+            watchdog.timeout = budget["slice"]
+            watchdog.mode = WatchDogMode.RESET
+            watchdog.feed()
+        raise WatchDogTimeout()
+
+    def stop_watchdog():
+        budget["deadline"] = None
+        if watchdog is None or watchdog.mode is None:
+            return
+        try:
+            watchdog.deinit()
+        except NotImplementedError:
+            # some ports can't stop a RESET watchdog, the board resets within a slice
+            pass
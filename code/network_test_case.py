@@ -2,40 +2,134 @@
 #
 # SPDX-License-Identifier: MIT
 
+import gc
 import os
+import time
 import traceback
-from unittest import SkipTest, TestCase
+from unittest import SkipTest, TestCase, TestResult
 
-from helpers import get_radio_force
+from network_platform import WatchDogTimeout, feed_watchdog, heap_peak, mem_free
+
+from helpers import get_radio_force, load_ca_file, timing_stats, wait_stats
 
 FORCE_RADIO = os.getenv("NETWORK_TEST_FORCE_RADIO", get_radio_force())
 
+SCOPE_METHOD = "method"
+SCOPE_CLASS = "class"
+SCOPE_MODULE = "module"
 
-class NetworkTestCase(TestCase):
-    def setUp(self):
-        import adafruit_connection_manager
-        from connection_helper import enable_log, get_radio
+# fixtures shared by a TestCase class or a whole module, by qualname or module name
+shared_fixtures = {}
+# the test case or test names to run in the current file, all of them when empty
+selected_tests = set()
+
+
+class Fixture:
+    def __init__(self):
+        from network_platform import (
+            enable_log,
+            get_radio,
+            get_radio_socketpool,
+            get_radio_ssl_context,
+        )
 
         enable_log(False)
         self.radio = get_radio(force=FORCE_RADIO)
-        self.pool = adafruit_connection_manager.get_radio_socketpool(self.radio)
-        self.ssl_context = adafruit_connection_manager.get_radio_ssl_context(self.radio)
+        self.pool = get_radio_socketpool(self.radio)
+        self.ssl_context = load_ca_file(get_radio_ssl_context(self.radio))
+        self._session = None
+
+    def close(self):
+        from network_platform import connection_manager_close_all, deinit_radio
+
+        connection_manager_close_all(release_references=True)
+        deinit_radio(self.radio)
+
+    @property
+    def session(self):
+        if self._session is None:
+            import adafruit_requests
+
+            self._session = adafruit_requests.Session(self.pool, self.ssl_context)
+        return self._session
+
+
+def close_fixtures(scope_key=None):
+    for key in list(shared_fixtures):
+        if scope_key is None or key == scope_key:
+            shared_fixtures.pop(key).close()
+
+
+class NetworkTestCase(TestCase):
+    # a file with a radio destructive test case always gets a boot to itself
+    RADIO_DESTRUCTIVE = False
+    # SCOPE_CLASS or SCOPE_MODULE share one radio, pool and session between tests
+    FIXTURE_SCOPE = SCOPE_METHOD
+
+    @property
+    def scope_key(self):
+        if self.FIXTURE_SCOPE == SCOPE_CLASS:
+            return type(self).__qualname__
+        if self.FIXTURE_SCOPE == SCOPE_MODULE:
+            return type(self).__module__
+        return None
+
+    @property
+    def session(self):
+        return self.fixture.session
+
+    def setUp(self):
+        scope_key = self.scope_key
+        self.fixture = shared_fixtures.get(scope_key)
+        if self.fixture is None:
+            start = time.monotonic_ns()
+            self.fixture = Fixture()
+            timing_stats.record_fixture(time.monotonic_ns() - start)
+            if scope_key is not None:
+                shared_fixtures[scope_key] = self.fixture
+        else:
+            timing_stats.record_fixture()
+        self.radio = self.fixture.radio
+        self.pool = self.fixture.pool
+        self.ssl_context = self.fixture.ssl_context
 
     def tearDown(self):
-        import adafruit_connection_manager
-        from connection_helper import deinit_radio
+        if self.scope_key is None:
+            self.fixture.close()
 
-        adafruit_connection_manager.connection_manager_close_all(
-            release_references=True
+    def is_selected(self, name):
+        return (
+            not selected_tests
+            or name in selected_tests
+            or type(self).__qualname__ in selected_tests
         )
-        deinit_radio(self.radio)
+
+    def print_timing(self, phases_ns, mem_before, mem_after, peak):
+        setup_ms, test_ms, teardown_ms = (phase / 1_000_000 for phase in phases_ns)
+        print(
+            f"  setUp: {setup_ms:.1f}ms, test: {test_ms:.1f}ms,"
+            f" tearDown: {teardown_ms:.1f}ms,"
+            f" mem_free: {mem_before} -> {mem_after}",
+            end="",
+        )
+        if peak is not None:
+            print(f", heap peak: {peak}", end="")
+        print()
 
     def run(self, result: TestResult):
+        test_case_name = type(self).__qualname__
         for name in dir(self):
-            if name.startswith("test"):
-                print(f"{name} ({self.__qualname__}) ...", end="")  # report progress
+            if name.startswith("test") and self.is_selected(name):
+                feed_watchdog()
+                print(f"{name} ({test_case_name}) ...", end="")  # report progress
                 test_method = getattr(self, name)
+                wait_stats.reset()
+                gc.collect()
+                mem_before = mem_free()
+                heap_peak(reset=True)
+                start = time.monotonic_ns()
                 self.setUp()  # Pre-test setup (every test)
+                setup_done = time.monotonic_ns()
                 try:
                     result.testsRun += 1
                     test_method()
@@ -47,11 +141,33 @@ class NetworkTestCase(TestCase):
                 except AssertionError as e:
                     print(" FAIL:", e.args[0] if e.args else "no assert message")
                     result.failuresNum += 1
-                except (SystemExit, KeyboardInterrupt):
+                except (SystemExit, KeyboardInterrupt, WatchDogTimeout):
                     raise
                 except Exception as e:  # noqa
                     print(" ERROR", type(e).__name__)
                     print("".join(traceback.format_exception(e)))
                     result.errorsNum += 1
                 finally:
+                    test_done = time.monotonic_ns()
                     self.tearDown()  # Post-test teardown (every test)
+                phases_ns = (
+                    setup_done - start,
+                    test_done - setup_done,
+                    time.monotonic_ns() - test_done,
+                )
+                peak = heap_peak()
+                gc.collect()
+                mem_after = mem_free()
+                timing_stats.record(phases_ns, mem_before, mem_after, peak)
+                timing_stats.record_waits(wait_stats)
+                self.print_timing(phases_ns, mem_before, mem_after, peak)
+                if wait_stats.waits:
+                    print(
+                        f"  waits: {wait_stats.waits}, polls: {wait_stats.polls}"
+                        f" (max {wait_stats.max_polls}),"
+                        f" waited: {wait_stats.waited:.3f}s,"
+                        f" timeouts: {wait_stats.min_timeout:.3f}"
+                        f"-{wait_stats.max_timeout:.3f}s"
+                    )
+        if self.FIXTURE_SCOPE == SCOPE_CLASS:
+            close_fixtures(self.scope_key)
@@ -0,0 +1,349 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import struct
+
+try:
+    from binascii import crc32
+except ImportError:
+    crc32 = None
+
+RESULT_MAGIC = b"NTR"
+RESULT_VERSION = 6
+
+# magic, version, radio, file count, finished, bytes used after the header,
+# dropped metrics, length of the test selection that follows the header, crc
+RESULT_HEADER = ">3sBBBBHHBI"
+RESULT_HEADER_SIZE = struct.calcsize(RESULT_HEADER)
+RESULT_HEADER_CHECKED = RESULT_HEADER[:-1]
+# state, passed, failed, errored, skipped, exceptioned, then in ms the wall time and
+# the setUp, test and tearDown totals and the setUp time saved by shared fixtures, then the
+# lowest mem_free, its change, the peak heap and the memory the file needed, in ms the time
+# spent waiting and the shortest timeout, then the wall time and whether it failed the last
+# time it ran, which are kept for the next run
+RESULT_FILE = ">BHHHHHIIIIIIiIIIIIB"
+RESULT_FILE_SIZE = struct.calcsize(RESULT_FILE)
+# file index, value kind, name length, unit length, then the value, name and unit
+RESULT_METRIC = ">BBBB"
+RESULT_METRIC_SIZE = struct.calcsize(RESULT_METRIC) + 4
+
+STATE_NOT_RUN = 0
+STATE_FINISHED = 1
+STATE_DESELECTED = 2
+# written before a file starts, a file still running when the board comes back never finished
+STATE_RUNNING = 3
+STATE_TIMED_OUT = 4
+
+METRIC_INT = 0
+METRIC_FLOAT = 1
+
+COUNTER_MAX = 0xFFFF
+UNSIGNED_MAX = 0xFFFFFFFF
+INT_MAX = 0x7FFFFFFF
+TEXT_MAX = 0xFF
+
+
+def checksum(data, crc=0):
+    if crc32:
+        return crc32(data, crc) & 0xFFFFFFFF
+
+    crc ^= 0xFFFFFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ (0xEDB88320 & -(crc & 1))
+    return crc ^ 0xFFFFFFFF
+
+
+def clamp(value, high=UNSIGNED_MAX, low=0):
+    return max(low, min(value, high))
+
+
+class FileResult:
+    def __init__(self, record=None):
+        if record is None:
+            record = (STATE_NOT_RUN,) + (0,) * 10
+            record += (UNSIGNED_MAX, 0, UNSIGNED_MAX, UNSIGNED_MAX, 0, 0)
+            record += (UNSIGNED_MAX, 0)
+        (
+            self.state,
+            self.passed,
+            self.failed,
+            self.errored,
+            self.skipped,
+            self.exceptioned,
+            self.duration_ms,
+            self.setup_ms,
+            self.test_ms,
+            self.teardown_ms,
+            self.saved_ms,
+            self.mem_free_min,
+            self.mem_delta,
+            self.heap_peak,
+            self.mem_cost,
+            self.waited_ms,
+            self.timeout_ms,
+            self.last_duration_ms,
+            self.last_failed,
+        ) = record
+        # not every platform can measure the heap, nor has every file been run before
+        if self.mem_free_min == UNSIGNED_MAX:
+            self.mem_free_min = None
+        if self.heap_peak == UNSIGNED_MAX:
+            self.heap_peak = None
+        if self.mem_cost == UNSIGNED_MAX:
+            self.mem_cost = None
+        if self.last_duration_ms == UNSIGNED_MAX:
+            self.last_duration_ms = None
+        self.last_failed = bool(self.last_failed)
+
+    def as_dict(self):
+        return {
+            "passed": self.passed,
+            "failed": self.failed,
+            "errored": self.errored,
+            "skipped": self.skipped,
+            "exceptioned": self.exceptioned,
+            "duration_ms": self.duration_ms,
+            "setup_ms": self.setup_ms,
+            "test_ms": self.test_ms,
+            "teardown_ms": self.teardown_ms,
+            "saved_ms": self.saved_ms,
+            "mem_free_min": self.mem_free_min,
+            "mem_delta": self.mem_delta,
+            "heap_peak": self.heap_peak,
+            "mem_cost": self.mem_cost,
+            "waited_ms": self.waited_ms,
+            "timeout_ms": self.timeout_ms,
+            "timed_out": self.state == STATE_TIMED_OUT,
+        }
+
+    def pack(self):
+        return struct.pack(
+            RESULT_FILE,
+            self.state,
+            clamp(self.passed, COUNTER_MAX),
+            clamp(self.failed, COUNTER_MAX),
+            clamp(self.errored, COUNTER_MAX),
+            clamp(self.skipped, COUNTER_MAX),
+            clamp(self.exceptioned, COUNTER_MAX),
+            clamp(self.duration_ms),
+            clamp(self.setup_ms),
+            clamp(self.test_ms),
+            clamp(self.teardown_ms),
+            clamp(self.saved_ms),
+            UNSIGNED_MAX if self.mem_free_min is None else clamp(self.mem_free_min),
+            clamp(self.mem_delta, INT_MAX, -INT_MAX),
+            UNSIGNED_MAX if self.heap_peak is None else clamp(self.heap_peak),
+            UNSIGNED_MAX if self.mem_cost is None else clamp(self.mem_cost),
+            clamp(self.waited_ms),
+            clamp(self.timeout_ms),
+            (
+                UNSIGNED_MAX
+                if self.last_duration_ms is None
+                else clamp(self.last_duration_ms, UNSIGNED_MAX - 1)
+            ),
+            self.last_failed,
+        )
+
+    def carry_over(self, previous):
+        # what the next run needs of the last one, ordering and batching go by it
+        self.mem_cost = previous.mem_cost
+        if previous.state in (STATE_FINISHED, STATE_TIMED_OUT):
+            self.last_duration_ms = previous.duration_ms
+            if previous.state == STATE_TIMED_OUT:
+                # found unfinished after a reset it ran for an unknown time, but no shorter
+                self.last_duration_ms = max(
+                    previous.duration_ms, previous.last_duration_ms or 0
+                )
+            self.last_failed = bool(
+                previous.state == STATE_TIMED_OUT
+                or previous.failed
+                or previous.errored
+                or previous.exceptioned
+            )
+        else:
+            self.last_duration_ms = previous.last_duration_ms
+            self.last_failed = previous.last_failed
+
+
+class ResultStore:
+    # Test results kept in sleep_memory across supervisor.reload(): a header, the
+    # test selection, one fixed size record per test file and the reported metrics
+    # after them.
+    def __init__(self, memory):
+        self._memory = memory
+        self.radio = None
+        self.file_count = 0
+        self.finished = False
+        self.dropped = 0
+        self.selection = ""
+        self._selection_size = 0
+        self._used = 0
+
+    def _checksum(self):
+        header = struct.pack(
+            RESULT_HEADER_CHECKED,
+            RESULT_MAGIC,
+            RESULT_VERSION,
+            self.radio,
+            self.file_count,
+            self.finished,
+            self._used,
+            self.dropped,
+            self._selection_size,
+        )
+        return checksum(self._read(RESULT_HEADER_SIZE, self._used), checksum(header))
+
+    def _commit(self):
+        header = struct.pack(
+            RESULT_HEADER,
+            RESULT_MAGIC,
+            RESULT_VERSION,
+            self.radio,
+            self.file_count,
+            self.finished,
+            self._used,
+            self.dropped,
+            self._selection_size,
+            self._checksum(),
+        )
+        self._write(0, header)
+
+    def _file_offset(self, index):
+        return RESULT_HEADER_SIZE + self._selection_size + index * RESULT_FILE_SIZE
+
+    def _read(self, start, size):
+        return bytes(self._memory[start : start + size])
+
+    def _write(self, start, data):
+        self._memory[start : start + len(data)] = data
+
+    def _append_metric(self, index, name, value, unit):
+        name = str(name).encode()[:TEXT_MAX]
+        unit = str(unit).encode()[:TEXT_MAX]
+        if isinstance(value, int):
+            entry = struct.pack(
+                RESULT_METRIC + "i",
+                index,
+                METRIC_INT,
+                len(name),
+                len(unit),
+                clamp(value, INT_MAX, -INT_MAX),
+            )
+        else:
+            entry = struct.pack(
+                RESULT_METRIC + "f",
+                index,
+                METRIC_FLOAT,
+                len(name),
+                len(unit),
+                float(value),
+            )
+        entry += name + unit
+
+        start = RESULT_HEADER_SIZE + self._used
+        if start + len(entry) > len(self._memory):
+            self.dropped = min(self.dropped + 1, COUNTER_MAX)
+            return False
+        self._write(start, entry)
+        self._used += len(entry)
+        return True
+
+    def add_metrics(self, index, metrics):
+        # written out by the next write_file() for the same index
+        for name, value, unit in metrics:
+            self._append_metric(index, name, value, unit)
+
+    def close(self):
+        # the run is over, but what it learned is kept for the next one
+        self.finished = True
+        self._commit()
+
+    def create(self, radio, file_count, selection=""):
+        selection_data = selection.encode()[:TEXT_MAX]
+        used = len(selection_data) + file_count * RESULT_FILE_SIZE
+        if RESULT_HEADER_SIZE + used > len(self._memory):
+            raise MemoryError(
+                f"{file_count} test files don't fit in {len(self._memory)} bytes of sleep_memory"
+            )
+        previous = [FileResult()] * file_count
+        if self.load() and self.file_count == file_count:
+            previous = [self.read_file(index) for index in range(file_count)]
+
+        self.radio = radio
+        self.file_count = file_count
+        self.finished = False
+        self.dropped = 0
+        self.selection = selection_data.decode()
+        self._selection_size = len(selection_data)
+        self._used = used
+        self._write(RESULT_HEADER_SIZE, selection_data)
+        for index in range(file_count):
+            not_run = FileResult()
+            not_run.carry_over(previous[index])
+            self._write(self._file_offset(index), not_run.pack())
+        self._commit()
+
+    def load(self, verify=True):
+        if len(self._memory) < RESULT_HEADER_SIZE:
+            return False
+        (
+            magic,
+            version,
+            radio,
+            file_count,
+            finished,
+            used,
+            dropped,
+            selection_size,
+            crc,
+        ) = struct.unpack(RESULT_HEADER, self._read(0, RESULT_HEADER_SIZE))
+        if magic != RESULT_MAGIC or version != RESULT_VERSION:
+            return False
+        if RESULT_HEADER_SIZE + used > len(self._memory) or selection_size > used:
+            return False
+
+        self.radio = radio
+        self.file_count = file_count
+        self.finished = bool(finished)
+        self.dropped = dropped
+        self._selection_size = selection_size
+        self._used = used
+        if verify and crc != self._checksum():
+            return False
+        try:
+            self.selection = self._read(RESULT_HEADER_SIZE, selection_size).decode()
+        except UnicodeError:
+            return False
+        return True
+
+    def metrics(self, index):
+        offset = self._file_offset(self.file_count)
+        end = RESULT_HEADER_SIZE + self._used
+        while offset < end:
+            file_index, kind, name_size, unit_size = struct.unpack(
+                RESULT_METRIC, self._read(offset, RESULT_METRIC_SIZE - 4)
+            )
+            value_format = ">f" if kind == METRIC_FLOAT else ">i"
+            value = struct.unpack(value_format, self._read(offset + 4, 4))[0]
+            offset += RESULT_METRIC_SIZE
+            name = self._read(offset, name_size).decode()
+            offset += name_size
+            unit = self._read(offset, unit_size).decode()
+            offset += unit_size
+            if file_index == index:
+                yield name, value, unit
+
+    def read_file(self, index):
+        record = self._read(self._file_offset(index), RESULT_FILE_SIZE)
+        return FileResult(struct.unpack(RESULT_FILE, record))
+
+    @property
+    def used(self):
+        return RESULT_HEADER_SIZE + self._used
+
+    def write_file(self, index, file_result):
+        self._write(self._file_offset(index), file_result.pack())
+        self._commit()
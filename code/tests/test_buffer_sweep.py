@@ -0,0 +1,177 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import time
+
+from benchmark_helpers import (
+    ESP32SPIStream,
+    HeapSampler,
+    NativeStream,
+    esp32spi_accept,
+    native_accept,
+    parse_sizes,
+    per_second,
+    report_metric,
+)
+from network_test_case import NetworkTestCase, SkipTest
+
+from helpers import (
+    RECV_BUFFER,
+    WRITE_SIZE,
+    ValidationMatrix,
+    announce_server,
+    emit_record,
+    get_ipv4_address,
+)
+
+# a sweep takes a while and reports a lot, so it only runs when asked for
+SWEEP = os.getenv("NETWORK_TEST_SWEEP", None) in (1, "1", True, "true")
+PORT = int(os.getenv("NETWORK_TEST_SERVER_PORT", None) or 5000)
+MESSAGE_TIMEOUT = int(os.getenv("NETWORK_TEST_TCP_MESSAGE_TIMEOUT", None) or 60)
+SWEEP_TOTAL = int(os.getenv("NETWORK_TEST_SWEEP_TOTAL", None) or 32768)
+SWEEP_BUFFERS = parse_sizes(
+    os.getenv("NETWORK_TEST_SWEEP_BUFFERS", None) or "64,256,1024,4096"
+)
+SWEEP_WRITES = parse_sizes(
+    os.getenv("NETWORK_TEST_SWEEP_WRITES", None) or "256,1024,4096"
+)
+# the smallest size within this many percent of the fastest is recommended, it saves heap
+SWEEP_TOLERANCE = 5
+
+
+def pick(results):
+    # results are (size, throughput, heap used) tuples
+    fastest = max(throughput for _, throughput, _ in results)
+    return min(
+        result
+        for result in results
+        if result[1] * 100 >= fastest * (100 - SWEEP_TOLERANCE)
+    )
+
+
+class TestBufferSweep(NetworkTestCase):
+    VALIDATES = [
+        ValidationMatrix.TUNING_TCP,
+    ]
+
+    def receive(self, stream, buffer_size, write_size):
+        # the peer writes write_size pieces, we read into a buffer_size buffer
+        sampler = HeapSampler()
+        buffer = bytearray(buffer_size)
+        stream.send_all(f"RX {SWEEP_TOTAL} {write_size}\n".encode())
+        received = 0
+        start = time.monotonic_ns()
+        while received < SWEEP_TOTAL:
+            received += stream.recv_into(
+                buffer, min(buffer_size, SWEEP_TOTAL - received)
+            )
+            sampler.sample()
+        elapsed_ns = time.monotonic_ns() - start
+        return per_second(received, elapsed_ns), sampler.start - sampler.low
+
+    def send(self, stream, write_size):
+        sampler = HeapSampler()
+        payload = memoryview(bytearray(write_size))
+        ack = bytearray(3)
+        stream.send_all(f"TX {SWEEP_TOTAL} {write_size}\n".encode())
+        sent = 0
+        start = time.monotonic_ns()
+        while sent < SWEEP_TOTAL:
+            size = min(write_size, SWEEP_TOTAL - sent)
+            stream.send_all(payload[:size])
+            sent += size
+            sampler.sample()
+        stream.recv_exactly(ack, len(ack))
+        elapsed_ns = time.monotonic_ns() - start
+        self.assertEqual(bytes(ack), b"OK\n")
+        return per_second(sent, elapsed_ns), sampler.start - sampler.low
+
+    def run_sweep(self, stream):
+        print()
+        print(f"  {'buffer':>8} {'write':>8} {'B/s':>10} {'heap B':>8}")
+        receives = []
+        for buffer_size in SWEEP_BUFFERS:
+            # the fastest write size of the peer is what each buffer size is judged by
+            best = (0, 0)
+            for write_size in SWEEP_WRITES:
+                rate, heap = self.receive(stream, buffer_size, write_size)
+                print(f"  {buffer_size:8} {write_size:8} {rate:10} {heap:8} rx")
+                name = f"sweep_rx_{buffer_size}_{write_size}"
+                report_metric(name, rate, "B/s")
+                report_metric(f"{name}_heap", heap, "B")
+                best = max(best, (rate, heap))
+            receives.append((buffer_size, best[0], best[1]))
+
+        sends = []
+        for write_size in SWEEP_WRITES:
+            rate, heap = self.send(stream, write_size)
+            print(f"  {'':8} {write_size:8} {rate:10} {heap:8} tx")
+            report_metric(f"sweep_tx_{write_size}", rate, "B/s")
+            report_metric(f"sweep_tx_{write_size}_heap", heap, "B")
+            sends.append((write_size, rate, heap))
+        stream.send_all(b"END\n")
+
+        recv_buffer, rx_rate, _ = pick(receives)
+        write_size, tx_rate, _ = pick(sends)
+        report_metric("sweep_recv_buffer", recv_buffer, "B")
+        report_metric("sweep_write_size", write_size, "B")
+        print(f"  Recommended for {self.radio.__class__.__name__}, in settings.toml:")
+        print(f"  NETWORK_TEST_RECV_BUFFER = {recv_buffer}")
+        print(f"  NETWORK_TEST_WRITE_SIZE = {write_size}")
+        if (recv_buffer, write_size) != (RECV_BUFFER, WRITE_SIZE):
+            print(f"  (now {RECV_BUFFER} and {WRITE_SIZE})")
+        emit_record(
+            "tuning",
+            {
+                "transport": self.radio.__class__.__name__,
+                "recv_buffer": recv_buffer,
+                "write_size": write_size,
+                "rx": rx_rate,
+                "tx": tx_rate,
+                "receives": receives,
+                "sends": sends,
+            },
+        )
+
+    def test_esp32spi_buffer_sweep(self):
+        if not SWEEP:
+            raise SkipTest("NETWORK_TEST_SWEEP isn't set")
+        if self.radio.__class__.__name__ != "ESP_SPIcontrol":
+            raise SkipTest("self.radio isn't an ESP32SPI")
+
+        ip_address = get_ipv4_address(self.radio)
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_STREAM)
+        self.radio.start_server(PORT, sock._socknum, conn_mode=self.radio.TCP_MODE)
+
+        # the tcp_throughput peer writes and reads in the sizes it is told
+        announce_server(self.pool, ip_address, PORT, "tcp_throughput", "TCP")
+
+        sock_client = esp32spi_accept(self.radio, self.pool, sock, MESSAGE_TIMEOUT)
+        stream = ESP32SPIStream(self.radio, sock_client, MESSAGE_TIMEOUT)
+        self.run_sweep(stream)
+        stream.close()
+        sock.close()
+
+    def test_native_buffer_sweep(self):
+        if not SWEEP:
+            raise SkipTest("NETWORK_TEST_SWEEP isn't set")
+        if self.radio.__class__.__name__ == "ESP_SPIcontrol":
+            raise SkipTest("self.radio isn't native")
+
+        ip_address = get_ipv4_address(self.radio)
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_STREAM)
+        sock.settimeout(None)
+        sock.setsockopt(self.pool.SOL_SOCKET, self.pool.SO_REUSEADDR, 1)
+        sock.bind((ip_address, PORT))
+        sock.listen(1)
+        sock.setblocking(False)
+
+        announce_server(self.pool, ip_address, PORT, "tcp_throughput", "TCP")
+
+        sock_client = native_accept(sock, MESSAGE_TIMEOUT)
+        stream = NativeStream(sock_client, MESSAGE_TIMEOUT)
+        self.run_sweep(stream)
+        stream.close()
+        sock.close()
@@ -0,0 +1,87 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import time
+
+from benchmark_helpers import LatencyStats, per_second, report_metric, split_url
+from network_test_case import SCOPE_CLASS, NetworkTestCase, SkipTest
+
+from helpers import ValidationMatrix
+
+HTTP_URL = os.getenv("NETWORK_TEST_HTTP_URL", None)
+HTTP_REQUESTS = int(os.getenv("NETWORK_TEST_HTTP_REQUESTS", None) or 50)
+HTTP_SIZE = int(os.getenv("NETWORK_TEST_HTTP_SIZE", None) or 256)
+HTTP_CHUNK_SIZE = 256
+
+
+class TestHTTPBenchmark(NetworkTestCase):
+    VALIDATES = [
+        ValidationMatrix.REQUEST_RATE_HTTP,
+    ]
+    FIXTURE_SCOPE = SCOPE_CLASS
+
+    def run_requests(self, name, headers=None, reconnect=False):
+        from adafruit_connection_manager import connection_manager_close_all
+
+        url = f"{HTTP_URL}/bytes/{HTTP_SIZE}"
+        stats = LatencyStats()
+        connection_requests = 0
+        start = time.monotonic_ns()
+        for _ in range(HTTP_REQUESTS):
+            request_start = time.monotonic_ns()
+            response = self.session.get(url, headers=headers)
+            # get() returns once the status line and headers are in
+            stats.add(time.monotonic_ns() - request_start)
+            self.assertEqual(response.status_code, 200)
+            connection_requests = int(response.headers.get("x-connection-requests", 0))
+            body_size = 0
+            for chunk in response.iter_content(chunk_size=HTTP_CHUNK_SIZE):
+                body_size += len(chunk)
+            response.close()
+            self.assertEqual(body_size, HTTP_SIZE)
+            if reconnect:
+                connection_manager_close_all(self.pool)
+        elapsed_ns = time.monotonic_ns() - start
+
+        print()
+        report_metric(
+            f"{name}_rate", per_second(HTTP_REQUESTS, elapsed_ns), "requests/s"
+        )
+        stats.report(f"{name}_ttfb", "requests")
+        return connection_requests
+
+    def test_http_connect(self):
+        if not HTTP_URL:
+            raise SkipTest("NETWORK_TEST_HTTP_URL isn't set")
+
+        from adafruit_connection_manager import get_connection_manager
+
+        proto, host, port = split_url(HTTP_URL)
+        connection_manager = get_connection_manager(self.pool)
+        stats = LatencyStats()
+        for _ in range(HTTP_REQUESTS):
+            start = time.monotonic_ns()
+            sock = connection_manager.get_socket(host, port, proto)
+            stats.add(time.monotonic_ns() - start)
+            connection_manager.close_socket(sock)
+
+        print()
+        stats.report("http_connect", "connections")
+
+    def test_http_keep_alive(self):
+        if not HTTP_URL:
+            raise SkipTest("NETWORK_TEST_HTTP_URL isn't set")
+
+        connection_requests = self.run_requests("http_keep_alive")
+        self.assertTrue(connection_requests > 1, "The connection wasn't reused")
+
+    def test_http_new_connection(self):
+        if not HTTP_URL:
+            raise SkipTest("NETWORK_TEST_HTTP_URL isn't set")
+
+        connection_requests = self.run_requests(
+            "http_new_connection", headers={"Connection": "close"}, reconnect=True
+        )
+        self.assertEqual(connection_requests, 1, "A connection was reused")
@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import time
+
+from benchmark_helpers import (
+    PATTERN,
+    HeapSampler,
+    NativeStream,
+    PatternStream,
+    parse_sizes,
+    per_second,
+    report_metric,
+    split_url,
+)
+from network_test_case import SCOPE_CLASS, NetworkTestCase, SkipTest
+
+from helpers import ValidationMatrix
+
+HTTP_URL = os.getenv("NETWORK_TEST_HTTP_URL", None)
+STREAM_SIZE = int(os.getenv("NETWORK_TEST_STREAM_SIZE", None) or 1048576)
+STREAM_CHUNKS = parse_sizes(
+    os.getenv("NETWORK_TEST_STREAM_CHUNKS", None) or "256,1024,4096"
+)
+STREAM_TIMEOUT = int(os.getenv("NETWORK_TEST_STREAM_TIMEOUT", None) or 30)
+# mem_free() is sampled about this often, sampling every chunk would cost more than it saw
+SAMPLE_BYTES = 16384
+RESPONSE_SIZE = 256
+
+
+class TestHTTPStream(NetworkTestCase):
+    VALIDATES = [
+        ValidationMatrix.STREAMING_HTTP,
+    ]
+    FIXTURE_SCOPE = SCOPE_CLASS
+
+    def check_upload(self, response_text):
+        # the stand-in answers "received <n> mismatched <m>"
+        _, received, _, mismatched = response_text.split()
+        self.assertEqual(int(received), STREAM_SIZE)
+        self.assertEqual(int(mismatched), 0, "The upload arrived corrupted")
+
+    def read_response(self, sock):
+        response = bytearray(RESPONSE_SIZE)
+        view = memoryview(response)
+        received = 0
+        while received < RESPONSE_SIZE:
+            bytes_read = sock.recv_into(view[received:], RESPONSE_SIZE - received)
+            if not bytes_read:
+                break
+            received += bytes_read
+        head, _, body = bytes(response[:received]).partition(b"\r\n\r\n")
+        self.assertTrue(head.startswith(b"HTTP/1.1 200"), f"Got {head}")
+        return body.decode()
+
+    def run_download(self, name, chunk_size):
+        response = self.session.get(f"{HTTP_URL}/bytes/{STREAM_SIZE}", stream=True)
+        self.assertEqual(response.status_code, 200)
+        sampler = HeapSampler()
+        received = 0
+        next_sample = SAMPLE_BYTES
+        start = time.monotonic_ns()
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            # the first byte of every chunk is enough to catch a skipped or repeated read
+            self.assertEqual(chunk[0], received % len(PATTERN))
+            received += len(chunk)
+            if received >= next_sample:
+                sampler.sample()
+                next_sample += SAMPLE_BYTES
+        elapsed_ns = time.monotonic_ns() - start
+        response.close()
+
+        self.assertEqual(received, STREAM_SIZE)
+        report_metric(f"{name}_throughput", per_second(received, elapsed_ns), "B/s")
+        sampler.report(name)
+
+    def test_http_stream_download(self):
+        if not HTTP_URL:
+            raise SkipTest("NETWORK_TEST_HTTP_URL isn't set")
+
+        print()
+        for chunk_size in STREAM_CHUNKS:
+            self.run_download(f"http_download_{chunk_size}", chunk_size)
+
+    def test_http_stream_upload(self):
+        if not HTTP_URL:
+            raise SkipTest("NETWORK_TEST_HTTP_URL isn't set")
+
+        from adafruit_connection_manager import get_connection_manager
+
+        print()
+        # adafruit_requests sends a file-like body in its own fixed size pieces
+        sampler = HeapSampler()
+        start = time.monotonic_ns()
+        response = self.session.post(
+            f"{HTTP_URL}/upload", data=PatternStream(STREAM_SIZE)
+        )
+        elapsed_ns = time.monotonic_ns() - start
+        sampler.sample()
+        self.assertEqual(response.status_code, 200)
+        self.check_upload(response.text)
+        response.close()
+        report_metric(
+            "http_upload_requests_throughput",
+            per_second(STREAM_SIZE, elapsed_ns),
+            "B/s",
+        )
+        sampler.report("http_upload_requests")
+
+        # so the write size is swept on a plain socket
+        proto, host, port = split_url(HTTP_URL)
+        connection_manager = get_connection_manager(self.pool)
+        head = (
+            f"POST /upload HTTP/1.1\r\nHost: {host}\r\n"
+            f"Content-Length: {STREAM_SIZE}\r\nConnection: close\r\n\r\n"
+        ).encode()
+        for chunk_size in STREAM_CHUNKS:
+            name = f"http_upload_{chunk_size}"
+            sock = connection_manager.get_socket(host, port, proto)
+            stream = NativeStream(sock, STREAM_TIMEOUT)
+            body = PatternStream(STREAM_SIZE)
+            buffer = bytearray(chunk_size)
+            sent = 0
+            next_sample = SAMPLE_BYTES
+            sampler = HeapSampler()
+            start = time.monotonic_ns()
+            stream.send_all(head)
+            while sent < STREAM_SIZE:
+                bytes_read = body.readinto(buffer)
+                stream.send_all(memoryview(buffer)[:bytes_read])
+                sent += bytes_read
+                if sent >= next_sample:
+                    sampler.sample()
+                    next_sample += SAMPLE_BYTES
+            response_text = self.read_response(sock)
+            elapsed_ns = time.monotonic_ns() - start
+            connection_manager.close_socket(sock)
+
+            self.check_upload(response_text)
+            report_metric(f"{name}_throughput", per_second(sent, elapsed_ns), "B/s")
+            sampler.report(name)
@@ -0,0 +1,141 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import random
+import struct
+import time
+
+from benchmark_helpers import LatencyStats, parse_sizes, per_second, report_metric
+from network_test_case import SCOPE_CLASS, NetworkTestCase, SkipTest
+
+from helpers import ValidationMatrix
+
+MQTT_BROKER = os.getenv("NETWORK_TEST_MQTT_BROKER", None)
+MQTT_PORT = int(os.getenv("NETWORK_TEST_MQTT_PORT", None) or 1883)
+MQTT_USERNAME = os.getenv("NETWORK_TEST_MQTT_USERNAME", None)
+MQTT_PASSWORD = os.getenv("NETWORK_TEST_MQTT_PASSWORD", None)
+BENCHMARK_COUNT = int(os.getenv("NETWORK_TEST_MQTT_BENCHMARK_COUNT", None) or 50)
+BENCHMARK_RATES = parse_sizes(
+    os.getenv("NETWORK_TEST_MQTT_BENCHMARK_RATES", None) or "20,50,100,200,500"
+)
+BENCHMARK_SIZES = parse_sizes(
+    os.getenv("NETWORK_TEST_MQTT_BENCHMARK_SIZES", None) or "32,512"
+)
+# loopback messages still missing this long after the last one arrived are lost
+DRAIN_TIMEOUT_NS = 2_000_000_000
+# a level where less than this share of the target rate came back is lagging
+LAG_PERCENT = 90
+# the client's socket timeout, how long loop() waits when nothing arrives
+POLL_TIMEOUT = 0.001
+# sequence number and send time at the start of every payload
+PAYLOAD_HEADER = ">IQ"
+PAYLOAD_HEADER_SIZE = struct.calcsize(PAYLOAD_HEADER)
+
+
+class LoopbackLevel:
+    # what came back of one rate and payload size
+    def __init__(self, topic, qos):
+        self.topic = topic
+        self.qos = qos
+        self.stats = LatencyStats()
+        self.received = 0
+        self.last_received_ns = time.monotonic_ns()
+
+    def on_message(self, client, topic, message):
+        _, sent_ns = struct.unpack_from(PAYLOAD_HEADER, message)
+        self.last_received_ns = time.monotonic_ns()
+        self.stats.add(self.last_received_ns - sent_ns)
+        self.received += 1
+
+
+class TestMQTTBenchmark(NetworkTestCase):
+    VALIDATES = [
+        ValidationMatrix.THROUGHPUT_MQTT,
+    ]
+    FIXTURE_SCOPE = SCOPE_CLASS
+
+    def connect(self, topic, qos):
+        from adafruit_minimqtt import adafruit_minimqtt
+
+        client = adafruit_minimqtt.MQTT(
+            broker=MQTT_BROKER,
+            port=MQTT_PORT,
+            username=MQTT_USERNAME,
+            password=MQTT_PASSWORD,
+            socket_pool=self.pool,
+            use_binary_mode=True,
+            socket_timeout=POLL_TIMEOUT,
+            connect_retries=1,
+        )
+        client.connect()
+        client.subscribe(topic, qos)
+        return client
+
+    def run_level(self, client, level, rate, size):
+        client.on_message = level.on_message
+        payload = bytearray(max(size, PAYLOAD_HEADER_SIZE))
+        interval_ns = 1_000_000_000 // rate
+        start = next_send = time.monotonic_ns()
+        sent = 0
+        while sent < BENCHMARK_COUNT:
+            if time.monotonic_ns() >= next_send:
+                struct.pack_into(PAYLOAD_HEADER, payload, 0, sent, time.monotonic_ns())
+                # a QoS 1 publish() waits for its PUBACK, taking in what arrives meanwhile
+                client.publish(level.topic, bytes(payload), qos=level.qos)
+                sent += 1
+                next_send += interval_ns
+            else:
+                client.loop(POLL_TIMEOUT)
+
+        while level.received < BENCHMARK_COUNT:
+            if time.monotonic_ns() - level.last_received_ns > DRAIN_TIMEOUT_NS:
+                break
+            client.loop(POLL_TIMEOUT)
+        level.stats.lost = BENCHMARK_COUNT - level.received
+        return per_second(level.received, level.last_received_ns - start)
+
+    def run_benchmark(self, qos):
+        if not MQTT_BROKER:
+            raise SkipTest("NETWORK_TEST_MQTT_BROKER isn't set")
+
+        from adafruit_minimqtt import adafruit_minimqtt
+
+        topic = f"networktests/benchmark{random.randint(0, 0xFFFF)}"
+        print()
+        kept_up = 0
+        for size in BENCHMARK_SIZES:
+            client = self.connect(topic, qos)
+            lag_rate = 0
+            for rate in BENCHMARK_RATES:
+                name = f"mqtt_qos{qos}_{rate}mps_{size}"
+                level = LoopbackLevel(topic, qos)
+                try:
+                    achieved = self.run_level(client, level, rate, size)
+                except (adafruit_minimqtt.MMQTTException, OSError) as exc:
+                    print(f"  {name}: disconnected - {exc}")
+                    lag_rate = rate
+                    break
+                report_metric(f"{name}_rate", achieved, "messages/s")
+                if level.stats.samples:
+                    report_metric(f"{name}_p50", level.stats.percentile(50), "us")
+                    report_metric(f"{name}_p99", level.stats.percentile(99), "us")
+                report_metric(f"{name}_lost", level.stats.lost, "messages")
+                if level.stats.lost or achieved * 100 < rate * LAG_PERCENT:
+                    lag_rate = rate
+                    break
+                kept_up += 1
+            try:
+                client.disconnect()
+            except (adafruit_minimqtt.MMQTTException, OSError):
+                pass
+            # 0 when the client kept up with every rate tried
+            report_metric(f"mqtt_qos{qos}_{size}_lag_rate", lag_rate, "messages/s")
+        self.assertTrue(kept_up, "The client lagged at every rate")
+
+    def test_mqtt_qos0_benchmark(self):
+        self.run_benchmark(0)
+
+    def test_mqtt_qos1_benchmark(self):
+        self.run_benchmark(1)
@@ -3,43 +3,57 @@
 # SPDX-License-Identifier: MIT
 
 import os
+import time
 
-from network_test_case import NetworkTestCase
+from network_test_case import SCOPE_CLASS, NetworkTestCase
 
-from helpers import ValidationMatrix
+from helpers import AdaptiveTimeout, ValidationMatrix
+
+MQTT_BROKER = os.getenv("NETWORK_TEST_MQTT_BROKER", None) or "io.adafruit.com"
+MQTT_PORT = int(os.getenv("NETWORK_TEST_MQTT_PORT", None) or 1883)
+MQTT_USERNAME = os.getenv("NETWORK_TEST_MQTT_USERNAME", None) or os.getenv(
+    "AIO_USERNAME"
+)
+MQTT_PASSWORD = os.getenv("NETWORK_TEST_MQTT_PASSWORD", None) or os.getenv("AIO_KEY")
+
+# the round trip is timed once for the whole file
+connect_timeout = AdaptiveTimeout()
 
 
 class TestMQTT(NetworkTestCase):
     VALIDATES = [
         ValidationMatrix.MQTT_CONNECTION,
     ]
+    FIXTURE_SCOPE = SCOPE_CLASS
 
-    def test_mqtt_connect(self):
+    def connect(self, password):
         from adafruit_minimqtt import adafruit_minimqtt
 
-        aio_username = os.getenv("AIO_USERNAME")
-        aio_key = os.getenv("AIO_KEY")
-
+        connect_timeout.measure_connect(self.pool, MQTT_BROKER, MQTT_PORT)
+        recv_timeout = connect_timeout()
         mqtt_client = adafruit_minimqtt.MQTT(
-            broker="io.adafruit.com",
-            username=aio_username,
-            password=aio_key,
+            broker=MQTT_BROKER,
+            port=MQTT_PORT,
+            username=MQTT_USERNAME,
+            password=password,
             socket_pool=self.pool,
+            recv_timeout=recv_timeout,
+            # it has to be shorter than recv_timeout
+            socket_timeout=min(1, recv_timeout / 2),
+            connect_retries=1,
         )
-        mqtt_client.connect()
+        start = time.monotonic_ns()
+        try:
+            mqtt_client.connect()
+        finally:
+            connect_timeout.record_wait(start)
+
+    def test_mqtt_connect(self):
+        self.connect(MQTT_PASSWORD)
 
     def test_mqtt_bad_password(self):
         from adafruit_minimqtt import adafruit_minimqtt
 
-        aio_username = os.getenv("AIO_USERNAME")
-        aio_key = "invalid"
-
-        mqtt_client = adafruit_minimqtt.MQTT(
-            broker="io.adafruit.com",
-            username=aio_username,
-            password=aio_key,
-            socket_pool=self.pool,
-        )
         with self.assertRaises(adafruit_minimqtt.MMQTTException) as exc:
-            mqtt_client.connect()
+            self.connect("invalid")
         self.assertIn("Connection Refused - Unauthorized", str(exc.exception_value))
@@ -2,25 +2,97 @@
 #
 # SPDX-License-Identifier: MIT
 
+import os
+import struct
 import time
 
-from network_test_case import NetworkTestCase
+from benchmark_helpers import LatencyStats, report_metric
+from network_test_case import NetworkTestCase, SkipTest
 
 from helpers import ValidationMatrix
 
+# rapid samples only go to a server of our own, the public pool rate limits them
+NTP_LOCAL_SERVER = os.getenv("NETWORK_TEST_NTP_SERVER", None)
+NTP_SERVER = NTP_LOCAL_SERVER or "0.adafruit.pool.ntp.org"
+NTP_PORT = int(os.getenv("NETWORK_TEST_NTP_PORT", None) or 123)
+NTP_SAMPLES = int(os.getenv("NETWORK_TEST_NTP_SAMPLES", None) or 16)
+NTP_TIMEOUT = float(os.getenv("NETWORK_TEST_NTP_TIMEOUT", None) or 1)
+NTP_PACKET_SIZE = 48
+# leap indicator 0, version 4, client mode
+NTP_CLIENT_MODE = 0b00100011
+NTP_MIN_YEAR = 2024
+
+
+def ntp_to_ns(packet, offset):
+    seconds, fraction = struct.unpack_from("!II", packet, offset)
+    return seconds * 1_000_000_000 + (fraction * 1_000_000_000 >> 32)
+
 
 class TestNTP(NetworkTestCase):
     VALIDATES = [ValidationMatrix.REQUESTS_NTP, ValidationMatrix.REQUESTS_UDP]
 
+    def sample(self, sock, address, packet):
+        # returns (delay, offset) in ns or None when no answer came in time, the offset
+        # is against time.monotonic_ns() so only its spread means something
+        packet[:] = bytes(NTP_PACKET_SIZE)
+        packet[0] = NTP_CLIENT_MODE
+        originate = time.monotonic_ns()
+        # the server echoes the transmit time back as the originate time
+        struct.pack_into("!Q", packet, 40, originate)
+        sock.sendto(packet, address)
+        while True:
+            try:
+                sock.recv_into(packet)
+            except OSError:
+                return None
+            destination = time.monotonic_ns()
+            # an answer to an earlier, timed out request is not this one
+            if struct.unpack_from("!Q", packet, 24)[0] == originate:
+                break
+
+        received = ntp_to_ns(packet, 32)
+        transmitted = ntp_to_ns(packet, 40)
+        delay = (destination - originate) - (transmitted - received)
+        offset = ((received - originate) + (transmitted - destination)) // 2
+        return delay, offset
+
     def test_ntp(self):
         import adafruit_ntp
 
-        ntp = adafruit_ntp.NTP(self.pool)
-        now_1 = ntp.datetime
-        assert now_1.tm_year >= 2024  # noqa: PLR2004 Magic value used in comparison
-        time.sleep(3)
-        ntp = adafruit_ntp.NTP(self.pool)
-        now_2 = ntp.datetime
-        micro_1 = time.mktime(now_1)
-        micro_2 = time.mktime(now_2)
-        assert 1 < (micro_2 - micro_1) < 5  # noqa: PLR2004 Magic value used in comparison
+        ntp = adafruit_ntp.NTP(self.pool, server=NTP_SERVER, port=NTP_PORT)
+        self.assertTrue(ntp.datetime.tm_year >= NTP_MIN_YEAR)
+
+    def test_ntp_samples(self):
+        if not NTP_LOCAL_SERVER:
+            raise SkipTest("NETWORK_TEST_NTP_SERVER isn't set")
+
+        stats = LatencyStats()
+        offsets = []
+        packet = bytearray(NTP_PACKET_SIZE)
+        start = time.monotonic_ns()
+        synced_ns = None
+        address = self.pool.getaddrinfo(NTP_LOCAL_SERVER, NTP_PORT)[0][4]
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_DGRAM)
+        sock.settimeout(NTP_TIMEOUT)
+        try:
+            for _ in range(NTP_SAMPLES):
+                result = self.sample(sock, address, packet)
+                if result is None:
+                    stats.lost += 1
+                    continue
+                if synced_ns is None:
+                    synced_ns = time.monotonic_ns() - start
+                stats.add(result[0])
+                offsets.append(result[1])
+        finally:
+            sock.close()
+        elapsed_ns = time.monotonic_ns() - start
+
+        print()
+        self.assertTrue(offsets, "No NTP sample came back")
+        stats.report("ntp_delay", "samples")
+        report_metric("ntp_offset_spread", (max(offsets) - min(offsets)) // 1000, "us")
+        # the best sample pins the clock down to within half its round trip
+        report_metric("ntp_error_bound", stats.samples[0] // 2, "us")
+        report_metric("ntp_sync_time", synced_ns // 1000, "us")
+        report_metric("ntp_samples_time", elapsed_ns // 1_000_000, "ms")
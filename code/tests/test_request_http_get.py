@@ -2,9 +2,18 @@
 #
 # SPDX-License-Identifier: MIT
 
+import os
+import time
+
+from benchmark_helpers import split_url
 from network_test_case import NetworkTestCase
 
-from helpers import ValidationMatrix
+from helpers import AdaptiveTimeout, ValidationMatrix
+
+HTTP_URL = os.getenv("NETWORK_TEST_HTTP_URL", None) or "http://wifitest.adafruit.com"
+
+# the round trip is timed once for the whole file
+request_timeout = AdaptiveTimeout()
 
 
 class TestRequestsHTTPGet(NetworkTestCase):
@@ -17,9 +26,13 @@ class TestRequestsHTTPGet(NetworkTestCase):
 
         requests = adafruit_requests.Session(self.pool)
 
-        test_url = "http://wifitest.adafruit.com/testwifi/index.html"
-        with requests.get(test_url) as response:
+        test_url = f"{HTTP_URL}/testwifi/index.html"
+        _, host, port = split_url(HTTP_URL)
+        request_timeout.measure_connect(self.pool, host, port)
+        start = time.monotonic_ns()
+        with requests.get(test_url, timeout=request_timeout()) as response:
             result = response.text
+        request_timeout.record_wait(start)
         self.assertEqual(
             result,
             "This is a test of Adafruit WiFi!\nIf you can read this, its working :)",
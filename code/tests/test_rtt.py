@@ -0,0 +1,146 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import struct
+import time
+
+from benchmark_helpers import (
+    ESP32SPIDatagram,
+    ESP32SPIStream,
+    LatencyStats,
+    NativeDatagram,
+    NativeStream,
+    esp32spi_accept,
+    native_accept,
+    wait_recv_into,
+)
+from network_test_case import SCOPE_CLASS, NetworkTestCase, SkipTest
+
+from helpers import (
+    ValidationMatrix,
+    announce_server,
+    get_ipv4_address,
+)
+
+PORT = int(os.getenv("NETWORK_TEST_SERVER_PORT", None) or 5000)
+MESSAGE_TIMEOUT = int(os.getenv("NETWORK_TEST_RTT_MESSAGE_TIMEOUT", None) or 60)
+RTT_LOOPS = int(os.getenv("NETWORK_TEST_RTT_LOOPS", None) or 500)
+RTT_SIZE = max(4, int(os.getenv("NETWORK_TEST_RTT_SIZE", None) or 32))
+RTT_UDP_TIMEOUT = float(os.getenv("NETWORK_TEST_RTT_UDP_TIMEOUT", None) or 1)
+
+
+class TestRTT(NetworkTestCase):
+    VALIDATES = [
+        ValidationMatrix.LATENCY_RTT,
+    ]
+    FIXTURE_SCOPE = SCOPE_CLASS
+
+    def run_tcp_rtt(self, stream):
+        payload = bytearray(RTT_SIZE)
+        buffer = bytearray(RTT_SIZE)
+        stats = LatencyStats()
+
+        for sequence in range(RTT_LOOPS):
+            struct.pack_into(">I", payload, 0, sequence)
+            start = time.monotonic_ns()
+            stream.send_all(payload)
+            stream.recv_exactly(buffer, RTT_SIZE)
+            stats.add(time.monotonic_ns() - start)
+            self.assertEqual(buffer, payload)
+
+        print()
+        stats.report("tcp_rtt")
+
+    def run_udp_rtt(self, datagram):
+        payload = bytearray(RTT_SIZE)
+        buffer = bytearray(RTT_SIZE)
+        stats = LatencyStats()
+
+        bytes_read = wait_recv_into(datagram, buffer, MESSAGE_TIMEOUT)
+        self.assertEqual(bytes(buffer[:bytes_read]), b"Hello World!")
+
+        for sequence in range(RTT_LOOPS):
+            struct.pack_into(">I", payload, 0, sequence)
+            start = time.monotonic_ns()
+            datagram.send(payload)
+            while True:
+                bytes_read = wait_recv_into(datagram, buffer, RTT_UDP_TIMEOUT)
+                if not bytes_read:
+                    stats.lost += 1
+                    break
+                # a late echo of an earlier round trip is not this one
+                if struct.unpack_from(">I", buffer)[0] == sequence:
+                    stats.add(time.monotonic_ns() - start)
+                    break
+
+        datagram.send(b"END")
+        print()
+        stats.report("udp_rtt")
+        self.assertTrue(stats.samples, "No UDP echoes received")
+
+    def test_esp32spi_tcp_rtt(self):
+        if self.radio.__class__.__name__ != "ESP_SPIcontrol":
+            raise SkipTest("self.radio isn't an ESP32SPI")
+
+        ip_address = get_ipv4_address(self.radio)
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_STREAM)
+        self.radio.start_server(PORT, sock._socknum, conn_mode=self.radio.TCP_MODE)
+
+        announce_server(self.pool, ip_address, PORT, "tcp_echo", "TCP")
+
+        sock_client = esp32spi_accept(self.radio, self.pool, sock, MESSAGE_TIMEOUT)
+        stream = ESP32SPIStream(self.radio, sock_client, MESSAGE_TIMEOUT)
+        self.run_tcp_rtt(stream)
+        stream.close()
+        sock.close()
+
+    def test_esp32spi_udp_rtt(self):
+        if self.radio.__class__.__name__ != "ESP_SPIcontrol":
+            raise SkipTest("self.radio isn't an ESP32SPI")
+
+        ip_address = get_ipv4_address(self.radio)
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_DGRAM)
+        self.radio.start_server(PORT, sock._socknum, conn_mode=self.radio.UDP_MODE)
+
+        announce_server(self.pool, ip_address, PORT, "udp_echo", "UDP")
+
+        datagram = ESP32SPIDatagram(self.radio, sock)
+        self.run_udp_rtt(datagram)
+        datagram.close()
+
+    def test_native_tcp_rtt(self):
+        if self.radio.__class__.__name__ == "ESP_SPIcontrol":
+            raise SkipTest("self.radio isn't native")
+
+        ip_address = get_ipv4_address(self.radio)
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_STREAM)
+        sock.settimeout(None)
+        sock.setsockopt(self.pool.SOL_SOCKET, self.pool.SO_REUSEADDR, 1)
+        sock.bind((ip_address, PORT))
+        sock.listen(1)
+        sock.setblocking(False)
+
+        announce_server(self.pool, ip_address, PORT, "tcp_echo", "TCP")
+
+        sock_client = native_accept(sock, MESSAGE_TIMEOUT)
+        stream = NativeStream(sock_client, MESSAGE_TIMEOUT)
+        self.run_tcp_rtt(stream)
+        stream.close()
+        sock.close()
+
+    def test_native_udp_rtt(self):
+        if self.radio.__class__.__name__ == "ESP_SPIcontrol":
+            raise SkipTest("self.radio isn't native")
+
+        ip_address = get_ipv4_address(self.radio)
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_DGRAM)
+        sock.setsockopt(self.pool.SOL_SOCKET, self.pool.SO_REUSEADDR, 1)
+        sock.bind((ip_address, PORT))
+
+        announce_server(self.pool, ip_address, PORT, "udp_echo", "UDP")
+
+        datagram = NativeDatagram(sock)
+        self.run_udp_rtt(datagram)
+        datagram.close()
@@ -2,9 +2,13 @@
 #
 # SPDX-License-Identifier: MIT
 
+import os
+
 from network_test_case import NetworkTestCase
 
-from helpers import ValidationMatrix
+from helpers import ValidationMatrix, load_ca_file
+
+HTTPS_URL = os.getenv("NETWORK_TEST_HTTPS_URL", None) or "https://www.adafruit.com"
 
 
 class TestNativeSSL(NetworkTestCase):
@@ -20,10 +24,10 @@ class TestNativeSSL(NetworkTestCase):
 
         import adafruit_requests
 
-        ssl_context = ssl.create_default_context()
+        ssl_context = load_ca_file(ssl.create_default_context())
         requests = adafruit_requests.Session(self.pool, ssl_context)
 
-        test_url = "https://www.adafruit.com/api/quotes.php"
+        test_url = f"{HTTPS_URL}/api/quotes.php"
         with requests.get(test_url) as response:
             result = response.text
         self.assertIn("author", result)
@@ -0,0 +1,150 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import time
+
+from benchmark_helpers import (
+    ESP32SPIStream,
+    NativeStream,
+    esp32spi_accept,
+    native_accept,
+    per_second,
+    report_metric,
+)
+from network_test_case import NetworkTestCase, SkipTest
+
+from helpers import (
+    ValidationMatrix,
+    announce_server,
+    get_ipv4_address,
+    wait_for,
+)
+
+PORT = int(os.getenv("NETWORK_TEST_SERVER_PORT", None) or 5000)
+MESSAGE_TIMEOUT = int(os.getenv("NETWORK_TEST_TCP_MESSAGE_TIMEOUT", None) or 60)
+SCALING_MAX = int(os.getenv("NETWORK_TEST_SCALING_MAX", None) or 8)
+SCALING_BYTES = int(os.getenv("NETWORK_TEST_SCALING_BYTES", None) or 4096)
+SCALING_TIMEOUT = int(os.getenv("NETWORK_TEST_SCALING_TIMEOUT", None) or 10)
+
+
+class TestTCPScaling(NetworkTestCase):
+    VALIDATES = [
+        ValidationMatrix.SCALING_TCP,
+    ]
+    # can leave the radio out of sockets, nothing should share its boot
+    RADIO_DESTRUCTIVE = True
+
+    def echo_clients(self, clients, buffer):
+        active = list(clients)
+        for client in active:
+            client.start_nowait()
+
+        def echo():
+            # one pass over the clients, None when none of them had anything
+            progress = None
+            for client in list(active):
+                bytes_read = client.recv_nowait(buffer)
+                if bytes_read is None:
+                    client.close()
+                    active.remove(client)
+                    progress = True
+                elif bytes_read:
+                    client.send_all(memoryview(buffer)[:bytes_read])
+                    progress = True
+            return progress
+
+        start = time.monotonic_ns()
+        try:
+            while active:
+                sockets = [client.native_socket for client in active]
+                if None in sockets:
+                    sockets = None
+                wait_for(echo, SCALING_TIMEOUT, sockets, progress=False)
+        except TimeoutError:
+            for client in active:
+                client.close()
+            return None
+        return time.monotonic_ns() - start
+
+    def run_scaling(self, accept, make_stream):
+        control = make_stream(accept(MESSAGE_TIMEOUT))
+        buffer = bytearray(256)
+        ceiling = 0
+
+        print()
+        level = 1
+        while level <= SCALING_MAX:
+            control.send_all(f"OPEN {level} {SCALING_BYTES}\n".encode())
+            clients = []
+            start = time.monotonic_ns()
+            try:
+                while len(clients) < level:
+                    clients.append(make_stream(accept(SCALING_TIMEOUT)))
+            except (OSError, TimeoutError) as exc:
+                print(f"  {level} clients: accepted {len(clients)} - {exc}")
+                for client in clients:
+                    client.close()
+                break
+            accept_ns = time.monotonic_ns() - start
+
+            echo_ns = self.echo_clients(clients, buffer)
+            if echo_ns is None:
+                print(f"  {level} clients: echo stalled")
+                break
+
+            name = f"tcp_scaling_{level}"
+            accept_rate = per_second(level, accept_ns)
+            report_metric(f"{name}_accept_rate", accept_rate, "connections/s")
+            per_connection = per_second(SCALING_BYTES, echo_ns)
+            report_metric(f"{name}_throughput", per_connection, "B/s per connection")
+            ceiling = level
+            level *= 2
+
+        control.send_all(b"END\n")
+        control.close()
+        report_metric("tcp_scaling_ceiling", ceiling, "connections")
+        self.assertTrue(ceiling, "Not even one client connection was served")
+
+    def test_esp32spi_tcp_scaling(self):
+        if self.radio.__class__.__name__ != "ESP_SPIcontrol":
+            raise SkipTest("self.radio isn't an ESP32SPI")
+
+        ip_address = get_ipv4_address(self.radio)
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_STREAM)
+        self.radio.start_server(PORT, sock._socknum, conn_mode=self.radio.TCP_MODE)
+
+        announce_server(self.pool, ip_address, PORT, "tcp_scaling", "TCP")
+
+        def accept(timeout):
+            return esp32spi_accept(self.radio, self.pool, sock, timeout)
+
+        def make_stream(sock_client):
+            return ESP32SPIStream(self.radio, sock_client, MESSAGE_TIMEOUT)
+
+        self.run_scaling(accept, make_stream)
+        sock.close()
+
+    def test_native_tcp_scaling(self):
+        if self.radio.__class__.__name__ == "ESP_SPIcontrol":
+            raise SkipTest("self.radio isn't native")
+
+        ip_address = get_ipv4_address(self.radio)
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_STREAM)
+        sock.settimeout(None)
+        sock.setsockopt(self.pool.SOL_SOCKET, self.pool.SO_REUSEADDR, 1)
+        sock.bind((ip_address, PORT))
+        sock.listen(SCALING_MAX + 1)
+        sock.setblocking(False)
+
+        announce_server(self.pool, ip_address, PORT, "tcp_scaling", "TCP")
+
+        def accept(timeout):
+            return native_accept(sock, timeout)
+
+        def make_stream(sock_client):
+            return NativeStream(sock_client, MESSAGE_TIMEOUT)
+
+        self.run_scaling(accept, make_stream)
+        sock.close()
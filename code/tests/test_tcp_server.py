@@ -4,20 +4,26 @@
 
 import os
 import time
-from errno import EAGAIN
 
+from benchmark_helpers import esp32spi_accept, native_accept
+from esp32spi_profiler import SPIProfiler
 from network_test_case import NetworkTestCase, SkipTest
 
 from helpers import (
+    RECV_BUFFER,
+    AdaptiveTimeout,
     ValidationMatrix,
-    check_time,
+    announce_server,
     generate_random_number_values,
     get_ipv4_address,
+    nonblocking_recv_into,
+    wait_for,
 )
 
 PORT = os.getenv("NETWORK_TEST_SERVER_PORT", None) or 5000
-MESSAGE_LOOPS = os.getenv("NETWORK_TEST_TCP_MESSAGE_LOOPS", None) or 3
-MESSAGE_TIMEOUT = os.getenv("NETWORK_TEST_TCP_MESSAGE_TIMEOUT", None) or 60
+MESSAGE_LOOPS = int(os.getenv("NETWORK_TEST_TCP_MESSAGE_LOOPS", None) or 3)
+# how long to wait for the peer, until a round trip has been timed
+MESSAGE_TIMEOUT = int(os.getenv("NETWORK_TEST_TCP_MESSAGE_TIMEOUT", None) or 60)
 
 
 class TestTCPServer(NetworkTestCase):
@@ -29,52 +35,40 @@ class TestTCPServer(NetworkTestCase):
         if self.radio.__class__.__name__ != "ESP_SPIcontrol":
             raise SkipTest("self.radio isn't an ESP32SPI")
 
-        ip_address = get_ipv4_address(self.radio)
-        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_STREAM)
-        self.radio.start_server(PORT, sock._socknum, conn_mode=self.radio.TCP_MODE)
-
-        print(f" Server started at: {ip_address}:{PORT}", end="")
-        print(" - waiting for TCP client connection.", end="")
+        with SPIProfiler(self.radio) as profiler:
+            ip_address = get_ipv4_address(self.radio)
+            sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_STREAM)
+            self.radio.start_server(PORT, sock._socknum, conn_mode=self.radio.TCP_MODE)
 
-        last_message = start = time.monotonic()
-        while True:
-            sock_client_num = self.radio.socket_available(sock._socknum)
-            sock_client = self.pool.socket()
-            sock_client._socknum = sock_client_num
-            if sock_client and sock_client._socknum != self.pool.NO_SOCKET_AVAIL:
-                break
+            announce_server(self.pool, ip_address, PORT, "tcp", "TCP")
 
-            last_message = check_time(start, last_message, MESSAGE_TIMEOUT)
-
-        last_message = start = time.monotonic()
-        while True:
-            bytes_available = sock_client._available()
-            if bytes_available:
-                print("R", end="")
-                data = self.radio.socket_read(sock_client._socknum, bytes_available)
-                self.assertEqual(data, b"Hello World!")
-                break
-
-            last_message = check_time(start, last_message, MESSAGE_TIMEOUT)
-
-        for i in range(MESSAGE_LOOPS):
-            test_data, test_expected = generate_random_number_values()
-            print("S", end="")
-            sock_client.send(test_data)
+            sock_client = esp32spi_accept(self.radio, self.pool, sock, MESSAGE_TIMEOUT)
 
-            last_message = start = time.monotonic()
-            while True:
+            def read():
                 bytes_available = sock_client._available()
-                if bytes_available:
-                    print("R", end="")
-                    data = self.radio.socket_read(sock_client._socknum, bytes_available)
-                    self.assertEqual(data, test_expected)
-                    break
-
-                last_message = check_time(start, last_message, MESSAGE_TIMEOUT)
+                if not bytes_available:
+                    return None
+                return self.radio.socket_read(sock_client._socknum, bytes_available)
+
+            data = wait_for(read, MESSAGE_TIMEOUT)
+            print("R", end="")
+            self.assertEqual(data, b"Hello World!")
+
+            timeout = AdaptiveTimeout(MESSAGE_TIMEOUT)
+            for i in range(MESSAGE_LOOPS):
+                test_data, test_expected = generate_random_number_values()
+                print("S", end="")
+                start = time.monotonic_ns()
+                sock_client.send(test_data)
+
+                data = wait_for(read, timeout(len(test_data)))
+                timeout.add_rtt(start)
+                print("R", end="")
+                self.assertEqual(data, test_expected)
 
-        sock_client.close()
-        sock.close()
+            sock_client.close()
+            sock.close()
+        profiler.report()
 
     def test_native_tcp_server(self):
         if self.radio.__class__.__name__ == "ESP_SPIcontrol":
@@ -89,47 +83,31 @@ class TestTCPServer(NetworkTestCase):
         # TODO: setblocking doesn't seem to work on WIZnet5k, no `dots` print
         sock.setblocking(False)
 
-        print(f" Server started at: {ip_address}:{PORT}", end="")
-        print(" - waiting for TCP client connection.", end="")
-
-        last_message = start = time.monotonic()
-        buffer = bytearray(64)
-        while True:
-            try:
-                sock_client, client_address = sock.accept()
-                sock_client.settimeout(None)
-                break
-            except OSError as exc:
-                if exc.errno != EAGAIN:
-                    raise
-
-            last_message = check_time(start, last_message, MESSAGE_TIMEOUT)
-
-        last_message = start = time.monotonic()
-        while True:
-            bytes_read = sock_client.recv_into(buffer, len(buffer))
-            if bytes_read:
-                print("R", end="")
-                data = bytes(buffer[:bytes_read])
-                self.assertEqual(data, b"Hello World!")
-                break
+        announce_server(self.pool, ip_address, PORT, "tcp", "TCP")
+
+        buffer = bytearray(RECV_BUFFER)
+        sock_client = native_accept(sock, MESSAGE_TIMEOUT)
+        sock_client.setblocking(False)
 
-            last_message = check_time(start, last_message, MESSAGE_TIMEOUT)
+        def read():
+            return nonblocking_recv_into(sock_client, buffer)
 
+        bytes_read = wait_for(read, MESSAGE_TIMEOUT, sock_client)
+        print("R", end="")
+        data = bytes(buffer[:bytes_read])
+        self.assertEqual(data, b"Hello World!")
+
+        timeout = AdaptiveTimeout(MESSAGE_TIMEOUT)
         for i in range(MESSAGE_LOOPS):
             test_data, test_expected = generate_random_number_values()
             print("S", end="")
+            start = time.monotonic_ns()
             sock_client.send(test_data)
 
-            last_message = start = time.monotonic()
-            while True:
-                bytes_read = sock_client.recv_into(buffer, len(buffer))
-                if bytes_read:
-                    print("R", end="")
-                    data = bytes(buffer[:bytes_read])
-                    self.assertEqual(data, test_expected)
-                    break
-
-                last_message = check_time(start, last_message, MESSAGE_TIMEOUT)
+            bytes_read = wait_for(read, timeout(len(test_data)), sock_client)
+            timeout.add_rtt(start)
+            print("R", end="")
+            data = bytes(buffer[:bytes_read])
+            self.assertEqual(data, test_expected)
 
         sock_client.close()
@@ -0,0 +1,117 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import time
+
+from benchmark_helpers import (
+    ESP32SPIStream,
+    NativeStream,
+    esp32spi_accept,
+    native_accept,
+    parse_sizes,
+    per_second,
+    report_metric,
+)
+from network_test_case import NetworkTestCase, SkipTest
+
+from helpers import (
+    RECV_BUFFER,
+    WRITE_SIZE,
+    ValidationMatrix,
+    announce_server,
+    get_ipv4_address,
+)
+
+PORT = int(os.getenv("NETWORK_TEST_SERVER_PORT", None) or 5000)
+MESSAGE_TIMEOUT = int(os.getenv("NETWORK_TEST_TCP_MESSAGE_TIMEOUT", None) or 60)
+THROUGHPUT_TOTAL = int(os.getenv("NETWORK_TEST_THROUGHPUT_TOTAL", None) or 65536)
+THROUGHPUT_CHUNKS = parse_sizes(
+    os.getenv("NETWORK_TEST_THROUGHPUT_CHUNKS", None) or "64,256,1024,4096,8192"
+)
+
+
+class TestTCPThroughput(NetworkTestCase):
+    VALIDATES = [
+        ValidationMatrix.THROUGHPUT_TCP,
+    ]
+
+    def receive(self, stream, buffer, chunk_size):
+        # the client streams to us, timed until the last byte lands
+        stream.send_all(f"RX {THROUGHPUT_TOTAL} {chunk_size}\n".encode())
+        received = 0
+        start = time.monotonic_ns()
+        while received < THROUGHPUT_TOTAL:
+            received += stream.recv_into(
+                buffer, min(chunk_size, THROUGHPUT_TOTAL - received)
+            )
+        return per_second(THROUGHPUT_TOTAL, time.monotonic_ns() - start)
+
+    def send(self, stream, payload, chunk_size):
+        # we stream to the client, timed until it acks the last byte
+        ack = bytearray(3)
+        stream.send_all(f"TX {THROUGHPUT_TOTAL} {chunk_size}\n".encode())
+        sent = 0
+        start = time.monotonic_ns()
+        while sent < THROUGHPUT_TOTAL:
+            size = min(chunk_size, THROUGHPUT_TOTAL - sent)
+            stream.send_all(payload[:size])
+            sent += size
+        stream.recv_exactly(ack, len(ack))
+        tx_ns = time.monotonic_ns() - start
+        self.assertEqual(bytes(ack), b"OK\n")
+        return per_second(THROUGHPUT_TOTAL, tx_ns)
+
+    def run_throughput(self, stream):
+        buffer = bytearray(max(*THROUGHPUT_CHUNKS, RECV_BUFFER, WRITE_SIZE))
+        payload = memoryview(buffer)
+
+        print()
+        for chunk_size in THROUGHPUT_CHUNKS:
+            rx_rate = self.receive(stream, buffer, chunk_size)
+            tx_rate = self.send(stream, payload, chunk_size)
+            report_metric(f"tcp_rx_{chunk_size}", rx_rate, "B/s")
+            report_metric(f"tcp_tx_{chunk_size}", tx_rate, "B/s")
+
+        # the sizes test_buffer_sweep.py recommends for this board, set in settings.toml
+        report_metric("tcp_rx_tuned", self.receive(stream, buffer, RECV_BUFFER), "B/s")
+        report_metric("tcp_tx_tuned", self.send(stream, payload, WRITE_SIZE), "B/s")
+
+        stream.send_all(b"END\n")
+
+    def test_esp32spi_tcp_throughput(self):
+        if self.radio.__class__.__name__ != "ESP_SPIcontrol":
+            raise SkipTest("self.radio isn't an ESP32SPI")
+
+        ip_address = get_ipv4_address(self.radio)
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_STREAM)
+        self.radio.start_server(PORT, sock._socknum, conn_mode=self.radio.TCP_MODE)
+
+        announce_server(self.pool, ip_address, PORT, "tcp_throughput", "TCP")
+
+        sock_client = esp32spi_accept(self.radio, self.pool, sock, MESSAGE_TIMEOUT)
+        stream = ESP32SPIStream(self.radio, sock_client, MESSAGE_TIMEOUT)
+        self.run_throughput(stream)
+        stream.close()
+        sock.close()
+
+    def test_native_tcp_throughput(self):
+        if self.radio.__class__.__name__ == "ESP_SPIcontrol":
+            raise SkipTest("self.radio isn't native")
+
+        ip_address = get_ipv4_address(self.radio)
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_STREAM)
+        sock.settimeout(None)
+        sock.setsockopt(self.pool.SOL_SOCKET, self.pool.SO_REUSEADDR, 1)
+        sock.bind((ip_address, PORT))
+        sock.listen(1)
+        sock.setblocking(False)
+
+        announce_server(self.pool, ip_address, PORT, "tcp_throughput", "TCP")
+
+        sock_client = native_accept(sock, MESSAGE_TIMEOUT)
+        stream = NativeStream(sock_client, MESSAGE_TIMEOUT)
+        self.run_throughput(stream)
+        stream.close()
+        sock.close()
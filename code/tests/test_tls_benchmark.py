@@ -0,0 +1,151 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import time
+
+from benchmark_helpers import (
+    LatencyStats,
+    NativeStream,
+    per_second,
+    report_metric,
+    split_url,
+)
+from network_test_case import SCOPE_CLASS, NetworkTestCase, SkipTest
+
+from helpers import ValidationMatrix
+
+HTTP_URL = os.getenv("NETWORK_TEST_HTTP_URL", None)
+HTTPS_URL = os.getenv("NETWORK_TEST_HTTPS_URL", None)
+TLS_HANDSHAKES = int(os.getenv("NETWORK_TEST_TLS_HANDSHAKES", None) or 10)
+TLS_SIZE = int(os.getenv("NETWORK_TEST_TLS_SIZE", None) or 262144)
+TLS_TIMEOUT = int(os.getenv("NETWORK_TEST_TLS_TIMEOUT", None) or 30)
+TLS_CHUNK_SIZE = 4096
+RESPONSE_SIZE = 256
+
+
+class TestTLSBenchmark(NetworkTestCase):
+    VALIDATES = [
+        ValidationMatrix.HANDSHAKE_TLS,
+    ]
+    FIXTURE_SCOPE = SCOPE_CLASS
+
+    def connect(self, url, session=None):
+        # returns the socket and how long connect() took, the TLS handshake included
+        proto, host, port = split_url(url)
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_STREAM)
+        sock.settimeout(TLS_TIMEOUT)
+        if proto == "https:":
+            kwargs = {"server_hostname": host}
+            if session is not None:
+                kwargs["session"] = session
+            try:
+                sock = self.ssl_context.wrap_socket(sock, **kwargs)
+            except ValueError as exc:
+                # WIZnet5k has no TLS
+                sock.close()
+                raise SkipTest(str(exc)) from exc
+        start = time.monotonic_ns()
+        sock.connect((host, port))
+        return sock, time.monotonic_ns() - start
+
+    def first_byte(self, sock, url):
+        # time from sending a request on a fresh connection to its first response byte
+        _, host, _ = split_url(url)
+        stream = NativeStream(sock, TLS_TIMEOUT)
+        request = f"GET /bytes/1 HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n"
+        buffer = bytearray(RESPONSE_SIZE)
+        start = time.monotonic_ns()
+        stream.send_all(request.encode())
+        stream.recv_into(buffer, RESPONSE_SIZE)
+        elapsed_ns = time.monotonic_ns() - start
+        status = b"HTTP/1.1 200"
+        self.assertEqual(buffer[: len(status)], status, "The request failed")
+        return elapsed_ns
+
+    def download(self, url):
+        # the handshake is left to a first small request on the kept-alive connection
+        with self.session.get(f"{url}/bytes/1") as response:
+            self.assertEqual(len(response.content), 1)
+
+        start = time.monotonic_ns()
+        response = self.session.get(f"{url}/bytes/{TLS_SIZE}")
+        received = 0
+        for chunk in response.iter_content(chunk_size=TLS_CHUNK_SIZE):
+            received += len(chunk)
+        elapsed_ns = time.monotonic_ns() - start
+        response.close()
+        self.assertEqual(received, TLS_SIZE)
+        return per_second(received, elapsed_ns)
+
+    def test_tls_handshake(self):
+        if not HTTP_URL or not HTTPS_URL:
+            raise SkipTest("NETWORK_TEST_HTTP_URL or NETWORK_TEST_HTTPS_URL isn't set")
+
+        tcp_stats = LatencyStats()
+        tls_stats = LatencyStats()
+        first_byte_stats = LatencyStats()
+        for _ in range(TLS_HANDSHAKES):
+            sock, elapsed_ns = self.connect(HTTP_URL)
+            sock.close()
+            tcp_stats.add(elapsed_ns)
+
+            sock, elapsed_ns = self.connect(HTTPS_URL)
+            tls_stats.add(elapsed_ns)
+            first_byte_stats.add(self.first_byte(sock, HTTPS_URL))
+            sock.close()
+
+        print()
+        tcp_stats.report("tcp_connect", "connections")
+        tls_stats.report("tls_connect", "connections")
+        first_byte_stats.report("tls_ttfb", "requests")
+        # native ssl does the handshake inside connect(), only the difference tells it apart
+        handshake = tls_stats.percentile(50) - tcp_stats.percentile(50)
+        report_metric("tls_handshake_p50", handshake, "us")
+
+    def test_tls_session_resumption(self):
+        if not HTTPS_URL:
+            raise SkipTest("NETWORK_TEST_HTTPS_URL isn't set")
+
+        sock, _ = self.connect(HTTPS_URL)
+        # a TLS 1.3 session ticket only arrives with the first response
+        self.first_byte(sock, HTTPS_URL)
+        session = getattr(sock, "session", None)
+        sock.close()
+        if session is None:
+            raise SkipTest("The ssl module can't resume sessions")
+
+        full_stats = LatencyStats()
+        resumed_stats = LatencyStats()
+        for _ in range(TLS_HANDSHAKES):
+            sock, elapsed_ns = self.connect(HTTPS_URL)
+            sock.close()
+            full_stats.add(elapsed_ns)
+
+            sock, elapsed_ns = self.connect(HTTPS_URL, session)
+            if sock.session_reused:
+                resumed_stats.add(elapsed_ns)
+            else:
+                resumed_stats.lost += 1
+            self.first_byte(sock, HTTPS_URL)
+            session = sock.session
+            sock.close()
+
+        print()
+        full_stats.report("tls_full_handshake", "connections")
+        resumed_stats.report("tls_resumed", "connections")
+        self.assertTrue(resumed_stats.samples, "No session was resumed")
+        gain = full_stats.percentile(50) - resumed_stats.percentile(50)
+        report_metric("tls_resumption_gain_p50", gain, "us")
+
+    def test_tls_throughput(self):
+        if not HTTP_URL or not HTTPS_URL:
+            raise SkipTest("NETWORK_TEST_HTTP_URL or NETWORK_TEST_HTTPS_URL isn't set")
+
+        print()
+        plain = self.download(HTTP_URL)
+        report_metric("tls_plain_throughput", plain, "B/s")
+        encrypted = self.download(HTTPS_URL)
+        report_metric("tls_throughput", encrypted, "B/s")
+        report_metric("tls_throughput_ratio", encrypted * 100 // max(plain, 1), "%")
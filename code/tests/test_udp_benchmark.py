@@ -0,0 +1,131 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import struct
+import time
+
+from benchmark_helpers import (
+    PACKET_END_OF_STREAM,
+    PACKET_HEADER,
+    PACKET_HEADER_SIZE,
+    ESP32SPIDatagram,
+    NativeDatagram,
+    PacketStats,
+    parse_sizes,
+    report_metric,
+    wait_recv_into,
+)
+from network_test_case import NetworkTestCase, SkipTest
+
+from helpers import (
+    ValidationMatrix,
+    announce_server,
+    get_ipv4_address,
+    wait_for,
+)
+
+PORT = int(os.getenv("NETWORK_TEST_SERVER_PORT", None) or 5000)
+MESSAGE_TIMEOUT = int(os.getenv("NETWORK_TEST_UDP_MESSAGE_TIMEOUT", None) or 60)
+BENCHMARK_COUNT = int(os.getenv("NETWORK_TEST_UDP_BENCHMARK_COUNT", None) or 500)
+BENCHMARK_IDLE = float(os.getenv("NETWORK_TEST_UDP_BENCHMARK_IDLE", None) or 2)
+BENCHMARK_MODE = os.getenv("NETWORK_TEST_UDP_BENCHMARK_MODE", None) or "count"
+BENCHMARK_RATES = parse_sizes(
+    os.getenv("NETWORK_TEST_UDP_BENCHMARK_RATES", None) or "100,500,1000"
+)
+BENCHMARK_SIZES = parse_sizes(
+    os.getenv("NETWORK_TEST_UDP_BENCHMARK_SIZES", None) or "64,512"
+)
+
+
+class TestUDPBenchmark(NetworkTestCase):
+    VALIDATES = [
+        ValidationMatrix.PACKET_RATE_UDP,
+    ]
+
+    def run_benchmark(self, datagram):
+        buffer = bytearray(max(*BENCHMARK_SIZES, PACKET_HEADER_SIZE))
+        echo = BENCHMARK_MODE == "echo"
+
+        def receive():
+            return datagram.recv_into(buffer) or None
+
+        bytes_read = wait_for(receive, MESSAGE_TIMEOUT, datagram.native_socket)
+        print("R", end="")
+        self.assertEqual(bytes(buffer[:bytes_read]), b"Hello World!")
+
+        print()
+        step = 0
+        for rate in BENCHMARK_RATES:
+            for payload_size in BENCHMARK_SIZES:
+                step += 1
+                size = max(payload_size, PACKET_HEADER_SIZE)
+                command = f"RUN {step} {BENCHMARK_MODE} {BENCHMARK_COUNT} {rate} {size}"
+                datagram.send(command.encode())
+                stats = self.receive_packets(datagram, buffer, echo, step)
+                self.assertTrue(stats.received, f"No packets at {rate}/s of {size}B")
+
+                name = f"udp_{rate}pps_{size}"
+                report_metric(f"{name}_rate", stats.packets_per_second(), "packets/s")
+                report_metric(f"{name}_loss", round(stats.loss_percent(), 1), "%")
+                report_metric(f"{name}_reordered", stats.reordered, "packets")
+                report_metric(f"{name}_jitter", int(stats.jitter_us), "us")
+
+        datagram.send(b"END")
+
+    def receive_packets(self, datagram, buffer, echo, step):
+        stats = PacketStats(BENCHMARK_COUNT)
+        # the end markers can be lost as well, so once packets arrive the step also ends when
+        # the sender goes quiet
+        timeout = MESSAGE_TIMEOUT
+        while True:
+            # only wait when nothing is pending, packets at full rate are read straight away
+            bytes_read = datagram.recv_into(buffer) or wait_recv_into(
+                datagram, buffer, timeout
+            )
+            if not bytes_read:
+                break
+            if bytes_read < PACKET_HEADER_SIZE:
+                continue
+            arrival_ns = time.monotonic_ns()
+            sequence, sent_us = struct.unpack_from(PACKET_HEADER, buffer)
+            if sequence == PACKET_END_OF_STREAM:
+                # end markers are sent three times, ignore the extras from earlier steps
+                if sent_us == step:
+                    break
+                continue
+            if echo:
+                datagram.send(memoryview(buffer)[:bytes_read])
+            stats.add(sequence, sent_us, arrival_ns)
+            timeout = BENCHMARK_IDLE
+        return stats
+
+    def test_esp32spi_udp_benchmark(self):
+        if self.radio.__class__.__name__ != "ESP_SPIcontrol":
+            raise SkipTest("self.radio isn't an ESP32SPI")
+
+        ip_address = get_ipv4_address(self.radio)
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_DGRAM)
+        self.radio.start_server(PORT, sock._socknum, conn_mode=self.radio.UDP_MODE)
+
+        announce_server(self.pool, ip_address, PORT, "udp_benchmark", "UDP")
+
+        datagram = ESP32SPIDatagram(self.radio, sock)
+        self.run_benchmark(datagram)
+        datagram.close()
+
+    def test_native_udp_benchmark(self):
+        if self.radio.__class__.__name__ == "ESP_SPIcontrol":
+            raise SkipTest("self.radio isn't native")
+
+        ip_address = get_ipv4_address(self.radio)
+        sock = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_DGRAM)
+        sock.setsockopt(self.pool.SOL_SOCKET, self.pool.SO_REUSEADDR, 1)
+        sock.bind((ip_address, PORT))
+
+        announce_server(self.pool, ip_address, PORT, "udp_benchmark", "UDP")
+
+        datagram = NativeDatagram(sock)
+        self.run_benchmark(datagram)
+        datagram.close()
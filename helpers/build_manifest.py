@@ -0,0 +1,160 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import ast
+import json
+import os
+
+"""
+Builds code/test_manifest.json from the test files, without importing them:
+-----
+python helpers/build_manifest.py
+-----
+The runner reads the manifest instead of importing every test module to list the tests and
+their VALIDATES, and only imports the module it is about to run. Rerun it after adding or
+changing tests (host_simulation.py does so on every run), and copy the manifest to the board
+along with the tests.
+"""
+
+HELPERS_PATH = os.path.dirname(os.path.abspath(__file__))
+CODE_PATH = os.path.join(os.path.dirname(HELPERS_PATH), "code")
+TEST_PATH = "tests"
+MANIFEST_FILE = "test_manifest.json"
+MANIFEST_VERSION = 2
+TEST_CASE_BASES = {"NetworkTestCase", "TestCase"}
+
+
+def get_validations(code_path=CODE_PATH):
+    with open(os.path.join(code_path, "helpers.py")) as helpers_file:
+        tree = ast.parse(helpers_file.read())
+
+    validations = {}
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == "ValidationMatrix":
+            for statement in node.body:
+                if (
+                    isinstance(statement, ast.Assign)
+                    and isinstance(statement.value, ast.Constant)
+                    and isinstance(statement.value.value, str)
+                ):
+                    for target in statement.targets:
+                        validations[target.id] = statement.value.value
+    return validations
+
+
+def get_base_name(node):
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+def get_radio_destructive(class_node, inherited):
+    for statement in class_node.body:
+        if isinstance(statement, ast.Assign) and any(
+            getattr(target, "id", None) == "RADIO_DESTRUCTIVE"
+            for target in statement.targets
+        ):
+            return bool(ast.literal_eval(statement.value))
+    return inherited
+
+
+def get_validates(class_node, validations):
+    for statement in class_node.body:
+        if not isinstance(statement, ast.Assign):
+            continue
+        if not any(
+            getattr(target, "id", None) == "VALIDATES" for target in statement.targets
+        ):
+            continue
+        validates = []
+        for element in getattr(statement.value, "elts", []):
+            if isinstance(element, ast.Constant):
+                validates.append(element.value)
+            elif isinstance(element, ast.Attribute) and element.attr in validations:
+                validates.append(validations[element.attr])
+            else:
+                raise ValueError(f"Can't resolve VALIDATES of {class_node.name}")
+        return validates
+    return None
+
+
+def parse_test_file(path, validations):
+    with open(path) as test_file:
+        tree = ast.parse(test_file.read(), path)
+
+    classes = {}
+    test_cases = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        bases = [
+            classes.get(get_base_name(base), get_base_name(base)) for base in node.bases
+        ]
+        tests = []
+        validates = []
+        radio_destructive = False
+        is_test_case = False
+        for base in bases:
+            if isinstance(base, dict):
+                # a TestCase from earlier in the same file, inherit its tests
+                is_test_case = True
+                tests.extend(base["tests"])
+                validates = base["validates"]
+                radio_destructive = radio_destructive or base["radio_destructive"]
+            elif base in TEST_CASE_BASES:
+                is_test_case = True
+        if not is_test_case:
+            continue
+
+        for statement in node.body:
+            if not isinstance(statement, ast.FunctionDef):
+                continue
+            if statement.name.startswith("test") and statement.name not in tests:
+                tests.append(statement.name)
+        own_validates = get_validates(node, validations)
+        test_case = {
+            "name": node.name,
+            "tests": sorted(tests),
+            "validates": validates if own_validates is None else own_validates,
+            "radio_destructive": get_radio_destructive(node, radio_destructive),
+        }
+        classes[node.name] = test_case
+        test_cases.append(test_case)
+    return test_cases
+
+
+def build_manifest(code_path=CODE_PATH):
+    validations = get_validations(code_path)
+    test_path = os.path.join(code_path, TEST_PATH)
+    files = []
+    for test_file in sorted(os.listdir(test_path)):
+        if not test_file.endswith(".py"):
+            continue
+        test_cases = parse_test_file(os.path.join(test_path, test_file), validations)
+        files.append({"file": test_file, "cases": test_cases})
+    return {"version": MANIFEST_VERSION, "files": files}
+
+
+def write_manifest(code_path=CODE_PATH):
+    manifest = build_manifest(code_path)
+    with open(os.path.join(code_path, MANIFEST_FILE), "w") as manifest_file:
+        json.dump(manifest, manifest_file, separators=(",", ":"))
+        manifest_file.write("\n")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build code/test_manifest.json")
+    parser.add_argument("--code", default=CODE_PATH, help="path to the code folder")
+    args = parser.parse_args()
+    manifest = write_manifest(args.code)
+    test_count = sum(
+        len(test_case["tests"])
+        for entry in manifest["files"]
+        for test_case in entry["cases"]
+    )
+    print(f"{len(manifest['files'])} test file(s), {test_count} test(s)")
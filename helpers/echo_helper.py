@@ -0,0 +1,64 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import socket
+
+"""
+Host peer for tests/test_rtt. Once the test shows "waiting for TCP client connection" (or UDP),
+call tcp_echo_client or udp_echo_client with the IP and port from the test, or run:
+-----
+python helpers/echo_helper.py tcp 192.168.xx.xx 5000
+-----
+Everything the board sends is sent straight back, the board does all the timing.
+TCP echoes until the board closes the connection, UDP until the board sends END.
+"""
+
+
+def tcp_echo_client(ip=None, port=None, timeout=60):
+    if ip is None:
+        ip = input("IP? ")
+    if port is None:
+        port = int(input("Port? "))
+    echoed = 0
+    with socket.create_connection((ip, port), timeout=timeout) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        buffer = bytearray(4096)
+        while True:
+            bytes_read = sock.recv_into(buffer)
+            if not bytes_read:
+                break
+            sock.sendall(buffer[:bytes_read])
+            echoed += bytes_read
+    print(f"TCP: Echoed {echoed} bytes to {ip}:{port}")
+
+
+def udp_echo_client(ip=None, port=None, timeout=60):
+    if ip is None:
+        ip = input("IP? ")
+    if port is None:
+        port = int(input("Port? "))
+    echoed = 0
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.sendto(b"Hello World!", (ip, port))
+        while True:
+            data, address = sock.recvfrom(65535)
+            if data == b"END":
+                break
+            sock.sendto(data, address)
+            echoed += 1
+    print(f"UDP: Echoed {echoed} datagrams to {ip}:{port}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Echo host peer")
+    parser.add_argument("protocol", choices=["tcp", "udp"])
+    parser.add_argument("ip")
+    parser.add_argument("port", type=int, nargs="?", default=5000)
+    args = parser.parse_args()
+    if args.protocol == "tcp":
+        tcp_echo_client(args.ip, args.port)
+    else:
+        udp_echo_client(args.ip, args.port)
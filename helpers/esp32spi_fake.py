@@ -0,0 +1,398 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import os
+import struct
+import sys
+import time
+from collections import deque
+
+"""
+A scripted stand-in for the ESP32 co-processor of an ESP32SPI board. It speaks the SPI command
+protocol to a real ESP_SPIcontrol, so its command layer can be profiled on the host, without a
+board (needs adafruit-circuitpython-esp32spi and Adafruit-Blinka installed):
+-----
+python helpers/esp32spi_fake.py
+python helpers/esp32spi_fake.py --scenario udp --loops 100 --rtt-ms 5 --latency-us 300
+python helpers/esp32spi_fake.py --tight
+-----
+The peer is scripted like tcp_server_helper.py and udp_server_helper.py: one round trip after
+the server starts it connects and says "Hello World!", and it answers every message with the
+number doubled one round trip after it was sent. The ready pin stays busy for --latency-us
+after every command, the time the co-processor takes to act on it. The scenarios poll like
+test_esp32spi_tcp_server and test_esp32spi_udp_server do, through wait_for() and its backoff,
+or in a tight loop with --tight, and print what code/esp32spi_profiler.py counted.
+"""
+
+HELPERS_PATH = os.path.dirname(os.path.abspath(__file__))
+CODE_PATH = os.path.join(os.path.dirname(HELPERS_PATH), "code")
+
+START_CMD = 0xE0
+END_CMD = 0xEE
+REPLY_FLAG = 0x80
+
+GET_CONN_STATUS_CMD = 0x20
+GET_IPADDR_CMD = 0x21
+GET_MACADDR_CMD = 0x22
+START_SERVER_TCP_CMD = 0x28
+GET_STATE_TCP_CMD = 0x29
+DATA_SENT_TCP_CMD = 0x2A
+AVAIL_DATA_TCP_CMD = 0x2B
+STOP_CLIENT_TCP_CMD = 0x2E
+GET_CLIENT_STATE_TCP_CMD = 0x2F
+GET_FW_VERSION_CMD = 0x37
+SEND_UDP_DATA_CMD = 0x39
+GET_REMOTE_DATA_CMD = 0x3A
+GET_SOCKET_CMD = 0x3F
+SEND_DATA_TCP_CMD = 0x44
+GET_DATABUF_TCP_CMD = 0x45
+INSERT_DATABUF_TCP_CMD = 0x46
+# commands whose parameter lengths take two bytes, sent and answered
+SENT_PARAM_LEN_16 = (SEND_DATA_TCP_CMD, GET_DATABUF_TCP_CMD, INSERT_DATABUF_TCP_CMD)
+RECV_PARAM_LEN_16 = (GET_DATABUF_TCP_CMD,)
+
+WL_CONNECTED = 3
+SOCKET_CLOSED = 0
+SOCKET_LISTEN = 1
+SOCKET_ESTABLISHED = 4
+NO_SOCKET = 255
+UDP_MODE = 1
+MAX_SOCKETS = 10
+MAX_AVAILABLE = 0xFFFF
+
+IP_ADDRESS = bytes((192, 168, 4, 2))
+PEER_ADDRESS = bytes((192, 168, 4, 1))
+PEER_PORT = 5001
+PORT = 5000
+HELLO = b"Hello World!"
+TIMEOUT = 10
+
+
+class FakePin:
+    def __init__(self, on_change=None):
+        self.direction = None
+        self._value = True
+        self._on_change = on_change
+
+    def switch_to_output(self, value=False, drive_mode=None):
+        self.value = value
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        if self._on_change:
+            self._on_change(value)
+
+
+class ReadyPin(FakePin):
+    def __init__(self, coprocessor):
+        super().__init__()
+        self._coprocessor = coprocessor
+
+    @property
+    def value(self):
+        return self._coprocessor.busy()
+
+
+class FakeSPI:
+    def __init__(self, coprocessor):
+        self._coprocessor = coprocessor
+
+    def configure(self, **kwargs):
+        pass
+
+    def try_lock(self):
+        return True
+
+    def unlock(self):
+        pass
+
+    def readinto(self, buffer, start=0, end=None, write_value=0):
+        self._coprocessor.transmit(buffer, start, len(buffer) if end is None else end)
+
+    def write(self, buffer, start=0, end=None):
+        self._coprocessor.receive(buffer[start:end])
+
+
+class FakeSocket:
+    def __init__(self):
+        self.mode = None
+        self.state = SOCKET_CLOSED
+        # (due ns, data) the peer has yet to send, and what arrived and wasn't read
+        self.incoming = deque()
+        self.pending = bytearray()
+        self.outgoing = bytearray()
+        # the client socket a TCP server hands out when it is due
+        self.accept = None
+
+    def arrive(self, now):
+        while self.incoming and self.incoming[0][0] <= now:
+            self.pending += self.incoming.popleft()[1]
+
+
+class FakeCoprocessor:
+    # Answers the commands the socket layer and the server tests send, the peer on the
+    # other end is scripted
+    def __init__(self, rtt_ns=1_000_000, latency_ns=0):
+        self.rtt_ns = rtt_ns
+        self.latency_ns = latency_ns
+        self.sockets = {}
+        self._busy_until = 0
+        self._selected = False
+        self._command = bytearray()
+        self._reply = bytearray()
+        self.spi = FakeSPI(self)
+        self.cs = FakePin(self.select)
+        self.ready = ReadyPin(self)
+        self.reset = FakePin()
+        self._handlers = {
+            GET_CONN_STATUS_CMD: lambda params: [bytes((WL_CONNECTED,))],
+            GET_IPADDR_CMD: lambda params: [IP_ADDRESS, bytes(4), PEER_ADDRESS],
+            GET_MACADDR_CMD: lambda params: [bytes(6)],
+            GET_FW_VERSION_CMD: lambda params: [b"1.7.7\x00"],
+            GET_SOCKET_CMD: self.get_socket,
+            START_SERVER_TCP_CMD: self.start_server,
+            GET_STATE_TCP_CMD: self.state,
+            GET_CLIENT_STATE_TCP_CMD: self.state,
+            AVAIL_DATA_TCP_CMD: self.available,
+            GET_DATABUF_TCP_CMD: self.read,
+            SEND_DATA_TCP_CMD: self.write,
+            INSERT_DATABUF_TCP_CMD: self.write,
+            DATA_SENT_TCP_CMD: self.sent,
+            SEND_UDP_DATA_CMD: self.sent,
+            STOP_CLIENT_TCP_CMD: self.stop_client,
+            GET_REMOTE_DATA_CMD: lambda params: [
+                PEER_ADDRESS,
+                struct.pack(">H", PEER_PORT),
+            ],
+        }
+
+    def busy(self):
+        # the ready pin, low when a command can be sent, high once selected
+        if self._selected:
+            return True
+        return time.monotonic_ns() < self._busy_until
+
+    def select(self, value):
+        self._selected = not value
+        if value and self._command:
+            self.handle(bytes(self._command))
+            self._command.clear()
+            self._busy_until = time.monotonic_ns() + self.latency_ns
+
+    def receive(self, data):
+        self._command += data
+
+    def transmit(self, buffer, start, end):
+        size = min(end - start, len(self._reply))
+        buffer[start : start + size] = self._reply[:size]
+        buffer[start + size : end] = b"\xff" * (end - start - size)
+        del self._reply[:size]
+
+    def handle(self, packet):
+        command = packet[1]
+        params = []
+        position = 3
+        for _ in range(packet[2]):
+            length = packet[position]
+            position += 1
+            if command in SENT_PARAM_LEN_16:
+                length = length << 8 | packet[position]
+                position += 1
+            params.append(packet[position : position + length])
+            position += length
+        if command not in self._handlers:
+            raise ValueError(f"command 0x{command:02X} isn't scripted")
+
+        replies = self._handlers[command](params)
+        self._reply = bytearray((START_CMD, command | REPLY_FLAG, len(replies)))
+        for reply in replies:
+            if command in RECV_PARAM_LEN_16:
+                self._reply.append(len(reply) >> 8)
+            self._reply.append(len(reply) & 0xFF)
+            self._reply += reply
+        self._reply.append(END_CMD)
+
+    def new_socket(self):
+        for number in range(MAX_SOCKETS):
+            if number not in self.sockets:
+                self.sockets[number] = FakeSocket()
+                return number
+        return NO_SOCKET
+
+    def get_socket(self, params):
+        return [bytes((self.new_socket(),))]
+
+    def start_server(self, params):
+        # the IP address to listen on may come first
+        _, number, mode = params[-3:]
+        server = self.sockets[number[0]]
+        server.mode = mode[0]
+        server.state = SOCKET_LISTEN
+        hello_due = time.monotonic_ns() + self.rtt_ns
+        if server.mode == UDP_MODE:
+            server.incoming.append((hello_due, HELLO))
+        else:
+            client_number = self.new_socket()
+            client = self.sockets[client_number]
+            client.mode = server.mode
+            client.state = SOCKET_ESTABLISHED
+            client.incoming.append((hello_due, HELLO))
+            server.accept = (hello_due - self.rtt_ns // 2, client_number)
+        return [b"\x01"]
+
+    def state(self, params):
+        sock = self.sockets.get(params[0][0])
+        return [bytes((sock.state if sock else SOCKET_CLOSED,))]
+
+    def available(self, params):
+        sock = self.sockets[params[0][0]]
+        now = time.monotonic_ns()
+        if sock.state == SOCKET_LISTEN and sock.mode != UDP_MODE:
+            if sock.accept is None or sock.accept[0] > now:
+                return [struct.pack("<H", NO_SOCKET)]
+            client_number = sock.accept[1]
+            sock.accept = None
+            return [struct.pack("<H", client_number)]
+        sock.arrive(now)
+        return [struct.pack("<H", min(len(sock.pending), MAX_AVAILABLE))]
+
+    def read(self, params):
+        sock = self.sockets[params[0][0]]
+        size = params[1][0] | params[1][1] << 8
+        data = bytes(sock.pending[:size])
+        del sock.pending[:size]
+        return [data]
+
+    def write(self, params):
+        self.sockets[params[0][0]].outgoing += params[1]
+        if params[1] and len(params) > 1:
+            return [bytes((len(params[1]),))]
+        return [b"\x00"]
+
+    def sent(self, params):
+        sock = self.sockets[params[0][0]]
+        if sock.outgoing:
+            # the peer doubles the number and sends it back
+            answer = str(int(sock.outgoing) * 2).encode()
+            sock.incoming.append((time.monotonic_ns() + self.rtt_ns, answer))
+            sock.outgoing.clear()
+        return [b"\x01"]
+
+    def stop_client(self, params):
+        self.sockets.pop(params[0][0], None)
+        return [b"\x01"]
+
+
+def poll_tight(check, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = check()
+        if result is not None:
+            return result
+    raise TimeoutError(f"Nothing came within {timeout} seconds")
+
+
+def run_tcp(radio, pool, loops, poll):
+    from benchmark_helpers import esp32spi_accept
+
+    from helpers import generate_random_number_values
+
+    sock = pool.socket(pool.AF_INET, pool.SOCK_STREAM)
+    radio.start_server(PORT, sock._socknum, conn_mode=radio.TCP_MODE)
+    sock_client = esp32spi_accept(radio, pool, sock, TIMEOUT)
+
+    def read():
+        bytes_available = sock_client._available()
+        if not bytes_available:
+            return None
+        return radio.socket_read(sock_client._socknum, bytes_available)
+
+    if poll(read, TIMEOUT) != HELLO:
+        raise ValueError("The scripted hello didn't come through")
+    for _ in range(loops):
+        test_data, test_expected = generate_random_number_values()
+        sock_client.send(test_data)
+        if poll(read, TIMEOUT) != test_expected:
+            raise ValueError("The scripted answer didn't come through")
+    sock_client.close()
+    sock.close()
+
+
+def run_udp(radio, pool, loops, poll):
+    from helpers import generate_random_number_values
+
+    sock = pool.socket(pool.AF_INET, pool.SOCK_DGRAM)
+    radio.start_server(PORT, sock._socknum, conn_mode=radio.UDP_MODE)
+
+    def read():
+        bytes_available = radio.socket_available(sock._socknum)
+        if not bytes_available:
+            return None
+        return radio.socket_read(sock._socknum, bytes_available)
+
+    if poll(read, TIMEOUT) != HELLO:
+        raise ValueError("The scripted hello didn't come through")
+    for _ in range(loops):
+        test_data, test_expected = generate_random_number_values()
+        radio.socket_write(sock._socknum, test_data, conn_mode=radio.UDP_MODE)
+        if poll(read, TIMEOUT) != test_expected:
+            raise ValueError("The scripted answer didn't come through")
+    sock.close()
+
+
+def profile(scenario, loops, rtt_ns, latency_ns, tight):
+    from adafruit_esp32spi import adafruit_esp32spi, adafruit_esp32spi_socketpool
+
+    sys.path.insert(0, CODE_PATH)
+    from esp32spi_profiler import SPIProfiler
+
+    from helpers import wait_for
+
+    coprocessor = FakeCoprocessor(rtt_ns, latency_ns)
+    radio = adafruit_esp32spi.ESP_SPIcontrol(
+        coprocessor.spi, coprocessor.cs, coprocessor.ready, coprocessor.reset
+    )
+    pool = adafruit_esp32spi_socketpool.SocketPool(radio)
+    run = run_udp if scenario == "udp" else run_tcp
+    poll = poll_tight if tight else wait_for
+
+    start = time.monotonic_ns()
+    with SPIProfiler(radio, enabled=True) as profiler:
+        run(radio, pool, loops, poll)
+    elapsed_ns = time.monotonic_ns() - start
+    print()
+    print(
+        f"{scenario}: {loops} message(s), {'tight' if tight else 'backoff'} polling,"
+        f" {elapsed_ns / 1_000_000:.1f}ms"
+    )
+    profiler.report()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile ESP32SPI on a fake ESP32")
+    parser.add_argument("--scenario", choices=("tcp", "udp"), default="tcp")
+    parser.add_argument("--loops", type=int, default=20, help="messages to exchange")
+    parser.add_argument("--rtt-ms", type=float, default=2, help="the peer's round trip")
+    parser.add_argument(
+        "--latency-us", type=float, default=100, help="how long each command takes"
+    )
+    parser.add_argument("--tight", action="store_true", help="poll without backing off")
+    args = parser.parse_args()
+    try:
+        import adafruit_esp32spi  # noqa: F401
+    except ImportError:
+        parser.error("needs adafruit-circuitpython-esp32spi and Adafruit-Blinka")
+    profile(
+        args.scenario,
+        args.loops,
+        int(args.rtt_ms * 1_000_000),
+        int(args.latency_us * 1000),
+        args.tight,
+    )
@@ -0,0 +1,149 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import importlib.util
+import os
+import signal
+import socket
+import ssl
+import sys
+import threading
+import time
+import tracemalloc
+
+from peers import PEERS
+
+"""
+CPython implementation of code/network_platform.py, used by host_simulation.py.
+sleep_memory is a plain bytearray, reload() unwinds back to the simulation loop,
+and the "radio" is the host network stack, with the socket module as the pool.
+The heap is what tracemalloc sees, out of a pretend heap of NETWORK_TEST_HOST_HEAP bytes.
+Whenever a test announces a server, the matching host peer is started in a thread.
+The watchdog is a SIGALRM timer, which interrupts a blocking socket call like the board's does.
+"""
+
+HOST_IP = os.getenv("NETWORK_TEST_HOST_IP", "127.0.0.1")
+SLEEP_MEMORY_SIZE = int(os.getenv("NETWORK_TEST_HOST_SLEEP_MEMORY", "8192"))
+HEAP_SIZE = int(os.getenv("NETWORK_TEST_HOST_HEAP", "8388608"))
+
+board_id = "host_simulation"
+sleep_memory = bytearray(SLEEP_MEMORY_SIZE)
+answers = []
+start_peers = True
+# when the running watchdog runs out
+watchdog_deadline = [None]
+
+
+class HostReload(BaseException):
+    pass
+
+
+class WatchDogTimeout(Exception):
+    pass
+
+
+class HostRadio:
+    def __init__(self, ip_address=HOST_IP):
+        self.ipv4_address = ip_address
+        self.mac_address = bytes(6)
+
+
+def connection_manager_close_all(release_references=False):
+    try:
+        import adafruit_connection_manager
+    except ImportError:
+        return
+    # the socket module never went through get_radio_socketpool(), so there are
+    # no references to release, only sockets to close
+    adafruit_connection_manager.connection_manager_close_all()
+
+
+def deinit_radio(radio):
+    pass
+
+
+def enable_log(enable=True):
+    pass
+
+
+def get_radio(force=None):
+    return HostRadio()
+
+
+def get_radio_socketpool(radio):
+    return socket
+
+
+def get_radio_ssl_context(radio):
+    return ssl.create_default_context()
+
+
+def heap_peak(reset=False):
+    if not tracemalloc.is_tracing():
+        return None
+    peak = tracemalloc.get_traced_memory()[1]
+    if reset:
+        tracemalloc.reset_peak()
+    return peak
+
+
+def import_module(module_name):
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, f"{module_name}.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def mem_free():
+    return HEAP_SIZE - tracemalloc.get_traced_memory()[0]
+
+
+def prompt(text):
+    if not answers:
+        return input(text)
+    answer = answers.pop(0)
+    print(f"{text}{answer}")
+    return answer
+
+
+def watchdog_expired(signum, frame):
+    raise WatchDogTimeout()
+
+
+def start_watchdog(timeout):
+    if not hasattr(signal, "setitimer"):
+        return False
+    signal.signal(signal.SIGALRM, watchdog_expired)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    watchdog_deadline[0] = time.monotonic() + timeout
+    return True
+
+
+def feed_watchdog():
+    # the timer covers the whole budget, there are no slices to feed, only the budget to check
+    deadline = watchdog_deadline[0]
+    if deadline is not None and time.monotonic() >= deadline:
+        raise WatchDogTimeout()
+
+
+def stop_watchdog():
+    watchdog_deadline[0] = None
+    if hasattr(signal, "setitimer"):
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def reload():
+    raise HostReload()
+
+
+def server_started(peer, ip_address, port):
+    if not start_peers:
+        return
+    peer_thread = threading.Thread(
+        target=PEERS[peer], args=(ip_address, int(port)), daemon=True
+    )
+    peer_thread.start()
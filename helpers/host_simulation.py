@@ -0,0 +1,111 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import os
+import runpy
+import sys
+import time
+import tracemalloc
+
+import host_platform
+import host_unittest
+from build_manifest import write_manifest
+from standin_helper import start_standin
+
+"""
+Runs the whole network test runner (code/code.py) under CPython:
+-----
+python helpers/host_simulation.py
+-----
+Every supervisor.reload() becomes an in-process restart of code.py, with the
+runner's modules dropped from sys.modules so each test file gets a fresh import,
+just like on the board. code/test_manifest.json is rebuilt first. Answers to the
+prompts are scripted unless --interactive is passed. The server tests get their
+host peer started automatically, unless --external-peers is passed. Unless
+NETWORK_TEST_HTTP_URL is set, the stand-ins of standin_helper.py are started and the tests
+pointed at them instead of the internet.
+With --runs the suite is run again, keeping sleep_memory, so later runs batch files
+by what they learned. --select answers the test selection prompt.
+"""
+
+HELPERS_PATH = os.path.dirname(os.path.abspath(__file__))
+CODE_PATH = os.path.join(os.path.dirname(HELPERS_PATH), "code")
+
+
+def is_runner_module(module):
+    module_file = getattr(module, "__file__", None) or ""
+    return os.path.abspath(module_file).startswith(CODE_PATH + os.sep)
+
+
+def reset_runner_modules():
+    for module_name, module in list(sys.modules.items()):
+        if is_runner_module(module):
+            del sys.modules[module_name]
+
+
+def run_simulation(
+    radio=1, interactive=False, external_peers=False, runs=1, selection=""
+):
+    host_platform.start_peers = not external_peers
+
+    sys.modules["unittest"] = host_unittest
+    sys.path.insert(0, CODE_PATH)
+    os.chdir(CODE_PATH)
+
+    write_manifest(CODE_PATH)
+    if not os.getenv("NETWORK_TEST_HTTP_URL"):
+        standin = start_standin(host_platform.HOST_IP, names=[host_platform.HOST_IP])
+        for key, value in standin.settings(host_platform.HOST_IP).items():
+            os.environ.setdefault(key, str(value))
+    tracemalloc.start()
+    for run in range(1, runs + 1):
+        if not interactive:
+            host_platform.answers[:] = [str(radio), selection, "y"]
+        boots = 0
+        start = time.monotonic()
+        while True:
+            boots += 1
+            try:
+                runpy.run_path("code.py", run_name="__main__")
+                break
+            except host_platform.HostReload:
+                print()
+                print("soft reboot")
+                print()
+            finally:
+                reset_runner_modules()
+
+        print()
+        print(
+            f"Simulation run {run} finished: {boots} boot(s)"
+            f" in {time.monotonic() - start:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the network tests on the host")
+    parser.add_argument("--radio", type=int, default=1, help="radio option to pick")
+    parser.add_argument(
+        "--interactive", action="store_true", help="answer the prompts by hand"
+    )
+    parser.add_argument(
+        "--external-peers",
+        action="store_true",
+        help="leave the server tests to another peer, e.g. peer_daemon.py",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=1, help="times to run the suite in a row"
+    )
+    parser.add_argument(
+        "--select", default="", help="tags, files or tests to run, comma separated"
+    )
+    args = parser.parse_args()
+    run_simulation(
+        radio=args.radio,
+        interactive=args.interactive,
+        external_peers=args.external_peers,
+        runs=args.runs,
+        selection=args.select,
+    )
@@ -0,0 +1,75 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import unittest as _unittest
+
+"""
+The subset of CircuitPython_Unittest that the runner and the tests use, built
+on top of the CPython unittest asserts. host_simulation.py installs it as
+`unittest` before running code/code.py.
+"""
+
+SkipTest = _unittest.SkipTest
+
+
+class AssertRaisesContext:
+    def __init__(self, expected):
+        self.expected = expected
+        self.exception_value = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            raise AssertionError(f"{self.expected.__name__} not raised")
+        if issubclass(exc_type, self.expected):
+            self.exception_value = exc_value
+            return True
+        return False
+
+
+class TestCase(_unittest.TestCase):
+    def assertRaises(self, expected, func=None, *args, **kwargs):
+        context = AssertRaisesContext(expected)
+        if func is None:
+            return context
+        with context:
+            func(*args, **kwargs)
+        return None
+
+
+class TestResult:
+    def __init__(self):
+        self.errorsNum = 0
+        self.failuresNum = 0
+        self.skippedNum = 0
+        self.testsRun = 0
+
+    def wasSuccessful(self):
+        return self.errorsNum == 0 and self.failuresNum == 0
+
+
+class TestSuite:
+    def __init__(self):
+        self.tests = []
+
+    def addTest(self, test_case):
+        self.tests.append(test_case)
+
+
+class TestRunner:
+    def run(self, suite):
+        result = TestResult()
+        for test_case in suite.tests:
+            test_case().run(result)
+        print(f"Ran {result.testsRun} tests")
+        print()
+        if result.failuresNum > 0 or result.errorsNum > 0:
+            print(f"FAILED (failures={result.failuresNum}, errors={result.errorsNum})")
+        elif result.skippedNum > 0:
+            print(f"OK ({result.skippedNum} skipped)")
+        else:
+            print("OK")
+        return result
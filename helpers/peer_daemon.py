@@ -0,0 +1,123 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import asyncio
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from peers import PEERS
+from record_collector import RecordCollector, watch_serial
+
+"""
+Long running host peer for a bench of boards, no IP addresses typed by hand:
+-----
+python helpers/peer_daemon.py --serial /dev/ttyACM0 --serial /dev/ttyACM1 --discovery-port 5001
+-----
+It watches each serial port (or pty) for the "Server started at: <ip>:<port> [<peer>]" line and
+listens for the same text as a discovery datagram, which the boards send when
+NETWORK_TEST_DISCOVERY_HOST is set in their settings.toml. Every announcement starts a session
+with the matching peer from peers.py, so any number of boards can be served at once.
+With --records <dir> the test records on the serial ports are stored as record_collector.py would.
+"""
+
+ANNOUNCEMENT = re.compile(r"Server started at: ([0-9.]+):(\d+) \[(\w+)\]")
+
+
+class DiscoveryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, daemon):
+        self._daemon = daemon
+
+    def datagram_received(self, data, addr):
+        self._daemon.announce(data.decode(errors="replace"), f"discovery {addr[0]}")
+
+
+class PeerDaemon:
+    def __init__(self, max_sessions=64, echo=False, records_path=None):
+        self._echo = echo
+        self._executor = ThreadPoolExecutor(max_workers=max_sessions)
+        self._sessions = {}
+        self._collector = RecordCollector(records_path) if records_path else None
+
+    def announce(self, line, source):
+        match = ANNOUNCEMENT.search(line)
+        if not match:
+            return
+        ip, port, peer = match.group(1), int(match.group(2)), match.group(3)
+        if (ip, port) in self._sessions:
+            # the same server is usually seen on serial and by discovery
+            return
+        if peer not in PEERS:
+            print(f"[{ip}:{port}] unknown peer {peer} from {source}")
+            return
+        self._sessions[(ip, port)] = asyncio.ensure_future(
+            self.serve(ip, port, peer, source)
+        )
+
+    async def listen_discovery(self, port):
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: DiscoveryProtocol(self), local_addr=("0.0.0.0", port)
+        )
+        try:
+            await asyncio.Future()
+        finally:
+            transport.close()
+
+    async def serve(self, ip, port, peer, source):
+        print(f"[{ip}:{port}] {peer} session from {source}")
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        try:
+            await loop.run_in_executor(self._executor, PEERS[peer], ip, port)
+            print(f"[{ip}:{port}] {peer} done in {time.monotonic() - start:.1f}s")
+        except Exception as exc:
+            # one board failing must not take the other sessions down
+            print(f"[{ip}:{port}] {peer} failed: {exc!r}")
+        finally:
+            del self._sessions[(ip, port)]
+
+    def serial_line(self, line, source):
+        self.announce(line, source)
+        if self._collector:
+            self._collector.feed(line, source)
+
+    async def watch_serial(self, path):
+        await watch_serial(path, self.serial_line, self._echo)
+
+
+async def run_daemon(serial_paths, discovery_port=None, daemon=None):
+    daemon = daemon or PeerDaemon()
+    watchers = [daemon.watch_serial(path) for path in serial_paths]
+    if discovery_port:
+        watchers.append(daemon.listen_discovery(discovery_port))
+    print(f"Waiting for announcements on {len(watchers)} source(s)")
+    await asyncio.gather(*watchers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve the server tests of many boards"
+    )
+    parser.add_argument(
+        "--serial", action="append", default=[], help="serial port or pty to watch"
+    )
+    parser.add_argument("--discovery-port", type=int, help="UDP discovery port")
+    parser.add_argument("--max-sessions", type=int, default=64)
+    parser.add_argument("--echo", action="store_true", help="print the serial output")
+    parser.add_argument("--records", help="store the boards' test records here")
+    args = parser.parse_args()
+    if not args.serial and not args.discovery_port:
+        parser.error("nothing to watch, pass --serial and/or --discovery-port")
+    try:
+        asyncio.run(
+            run_daemon(
+                args.serial,
+                args.discovery_port,
+                PeerDaemon(args.max_sessions, args.echo, args.records),
+            )
+        )
+    except KeyboardInterrupt:
+        pass
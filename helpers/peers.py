@@ -0,0 +1,28 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+from echo_helper import tcp_echo_client, udp_echo_client
+from tcp_scaling_helper import tcp_scaling_client
+from tcp_server_helper import tcp_client_send
+from tcp_throughput_helper import tcp_throughput_client
+from udp_benchmark_helper import udp_benchmark_client
+from udp_server_helper import udp_client_send
+
+"""
+The host side of every server test, keyed by the peer name the test announces:
+-----
+Server started at: 192.168.xx.xx:5000 [tcp_echo] - waiting for TCP client connection.
+-----
+Each peer is called with the IP and port from the announcement.
+"""
+
+PEERS = {
+    "tcp": tcp_client_send,
+    "tcp_echo": tcp_echo_client,
+    "tcp_scaling": tcp_scaling_client,
+    "tcp_throughput": tcp_throughput_client,
+    "udp": udp_client_send,
+    "udp_benchmark": udp_benchmark_client,
+    "udp_echo": udp_echo_client,
+}
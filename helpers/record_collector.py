@@ -0,0 +1,169 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+import tty
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+Collects the machine-readable records a board prints when NETWORK_TEST_RECORDS = 1 is set
+in its settings.toml, from live serial ports or from saved transcripts:
+-----
+python helpers/record_collector.py --serial /dev/ttyACM0 --serial /dev/ttyACM1
+python helpers/record_collector.py --transcript screenlog.0
+NETWORK_TEST_RECORDS=1 python helpers/host_simulation.py | python helpers/record_collector.py --transcript -
+-----
+Every record is a line of JSON after the "@ntr " prefix, so the rest of the output is left
+alone and a record split by a reset is simply skipped. Each run ("run" record, then one "file"
+record per test file, then "summary") is stored as <board>-<time>.jsonl in --store, one
+record per line, with the source and the time it was received added.
+peer_daemon.py --records <dir> collects the same way from the ports it watches.
+"""
+
+RECORD_PREFIX = "@ntr "
+RECORD_VERSION = 1
+DEFAULT_STORE = "results"
+SERIAL_RETRY = 1
+
+
+def run_filename(board, received):
+    board = re.sub(r"[^\w.-]", "_", board)
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(received))
+    return f"{board}-{stamp}.jsonl"
+
+
+class RecordCollector:
+    def __init__(self, store_path=DEFAULT_STORE):
+        self._store_path = store_path
+        # the run file each source is writing to
+        self._runs = {}
+        self.runs = []
+
+    def feed(self, line, source):
+        prefix_at = line.find(RECORD_PREFIX)
+        if prefix_at < 0:
+            return None
+        try:
+            record = json.loads(line[prefix_at + len(RECORD_PREFIX) :])
+        except ValueError:
+            print(f"{source}: skipped a garbled record")
+            return None
+        if not isinstance(record, dict) or "type" not in record:
+            return None
+        if record["type"] == "run" and record.get("version", 0) > RECORD_VERSION:
+            print(f"{source}: record version {record['version']} is newer than mine")
+
+        record["source"] = source
+        record["received"] = time.time()
+        if record["type"] == "run" or source not in self._runs:
+            # records without a run record before them still get kept
+            board = record.get("board", source) if record["type"] == "run" else source
+            self.start_run(source, board, record["received"])
+        with open(self._runs[source], "a") as run_file:
+            run_file.write(json.dumps(record) + "\n")
+        self.show(record, source)
+        if record["type"] == "summary":
+            del self._runs[source]
+        return record
+
+    def start_run(self, source, board, received):
+        os.makedirs(self._store_path, exist_ok=True)
+        path = os.path.join(self._store_path, run_filename(board, received))
+        suffix = 1
+        while path in self.runs or os.path.exists(path):
+            suffix += 1
+            name = run_filename(board, received).replace(".jsonl", f"-{suffix}.jsonl")
+            path = os.path.join(self._store_path, name)
+        self._runs[source] = path
+        self.runs.append(path)
+        print(f"{source}: recording {board} to {path}")
+
+    @staticmethod
+    def show(record, source):
+        if record["type"] == "file":
+            state = "exception" if record.get("exceptioned") else "ok"
+            if record.get("timed_out"):
+                state = "timed out"
+            print(
+                f"{source}: {record.get('file')} {state} "
+                f"{record.get('passed', 0)} passed {record.get('failed', 0)} failed "
+                f"{record.get('errored', 0)} errored, "
+                f"{len(record.get('metrics', []))} metric(s)"
+            )
+        elif record["type"] == "summary":
+            print(
+                f"{source}: run done, {record.get('passed', 0)} passed "
+                f"{record.get('failed', 0)} failed {record.get('errored', 0)} errored"
+            )
+
+
+async def watch_serial(path, handle_line, echo=False):
+    loop = asyncio.get_running_loop()
+    reader_executor = ThreadPoolExecutor(max_workers=1)
+    while True:
+        try:
+            with open(path, "rb", buffering=0) as serial:
+                if serial.isatty():
+                    tty.setraw(serial.fileno())
+                while True:
+                    line = await loop.run_in_executor(reader_executor, serial.readline)
+                    if not line:
+                        break
+                    line = line.decode(errors="replace")
+                    if echo:
+                        print(f"{path}: {line.rstrip()}")
+                    handle_line(line, path)
+        except OSError as exc:
+            print(f"{path}: {exc}")
+        # boards drop off USB when they reset, keep trying
+        await asyncio.sleep(SERIAL_RETRY)
+
+
+def collect_transcript(collector, path, echo=False):
+    source = "stdin" if path == "-" else path
+    transcript = sys.stdin if path == "-" else open(path, errors="replace")
+    with transcript:
+        for line in transcript:
+            if echo:
+                print(line.rstrip())
+            collector.feed(line, source)
+
+
+async def collect_serial(collector, serial_paths, echo=False):
+    await asyncio.gather(
+        *[watch_serial(path, collector.feed, echo) for path in serial_paths]
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect test records from boards")
+    parser.add_argument(
+        "--serial", action="append", default=[], help="serial port or pty to watch"
+    )
+    parser.add_argument(
+        "--transcript",
+        action="append",
+        default=[],
+        help="saved serial output to read, - for stdin",
+    )
+    parser.add_argument("--store", default=DEFAULT_STORE, help="where runs are kept")
+    parser.add_argument("--echo", action="store_true", help="print the serial output")
+    args = parser.parse_args()
+    if not args.serial and not args.transcript:
+        parser.error("nothing to collect, pass --serial and/or --transcript")
+
+    collector = RecordCollector(args.store)
+    for transcript_path in args.transcript:
+        collect_transcript(collector, transcript_path, args.echo)
+    if args.serial:
+        try:
+            asyncio.run(collect_serial(collector, args.serial, args.echo))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,370 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sqlite3
+import sys
+
+"""
+Keeps every benchmark metric of the runs record_collector.py stored in an SQLite history, keyed
+on board, firmware and library versions, and compares runs for regressions:
+-----
+python helpers/result_history.py import results
+python helpers/result_history.py runs --board unexpectedmaker_feathers3
+python helpers/result_history.py compare 12 14
+python helpers/result_history.py compare "adafruit_requests==4.0.0" requirements-mcu.txt --board unexpectedmaker_feathers3
+-----
+Each side of compare is a run id, comma separated run ids, or a library set: a requirements file
+or comma separated pins, matching every run (of --board) that reported those versions. Metrics
+are compared per test file and radio. A metric is flagged when it got worse by more than --threshold percent and a permutation test over the
+runs of both sides puts the chance of that being noise under --alpha. That takes repeated runs,
+4 on each side to get under 5%; with fewer, changes past the threshold are only listed.
+The exit code is 1 when anything was flagged.
+"""
+
+DEFAULT_STORE = "results"
+DEFAULT_DATABASE = os.path.join(DEFAULT_STORE, "history.sqlite")
+DEFAULT_ALPHA = 0.05
+DEFAULT_THRESHOLD = 5.0
+# more arrangements than this are sampled instead of all tried
+PERMUTATIONS = 20000
+# metrics without units per second where more is still better
+HIGHER_IS_BETTER = ("_ratio", "_gain_p50", "_ceiling")
+# 0 means every rate was kept up with, so neither direction is better
+NO_DIRECTION = ("_lag_rate",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE,
+    board TEXT,
+    machine TEXT,
+    implementation TEXT,
+    implementation_version TEXT,
+    radio INTEGER,
+    received REAL,
+    finished INTEGER
+);
+CREATE TABLE IF NOT EXISTS libraries (
+    run_id INTEGER REFERENCES runs(id),
+    name TEXT,
+    version TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    run_id INTEGER REFERENCES runs(id),
+    file TEXT,
+    passed INTEGER,
+    failed INTEGER,
+    errored INTEGER,
+    skipped INTEGER,
+    exceptioned INTEGER,
+    duration_ms INTEGER
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER REFERENCES runs(id),
+    file TEXT,
+    name TEXT,
+    value REAL,
+    unit TEXT
+);
+CREATE INDEX IF NOT EXISTS metrics_run ON metrics(run_id);
+"""
+
+
+def direction(name, unit):
+    # 1 when a higher value is better, -1 when lower is, 0 when it can't be said
+    if name.endswith(NO_DIRECTION):
+        return 0
+    if "/s" in unit or name.endswith(HIGHER_IS_BETTER):
+        return 1
+    return -1
+
+
+def mean(values):
+    return sum(values) / len(values)
+
+
+def permutation_p_value(base, candidate):
+    # how often a random split of all the values differs in mean at least as much
+    observed = abs(mean(candidate) - mean(base))
+    pooled = base + candidate
+    total = sum(pooled)
+    size = len(base)
+
+    def extreme(indices):
+        base_sum = sum(pooled[index] for index in indices)
+        difference = (total - base_sum) / len(candidate) - base_sum / size
+        return abs(difference) >= observed * (1 - 1e-9)
+
+    if math.comb(len(pooled), size) <= PERMUTATIONS:
+        splits = list(itertools.combinations(range(len(pooled)), size))
+    else:
+        # seeded, so the same history always gives the same answer
+        sampler = random.Random(0)
+        splits = [sampler.sample(range(len(pooled)), size) for _ in range(PERMUTATIONS)]
+    return sum(1 for indices in splits if extreme(indices)) / len(splits)
+
+
+def selector(value):
+    # argparse type for a side of compare, run ids, a requirements file or name==version pins
+    parts = value.split(",")
+    if all(part.strip().isdigit() for part in parts) or os.path.exists(value):
+        return value
+    if all(part.count("==") == 1 for part in parts):
+        return value
+    raise argparse.ArgumentTypeError(
+        f"{value!r} is neither run ids, a requirements file nor name==version pins"
+    )
+
+
+def read_requirements(path):
+    pins = {}
+    with open(path) as requirements:
+        for line in requirements:
+            pin = line.split("#")[0].strip()
+            if "==" in pin:
+                name, version = pin.split("==")
+                pins[name.strip()] = version.strip()
+    return pins
+
+
+class History:
+    def __init__(self, database_path=DEFAULT_DATABASE):
+        directory = os.path.dirname(database_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(database_path)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def import_path(self, path):
+        if os.path.isdir(path):
+            names = sorted(name for name in os.listdir(path) if name.endswith(".jsonl"))
+            return sum(self.import_path(os.path.join(path, name)) for name in names)
+        name = os.path.basename(path)
+        if self._db.execute("SELECT 1 FROM runs WHERE name = ?", (name,)).fetchone():
+            return 0
+        with open(path) as run_file:
+            records = [json.loads(line) for line in run_file if line.strip()]
+        if not records:
+            return 0
+        self.add_run(name, records)
+        return 1
+
+    def add_run(self, name, records):
+        run = next((record for record in records if record["type"] == "run"), {})
+        summary = next(
+            (record for record in records if record["type"] == "summary"), None
+        )
+        with self._db:
+            run_id = self._db.execute(
+                "INSERT INTO runs (name, board, machine, implementation,"
+                " implementation_version, radio, received, finished)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    name,
+                    run.get("board", records[0].get("source")),
+                    run.get("machine"),
+                    run.get("implementation"),
+                    run.get("implementation_version"),
+                    run.get("radio"),
+                    records[0].get("received"),
+                    summary is not None,
+                ),
+            ).lastrowid
+            if summary:
+                self._db.executemany(
+                    "INSERT INTO libraries VALUES (?, ?, ?)",
+                    [
+                        (run_id, library, version)
+                        for library, version in summary.get("libraries", {}).items()
+                    ],
+                )
+            for record in records:
+                if record["type"] != "file":
+                    continue
+                self._db.execute(
+                    "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        run_id,
+                        record.get("file"),
+                        record.get("passed", 0),
+                        record.get("failed", 0),
+                        record.get("errored", 0),
+                        record.get("skipped", 0),
+                        record.get("exceptioned", 0),
+                        record.get("duration_ms"),
+                    ),
+                )
+                self._db.executemany(
+                    "INSERT INTO metrics VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (run_id, record.get("file"), metric, value, unit)
+                        for metric, value, unit in record.get("metrics", [])
+                    ],
+                )
+
+    def runs(self, board=None):
+        query = (
+            "SELECT id, board, implementation, implementation_version, radio,"
+            " received, finished FROM runs"
+        )
+        if board:
+            return self._db.execute(f"{query} WHERE board = ? ORDER BY id", (board,))
+        return self._db.execute(f"{query} ORDER BY id")
+
+    def libraries(self, run_id):
+        return dict(
+            self._db.execute(
+                "SELECT name, version FROM libraries WHERE run_id = ?", (run_id,)
+            )
+        )
+
+    def select(self, selector, board=None):
+        # run ids, comma separated, or the runs reporting a library set
+        if all(part.strip().isdigit() for part in selector.split(",")):
+            return [int(part) for part in selector.split(",")]
+        if os.path.exists(selector):
+            pins = read_requirements(selector)
+        else:
+            pins = dict(pin.split("==") for pin in selector.split(","))
+        selected = []
+        for run in self.runs(board):
+            libraries = self.libraries(run[0])
+            # a pin for a library the board never loaded says nothing about the run
+            checked = [name for name in pins if name in libraries]
+            if checked and all(libraries[name] == pins[name] for name in checked):
+                selected.append(run[0])
+        return selected
+
+    def metrics(self, run_ids):
+        # values by file, radio, name and unit, a metric only compares with itself
+        values = {}
+        placeholders = ",".join("?" * len(run_ids))
+        for file, radio, name, value, unit in self._db.execute(
+            "SELECT metrics.file, runs.radio, metrics.name, metrics.value, metrics.unit"
+            " FROM metrics JOIN runs ON runs.id = metrics.run_id"
+            f" WHERE metrics.run_id IN ({placeholders})",
+            run_ids,
+        ):
+            values.setdefault((file, radio, name, unit), []).append(value)
+        return values
+
+    def compare(self, base_ids, candidate_ids, alpha, threshold):
+        # (file, radio, name, unit, base mean, candidate mean, change %, p value, worse,
+        # flagged)
+        base = self.metrics(base_ids)
+        candidate = self.metrics(candidate_ids)
+        results = []
+        for key in sorted(base.keys() & candidate.keys(), key=str):
+            file, radio, name, unit = key
+            base_values = base[key]
+            candidate_values = candidate[key]
+            base_mean = mean(base_values)
+            candidate_mean = mean(candidate_values)
+            if base_mean:
+                change = (candidate_mean - base_mean) * 100 / abs(base_mean)
+            else:
+                change = 0.0 if candidate_mean == base_mean else math.inf
+            worse = change * direction(name, unit) < -threshold
+            p_value = None
+            if len(base_values) > 1 and len(candidate_values) > 1:
+                p_value = permutation_p_value(base_values, candidate_values)
+            flagged = worse and p_value is not None and p_value < alpha
+            results.append(
+                key + (base_mean, candidate_mean, change, p_value, worse, flagged)
+            )
+        return results
+
+
+def print_comparison(results, threshold):
+    flagged = 0
+    for result in results:
+        file, radio, name, unit, base, candidate, change, p_value, worse, regressed = (
+            result
+        )
+        if regressed:
+            mark = "REGRESSED"
+            flagged += 1
+        elif worse:
+            mark = "worse?" if p_value is None else "noise?"
+        elif abs(change) > threshold:
+            mark = "changed"
+        else:
+            continue
+        p_text = "  n/a" if p_value is None else f"{p_value:.3f}"
+        label = f"{file}:{name} (radio {radio})"
+        print(
+            f" {mark:9} {label:60} {base:12.1f} -> {candidate:12.1f} {unit:10}"
+            f" {change:+7.1f}%  p={p_text}"
+        )
+    print(f"{len(results)} metric(s) compared, {flagged} regression(s)")
+    return flagged
+
+
+def run_command(args):
+    history = History(args.database)
+    try:
+        if args.command == "import":
+            added = sum(history.import_path(path) for path in args.paths)
+            print(f"Imported {added} run(s)")
+            return 0
+        if args.command == "runs":
+            for run in history.runs(args.board):
+                run_id, board, implementation, version, radio, _, finished = run
+                libraries = " ".join(
+                    f"{name}=={library_version}"
+                    for name, library_version in sorted(
+                        history.libraries(run_id).items()
+                    )
+                )
+                state = "" if finished else " (unfinished)"
+                print(
+                    f"{run_id:4} {board} {implementation} {version} radio {radio}"
+                    f"{state} {libraries}"
+                )
+            return 0
+
+        base_ids = history.select(args.base, args.board)
+        candidate_ids = history.select(args.candidate, args.board)
+        if not base_ids or not candidate_ids:
+            print("No run matched one of the sides")
+            return 2
+        print(f"Base runs: {base_ids}")
+        print(f"Candidate runs: {candidate_ids}")
+        results = history.compare(base_ids, candidate_ids, args.alpha, args.threshold)
+        return 1 if print_comparison(results, args.threshold) else 0
+    finally:
+        history.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark history and regressions")
+    parser.add_argument("--database", default=DEFAULT_DATABASE)
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="add collected runs")
+    import_parser.add_argument("paths", nargs="+", help="run files or directories")
+    runs_parser = commands.add_parser("runs", help="list the runs")
+    runs_parser.add_argument("--board")
+    compare_parser = commands.add_parser("compare", help="look for regressions")
+    compare_parser.add_argument("base", type=selector, help="run id(s) or library set")
+    compare_parser.add_argument(
+        "candidate", type=selector, help="run id(s) or library set"
+    )
+    compare_parser.add_argument("--board", help="only runs of this board")
+    compare_parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="smallest change in percent worth flagging",
+    )
+    sys.exit(run_command(parser.parse_args()))
@@ -0,0 +1,678 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import ssl
+import struct
+import subprocess
+import threading
+import time
+from collections import deque
+
+"""
+Local stand-ins for every internet service the tests use, so the numbers measure the board
+and not the internet. Run it on a host the board can reach:
+-----
+python helpers/standin_helper.py
+-----
+and paste the settings.toml lines it prints onto the board, copying the CA certificate it
+names to the board as well:
+-----
+NETWORK_TEST_HTTP_URL = "http://192.168.xx.xx:8080"
+NETWORK_TEST_HTTPS_URL = "https://192.168.xx.xx:8443"
+NETWORK_TEST_CA_FILE = "/standin_ca.pem"
+NETWORK_TEST_MQTT_BROKER = "192.168.xx.xx"
+...
+-----
+It serves, from one asyncio process:
+- HTTP and HTTPS: GET /bytes/<n> answers with n bytes of a repeating 0-255 pattern, POST
+  /upload reads the body and answers "received <n> mismatched <m>", checked against the
+  same pattern, and /testwifi/index.html and /api/quotes.php answer like the Adafruit pages
+  the tests used to fetch (over HTTP the quotes redirect to HTTPS). Connections are kept
+  alive unless the client sends "Connection: close", and every response says in
+  X-Connection-Requests how many requests its connection has carried.
+- HTTPS with a certificate signed by a CA generated on first run (kept in --cert-dir, so the
+  board's copy stays valid). Needs the openssl command line tool.
+- A minimal MQTT 3.1.1 broker: QoS 0, 1 and 2, retained messages, wildcards and a single
+  username and password, refusing anything else with "Unauthorized".
+- An NTP responder on the host clock.
+Every HTTP response carries a Server-Timing header with the time taken to parse the request
+and prepare the answer, and GET /timings lists the last requests of every service with
+their full server side time, for comparing against what the board measured.
+"""
+
+HELPERS_PATH = os.path.dirname(os.path.abspath(__file__))
+CERT_DIR = os.path.join(HELPERS_PATH, "standin_certs")
+CA_NAME = "Network Tests Stand-in CA"
+
+CHUNK = bytes(range(256)) * 16
+# uploads arrive in reads of any size, that start anywhere in the pattern
+EXPECTED = CHUNK + CHUNK[:256]
+WIFITEST_TEXT = "This is a test of Adafruit WiFi!\nIf you can read this, its working :)"
+QUOTES = [
+    {"text": "Measure twice, cut once.", "author": "Proverb"},
+    {"text": "Premature optimization is the root of all evil.", "author": "Knuth"},
+]
+TIMINGS_KEPT = 256
+STATUS_TEXT = {
+    200: "OK",
+    301: "Moved Permanently",
+    400: "Bad Request",
+    404: "Not Found",
+}
+
+MQTT_CONNECT = 1
+MQTT_CONNACK = 2
+MQTT_PUBLISH = 3
+MQTT_PUBACK = 4
+MQTT_PUBREC = 5
+MQTT_PUBREL = 6
+MQTT_PUBCOMP = 7
+MQTT_SUBSCRIBE = 8
+MQTT_SUBACK = 9
+MQTT_UNSUBSCRIBE = 10
+MQTT_UNSUBACK = 11
+MQTT_PINGREQ = 12
+MQTT_PINGRESP = 13
+MQTT_DISCONNECT = 14
+MQTT_PACKET_NAMES = {
+    MQTT_CONNECT: "connect",
+    MQTT_PUBLISH: "publish",
+    MQTT_PUBACK: "puback",
+    MQTT_PUBREC: "pubrec",
+    MQTT_PUBREL: "pubrel",
+    MQTT_PUBCOMP: "pubcomp",
+    MQTT_SUBSCRIBE: "subscribe",
+    MQTT_UNSUBSCRIBE: "unsubscribe",
+    MQTT_PINGREQ: "pingreq",
+    MQTT_DISCONNECT: "disconnect",
+}
+MQTT_PROTOCOL_LEVEL = 4
+MQTT_REFUSED_PROTOCOL = 1
+MQTT_REFUSED_UNAUTHORIZED = 5
+
+NTP_EPOCH_OFFSET = 2208988800
+NTP_PACKET = "!BBbbII4sQQQQ"
+NTP_PACKET_SIZE = struct.calcsize(NTP_PACKET)
+NTP_MODE_SERVER = 4
+
+
+def get_local_ip():
+    # the address other hosts reach this one on, no packet is sent
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect(("10.255.255.255", 1))
+        return sock.getsockname()[0]
+    except OSError:
+        return "127.0.0.1"
+    finally:
+        sock.close()
+
+
+def make_certificates(cert_dir, names):
+    # a CA that is kept, and a server certificate for every name the board may use
+    os.makedirs(cert_dir, exist_ok=True)
+    ca_key = os.path.join(cert_dir, "ca.key")
+    ca_file = os.path.join(cert_dir, "ca.pem")
+    key_file = os.path.join(cert_dir, "server.key")
+    csr_file = os.path.join(cert_dir, "server.csr")
+    cert_file = os.path.join(cert_dir, "server.pem")
+    ext_file = os.path.join(cert_dir, "server.ext")
+
+    def openssl(*args):
+        subprocess.run(["openssl", *args], check=True, capture_output=True)
+
+    if not os.path.exists(ca_file):
+        openssl(
+            "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-sha256",
+            "-keyout", ca_key, "-out", ca_file, "-days", "3650",
+            "-subj", f"/CN={CA_NAME}",
+            "-addext", "basicConstraints=critical,CA:TRUE",
+            "-addext", "keyUsage=critical,keyCertSign,cRLSign",
+        )  # fmt: skip
+
+    alt_names = [
+        f"IP:{name}" if name.replace(".", "").isdigit() else f"DNS:{name}"
+        for name in names
+    ]
+    with open(ext_file, "w") as ext:
+        ext.write(f"subjectAltName={','.join(alt_names)}\n")
+        ext.write("basicConstraints=CA:FALSE\n")
+        ext.write("extendedKeyUsage=serverAuth\n")
+    openssl(
+        "req", "-newkey", "rsa:2048", "-nodes", "-sha256",
+        "-keyout", key_file, "-out", csr_file, "-subj", f"/CN={names[0]}",
+    )  # fmt: skip
+    openssl(
+        "x509", "-req", "-sha256", "-in", csr_file, "-CA", ca_file, "-CAkey", ca_key,
+        "-CAcreateserial", "-out", cert_file, "-days", "825", "-extfile", ext_file,
+    )  # fmt: skip
+    return ca_file, cert_file, key_file
+
+
+def set_nodelay(writer):
+    # headers and body go out in separate writes, don't let Nagle hold the body back
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+def topic_matches(topic_filter, topic):
+    filter_levels = topic_filter.split("/")
+    topic_levels = topic.split("/")
+    for index, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if index >= len(topic_levels):
+            return False
+        if level not in ("+", topic_levels[index]):
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+def to_ntp(timestamp):
+    return int((timestamp + NTP_EPOCH_OFFSET) * 2**32)
+
+
+class Timings:
+    # the server side time of the last requests of every service
+    def __init__(self, kept=TIMINGS_KEPT):
+        self._records = deque(maxlen=kept)
+
+    def record(self, service, request, size, elapsed_ns):
+        self._records.append(
+            {
+                "service": service,
+                "request": request,
+                "bytes": size,
+                "us": elapsed_ns // 1000,
+                "at": round(time.time(), 3),
+            }
+        )
+
+    def to_json(self):
+        return json.dumps(list(self._records))
+
+
+class HTTPRequest:
+    def __init__(self, writer, request_line, headers, connection_requests):
+        self.start = time.monotonic_ns()
+        self.writer = writer
+        self.method, self.path, _ = request_line.decode("latin-1").split(" ", 2)
+        self.headers = headers
+        self.connection_requests = connection_requests
+        self.close = headers.get("connection", "").lower() == "close"
+
+    def send_head(self, status, content_type, length, location=None):
+        elapsed_ms = (time.monotonic_ns() - self.start) / 1_000_000
+        lines = [
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {length}",
+            f"X-Connection-Requests: {self.connection_requests}",
+            f"Server-Timing: app;dur={elapsed_ms:.3f}",
+        ]
+        if location:
+            lines.append(f"Location: {location}")
+        if self.close:
+            lines.append("Connection: close")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+
+    def send(self, status, content_type, body):
+        self.send_head(status, content_type, len(body))
+        self.writer.write(body)
+        return len(body)
+
+
+class HTTPService:
+    def __init__(self, timings, https_port=None, tls=False):
+        self._timings = timings
+        self._https_port = https_port
+        self._tls = tls
+
+    async def handle(self, reader, writer):
+        set_nodelay(writer)
+        connection_requests = 0
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                connection_requests += 1
+                request = HTTPRequest(
+                    writer, request_line, headers, connection_requests
+                )
+                size = await self.respond(reader, request)
+                await writer.drain()
+                if request.path != "/timings":
+                    self._timings.record(
+                        "https" if self._tls else "http",
+                        f"{request.method} {request.path}",
+                        size,
+                        time.monotonic_ns() - request.start,
+                    )
+                if request.close:
+                    break
+        except (ConnectionError, ValueError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, reader, request):
+        # returns the body bytes moved in either direction
+        length = int(request.headers.get("content-length", 0))
+        path = request.path
+        route, _, argument = path.strip("/").partition("/")
+        if request.method == "POST" and route == "upload":
+            received, mismatched = await self.read_upload(reader, length)
+            body = f"received {received} mismatched {mismatched}".encode()
+            request.send(200, "text/plain", body)
+            return received
+
+        if length:
+            await reader.readexactly(length)
+        if request.method != "GET":
+            return request.send(400, "text/plain", STATUS_TEXT[400].encode())
+
+        if route == "bytes" and argument.isdigit():
+            size = int(argument)
+            request.send_head(200, "application/octet-stream", size)
+            remaining = size
+            while remaining:
+                chunk = CHUNK[: min(remaining, len(CHUNK))]
+                request.writer.write(chunk)
+                remaining -= len(chunk)
+                await request.writer.drain()
+            return size
+
+        if path == "/api/quotes.php" and self._https_port and not self._tls:
+            host = request.headers.get("host", "").rsplit(":", 1)[0]
+            location = f"https://{host}:{self._https_port}{path}"
+            request.send_head(301, "text/plain", 0, location)
+            return 0
+        return request.send(*self.page(request))
+
+    def page(self, request):
+        # the status, content type and body of everything else
+        if request.path == "/testwifi/index.html":
+            return 200, "text/html", WIFITEST_TEXT.encode()
+        if request.path == "/api/quotes.php":
+            quote = QUOTES[request.connection_requests % len(QUOTES)]
+            return 200, "application/json", json.dumps([quote]).encode()
+        if request.path == "/timings":
+            return 200, "application/json", self._timings.to_json().encode()
+        return 404, "text/plain", STATUS_TEXT[404].encode()
+
+    async def read_upload(self, reader, length):
+        received = 0
+        mismatched = 0
+        while received < length:
+            chunk = await reader.read(min(length - received, len(CHUNK)))
+            if not chunk:
+                break
+            offset = received % 256
+            mismatched += chunk != EXPECTED[offset : offset + len(chunk)]
+            received += len(chunk)
+        return received, mismatched
+
+
+class MQTTSession:
+    def __init__(self, writer):
+        self.writer = writer
+        self.client_id = None
+        self.subscriptions = {}
+        self._packet_id = 0
+
+    def next_packet_id(self):
+        self._packet_id = self._packet_id % 0xFFFF + 1
+        return self._packet_id
+
+    def send(self, packet_type, flags, payload=b""):
+        # fixed header, remaining length as a varint, then the payload
+        header = bytearray([packet_type << 4 | flags])
+        length = len(payload)
+        while True:
+            byte = length & 0x7F
+            length >>= 7
+            header.append(byte | 0x80 if length else byte)
+            if not length:
+                break
+        self.writer.write(bytes(header) + payload)
+
+
+def read_mqtt_string(data, offset):
+    (length,) = struct.unpack_from("!H", data, offset)
+    offset += 2
+    return bytes(data[offset : offset + length]), offset + length
+
+
+class MQTTService:
+    def __init__(self, timings, username=None, password=None):
+        self._timings = timings
+        self._username = username
+        self._password = password
+        self._sessions = set()
+        self._retained = {}
+
+    async def handle(self, reader, writer):
+        set_nodelay(writer)
+        session = MQTTSession(writer)
+        keep_alive = None
+        try:
+            while True:
+                timeout = keep_alive * 1.5 if keep_alive else None
+                first = await asyncio.wait_for(reader.readexactly(1), timeout)
+                length = 0
+                shift = 0
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length |= (byte & 0x7F) << shift
+                    shift += 7
+                    if not byte & 0x80:
+                        break
+                data = await reader.readexactly(length)
+                start = time.monotonic_ns()
+
+                packet_type = first[0] >> 4
+                if session.client_id is None:
+                    if packet_type != MQTT_CONNECT:
+                        break
+                    keep_alive = self.connect(session, data)
+                    if keep_alive is None:
+                        break
+                elif not self.dispatch(session, packet_type, first[0] & 0x0F, data):
+                    break
+                await writer.drain()
+                self._timings.record(
+                    "mqtt",
+                    MQTT_PACKET_NAMES.get(packet_type, str(packet_type)),
+                    length,
+                    time.monotonic_ns() - start,
+                )
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.TimeoutError):
+            pass
+        finally:
+            self._sessions.discard(session)
+            writer.close()
+
+    def connect(self, session, data):
+        # returns the keep alive, or None when the connection was refused
+        _, offset = read_mqtt_string(data, 0)
+        level, flags, keep_alive = struct.unpack_from("!BBH", data, offset)
+        offset += 4
+        client_id, offset = read_mqtt_string(data, offset)
+        if flags & 0x04:
+            # will topic and message, accepted but never sent
+            _, offset = read_mqtt_string(data, offset)
+            _, offset = read_mqtt_string(data, offset)
+        username = password = None
+        if flags & 0x80:
+            username, offset = read_mqtt_string(data, offset)
+        if flags & 0x40:
+            password, offset = read_mqtt_string(data, offset)
+
+        if level != MQTT_PROTOCOL_LEVEL:
+            session.send(MQTT_CONNACK, 0, bytes([0, MQTT_REFUSED_PROTOCOL]))
+            return None
+        if self._username is not None and (
+            username != self._username.encode() or password != self._password.encode()
+        ):
+            session.send(MQTT_CONNACK, 0, bytes([0, MQTT_REFUSED_UNAUTHORIZED]))
+            return None
+
+        session.client_id = client_id.decode()
+        self._sessions.add(session)
+        session.send(MQTT_CONNACK, 0, bytes([0, 0]))
+        return keep_alive
+
+    def dispatch(self, session, packet_type, flags, data):
+        # returns False when the client is done
+        if packet_type == MQTT_PUBLISH:
+            self.publish(session, flags, data)
+        elif packet_type == MQTT_PUBREL:
+            session.send(MQTT_PUBCOMP, 0, data[:2])
+        elif packet_type == MQTT_PUBREC:
+            session.send(MQTT_PUBREL, 0x02, data[:2])
+        elif packet_type == MQTT_SUBSCRIBE:
+            self.subscribe(session, data)
+        elif packet_type == MQTT_UNSUBSCRIBE:
+            offset = 2
+            while offset < len(data):
+                topic_filter, offset = read_mqtt_string(data, offset)
+                session.subscriptions.pop(topic_filter.decode(), None)
+            session.send(MQTT_UNSUBACK, 0, data[:2])
+        elif packet_type == MQTT_PINGREQ:
+            session.send(MQTT_PINGRESP, 0)
+        elif packet_type == MQTT_DISCONNECT:
+            return False
+        return True
+
+    def deliver(self, session, topic, payload, flags):
+        # flags are those of the PUBLISH sent, the QoS and retain bits
+        packet = struct.pack("!H", len(topic)) + topic
+        if flags & 0x06:
+            packet += struct.pack("!H", session.next_packet_id())
+        session.send(MQTT_PUBLISH, flags, packet + payload)
+
+    def publish(self, session, flags, data):
+        qos = flags >> 1 & 0x03
+        topic, offset = read_mqtt_string(data, 0)
+        packet_id = b""
+        if qos:
+            packet_id = data[offset : offset + 2]
+            offset += 2
+        payload = data[offset:]
+        if qos == 1:
+            session.send(MQTT_PUBACK, 0, packet_id)
+        elif qos == 2:  # noqa: PLR2004
+            session.send(MQTT_PUBREC, 0, packet_id)
+
+        if flags & 0x01:
+            if payload:
+                self._retained[topic] = (payload, qos)
+            else:
+                self._retained.pop(topic, None)
+        for subscriber in self._sessions:
+            for topic_filter, granted in subscriber.subscriptions.items():
+                if topic_matches(topic_filter, topic.decode()):
+                    self.deliver(subscriber, topic, payload, min(qos, granted) << 1)
+                    break
+
+    def subscribe(self, session, data):
+        offset = 2
+        granted = bytearray()
+        while offset < len(data):
+            topic_filter, offset = read_mqtt_string(data, offset)
+            qos = min(data[offset], 2)
+            offset += 1
+            session.subscriptions[topic_filter.decode()] = qos
+            granted.append(qos)
+        session.send(MQTT_SUBACK, 0, data[:2] + bytes(granted))
+        for topic, (payload, qos) in self._retained.items():
+            for topic_filter, granted_qos in session.subscriptions.items():
+                if topic_matches(topic_filter, topic.decode()):
+                    flags = min(qos, granted_qos) << 1 | 0x01
+                    self.deliver(session, topic, payload, flags)
+                    break
+
+
+class NTPService(asyncio.DatagramProtocol):
+    def __init__(self, timings):
+        self._timings = timings
+        self._transport = None
+
+    def connection_made(self, transport):
+        self._transport = transport
+
+    def datagram_received(self, data, addr):
+        start = time.monotonic_ns()
+        received = time.time()
+        if len(data) < NTP_PACKET_SIZE:
+            return
+        version = data[0] >> 3 & 0x07
+        poll = data[2]
+        originate = data[40:48]
+        reply = bytearray(
+            struct.pack(
+                NTP_PACKET,
+                version << 3 | NTP_MODE_SERVER,
+                1,
+                poll if poll < 0x80 else poll - 0x100,  # noqa: PLR2004
+                -20,
+                0,
+                0,
+                b"LOCL",
+                to_ntp(received),
+                0,
+                to_ntp(received),
+                0,
+            )
+        )
+        reply[24:32] = originate
+        reply[40:48] = struct.pack("!Q", to_ntp(time.time()))
+        self._transport.sendto(bytes(reply), addr)
+        self._timings.record("ntp", "request", len(data), time.monotonic_ns() - start)
+
+
+class StandIn:
+    # ports maps "http", "https", "mqtt" and "ntp" to the port to serve on, 0 for any
+    def __init__(self, host="0.0.0.0", ports=None, names=(), cert_dir=CERT_DIR):
+        self.host = host
+        self.ports = {"http": 0, "https": 0, "mqtt": 0, "ntp": 0}
+        self.ports.update(ports or {})
+        self.cert_dir = cert_dir
+        self.names = list(names)
+        self.mqtt_username = "standin"
+        self.mqtt_password = "standin"
+        self.ca_file = None
+        self.timings = Timings()
+        self._servers = []
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        ssl_context = None
+        if shutil.which("openssl"):
+            self.ca_file, cert_file, key_file = make_certificates(
+                self.cert_dir, self.names or ["localhost"]
+            )
+            ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            ssl_context.load_cert_chain(cert_file, key_file)
+        else:
+            print("openssl not found, serving without HTTPS")
+            self.ports["https"] = None
+
+        if ssl_context:
+            https = HTTPService(self.timings, tls=True)
+            self.ports["https"] = await self.serve(
+                https.handle, self.ports["https"], ssl=ssl_context
+            )
+        http = HTTPService(self.timings, self.ports["https"])
+        self.ports["http"] = await self.serve(http.handle, self.ports["http"])
+        mqtt = MQTTService(self.timings, self.mqtt_username, self.mqtt_password)
+        self.ports["mqtt"] = await self.serve(mqtt.handle, self.ports["mqtt"])
+
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: NTPService(self.timings), local_addr=(self.host, self.ports["ntp"])
+        )
+        self._servers.append(transport)
+        self.ports["ntp"] = transport.get_extra_info("sockname")[1]
+
+    async def serve(self, handler, port, **kwargs):
+        # returns the port, which the system picks for port 0
+        server = await asyncio.start_server(
+            handler, self.host, port, backlog=64, **kwargs
+        )
+        self._servers.append(server)
+        return server.sockets[0].getsockname()[1]
+
+    def settings(self, address, ca_file=None):
+        # what the board needs in settings.toml to use these services
+        settings = {"NETWORK_TEST_HTTP_URL": f"http://{address}:{self.ports['http']}"}
+        if self.ports["https"]:
+            settings["NETWORK_TEST_HTTPS_URL"] = (
+                f"https://{address}:{self.ports['https']}"
+            )
+            settings["NETWORK_TEST_CA_FILE"] = ca_file or self.ca_file
+        settings["NETWORK_TEST_MQTT_BROKER"] = address
+        settings["NETWORK_TEST_MQTT_PORT"] = self.ports["mqtt"]
+        settings["NETWORK_TEST_MQTT_USERNAME"] = self.mqtt_username
+        settings["NETWORK_TEST_MQTT_PASSWORD"] = self.mqtt_password
+        settings["NETWORK_TEST_NTP_SERVER"] = address
+        settings["NETWORK_TEST_NTP_PORT"] = self.ports["ntp"]
+        return settings
+
+
+def start_standin(host="0.0.0.0", **kwargs):
+    # serves from a background thread, for host_simulation.py
+    standin = StandIn(host, **kwargs)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(standin.start())
+    server_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    server_thread.start()
+    return standin
+
+
+async def run_standin(args):
+    address = args.address or get_local_ip()
+    ports = {
+        "http": args.http_port,
+        "https": args.https_port,
+        "mqtt": args.mqtt_port,
+        "ntp": args.ntp_port,
+    }
+    names = [address, "localhost", "127.0.0.1", *args.name]
+    standin = StandIn(args.host, ports, names, args.cert_dir)
+    standin.mqtt_username = args.mqtt_username
+    standin.mqtt_password = args.mqtt_password
+    await standin.start()
+    if standin.ca_file:
+        print(f"Copy {standin.ca_file} to the board as {args.board_ca_file}")
+    print("settings.toml:")
+    for key, value in standin.settings(address, args.board_ca_file).items():
+        print(f"{key} = {json.dumps(value)}")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Local HTTP, HTTPS, MQTT and NTP stand-ins for the board"
+    )
+    parser.add_argument("--host", default="0.0.0.0", help="address to listen on")
+    parser.add_argument(
+        "--address", help="address the board reaches this host on (detected)"
+    )
+    parser.add_argument(
+        "--name", action="append", default=[], help="extra name for the certificate"
+    )
+    parser.add_argument("--http-port", type=int, default=8080)
+    parser.add_argument("--https-port", type=int, default=8443)
+    parser.add_argument("--mqtt-port", type=int, default=1883)
+    # 123 needs root, adafruit_ntp can be pointed at any port
+    parser.add_argument("--ntp-port", type=int, default=1123)
+    parser.add_argument("--mqtt-username", default="standin")
+    parser.add_argument("--mqtt-password", default="standin")
+    parser.add_argument("--cert-dir", default=CERT_DIR)
+    parser.add_argument(
+        "--board-ca-file",
+        default="/standin_ca.pem",
+        help="where the CA certificate is copied on the board",
+    )
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_standin(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,80 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+Host peer for tests/test_tcp_scaling. Once the test shows "waiting for TCP client connection",
+call tcp_scaling_client with the IP and port from the test, or run:
+-----
+python helpers/tcp_scaling_helper.py 192.168.xx.xx 5000
+-----
+The first connection is the control connection, the board sends one line per level:
+    OPEN <count> <bytes> - open <count> connections at once, each echoes <bytes> and closes
+    END                  - the run is over
+"""
+
+CHUNK_SIZE = 256
+
+
+def echo_connection(ip, port, echo_bytes, timeout):
+    start = time.monotonic()
+    with socket.create_connection((ip, port), timeout=timeout) as sock:
+        connected = time.monotonic() - start
+        chunk = bytes(CHUNK_SIZE)
+        buffer = bytearray(CHUNK_SIZE)
+        remaining = echo_bytes
+        while remaining:
+            size = min(CHUNK_SIZE, remaining)
+            sock.sendall(chunk[:size])
+            received = 0
+            while received < size:
+                bytes_read = sock.recv_into(memoryview(buffer)[received:size])
+                if not bytes_read:
+                    raise ConnectionError("Connection closed by board")
+                received += bytes_read
+            remaining -= size
+    return connected, time.monotonic() - start
+
+
+def tcp_scaling_client(ip=None, port=None, timeout=10):
+    if ip is None:
+        ip = input("IP? ")
+    if port is None:
+        port = int(input("Port? "))
+    with socket.create_connection((ip, port), timeout=60) as control:
+        reader = control.makefile("rb")
+        while True:
+            line = reader.readline()
+            if not line or line == b"END\n":
+                break
+            _, count, echo_bytes = line.split()
+            count = int(count)
+
+            with ThreadPoolExecutor(max_workers=count) as executor:
+                futures = [
+                    executor.submit(echo_connection, ip, port, int(echo_bytes), timeout)
+                    for _ in range(count)
+                ]
+            failed = [future.exception() for future in futures if future.exception()]
+            results = [future.result() for future in futures if not future.exception()]
+
+            print(f"TCP: {len(results)} of {count} connections echoed", end="")
+            if results:
+                slowest = max(connected for connected, _ in results)
+                print(f", slowest connect {slowest * 1000:.1f}ms", end="")
+            if failed:
+                print(f", first failure: {failed[0]!r}", end="")
+            print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TCP scaling host peer")
+    parser.add_argument("ip")
+    parser.add_argument("port", type=int, nargs="?", default=5000)
+    args = parser.parse_args()
+    tcp_scaling_client(args.ip, args.port)
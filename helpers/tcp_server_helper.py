@@ -10,9 +10,10 @@ When the TCP server tests are running they will display something like:
 -----
 Running: tests/test_tcp_server
 test_esp32spi_tcp_server (TestTCPServer) ... skipped: Radio isn't an ESP32SPI
-test_native_tcp_server (TestTCPServer) ... Server started at: 192.168.xx.xx:5000 - waiting for TCP client connection.....
+test_native_tcp_server (TestTCPServer) ... Server started at: 192.168.xx.xx:5000 [tcp] - waiting for TCP client connection.
+....
 -----
-Once you see "waiting for TCP client connection", it will add a "." every second until it get's a connection.
+Once you see "waiting for TCP client connection", it will add a "." on the next line every second until it get's a connection.
 To make the connection, paste this method into a CPython terminal and call it with the IP and port from the test
 """
 
@@ -33,7 +34,7 @@ def tcp_client_send(ip=None, port=None, timeout=60, message_loops=3):
             start = time.monotonic()
             while True:
                 elasped = time.monotonic()
-                if int(elasped - start) > timeout:
+                if elasped - start > timeout:
                     break
                 bytes_read = sock.recv_into(buffer, len(buffer))
                 if bytes_read:
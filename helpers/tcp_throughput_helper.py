@@ -0,0 +1,123 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import socket
+import threading
+import time
+
+"""
+Host peer for tests/test_tcp_throughput. Once the test shows "waiting for TCP client connection",
+call tcp_throughput_client with the IP and port from the test, or run:
+-----
+python helpers/tcp_throughput_helper.py 192.168.xx.xx 5000
+-----
+The board drives the run, one line per step:
+    RX <total> <chunk> - the client sends <total> bytes in <chunk> sized writes
+    TX <total> <chunk> - the board sends <total> bytes, the client answers OK once it has them all
+    END                - the run is over
+Run it without an IP to start tcp_throughput_server, a stand-in for the board, and the
+client against it on this machine, which shows what the host side can sustain.
+"""
+
+PAYLOAD_SIZE = 8192
+
+
+def tcp_throughput_client(ip=None, port=None, timeout=60):
+    if ip is None:
+        ip = input("IP? ")
+    if port is None:
+        port = int(input("Port? "))
+    payload = bytes(i % 256 for i in range(PAYLOAD_SIZE))
+    with socket.create_connection((ip, port), timeout=timeout) as sock:
+        # otherwise small writes wait on the board's delayed ACK and that is what gets timed
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = sock.makefile("rb")
+        while True:
+            line = reader.readline()
+            if not line or line == b"END\n":
+                break
+            command, total, chunk_size = line.split()
+            total = int(total)
+            chunk_size = int(chunk_size)
+
+            start = time.monotonic()
+            if command == b"RX":
+                sent = 0
+                while sent < total:
+                    size = min(chunk_size, total - sent, PAYLOAD_SIZE)
+                    sock.sendall(payload[:size])
+                    sent += size
+            else:
+                remaining = total
+                while remaining:
+                    data = reader.read1(min(chunk_size, remaining))
+                    if not data:
+                        raise ConnectionError("Connection closed by board")
+                    remaining -= len(data)
+                sock.sendall(b"OK\n")
+            elasped = time.monotonic() - start
+
+            print(
+                f"TCP: {command.decode()} {total} bytes in {chunk_size} byte chunks"
+                f" - {total / elasped:.0f} B/s"
+            )
+
+
+def tcp_throughput_server(
+    ip="127.0.0.1", port=5000, total=65536, chunk_sizes=None, ready=None
+):
+    if chunk_sizes is None:
+        chunk_sizes = [64, 256, 1024, 4096, 8192]
+    buffer = bytearray(max(chunk_sizes))
+    with socket.create_server((ip, port)) as server:
+        if ready is not None:
+            ready.set()
+        sock, _ = server.accept()
+        with sock:
+            for chunk_size in chunk_sizes:
+                sock.sendall(f"RX {total} {chunk_size}\n".encode())
+                received = 0
+                while received < total:
+                    bytes_read = sock.recv_into(
+                        buffer, min(chunk_size, total - received)
+                    )
+                    if not bytes_read:
+                        raise ConnectionError("Connection closed by client")
+                    received += bytes_read
+
+                sock.sendall(f"TX {total} {chunk_size}\n".encode())
+                sent = 0
+                while sent < total:
+                    size = min(chunk_size, total - sent)
+                    sock.sendall(buffer[:size])
+                    sent += size
+                ack = sock.makefile("rb").readline()
+                if ack != b"OK\n":
+                    raise ConnectionError(f"Unexpected ack: {ack}")
+            sock.sendall(b"END\n")
+
+
+def tcp_throughput_standin(port=5000, total=65536):
+    ready = threading.Event()
+    server = threading.Thread(
+        target=tcp_throughput_server,
+        kwargs={"port": port, "total": total, "ready": ready},
+    )
+    server.start()
+    ready.wait()
+    tcp_throughput_client("127.0.0.1", port)
+    server.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TCP throughput host peer")
+    parser.add_argument("ip", nargs="?", help="board IP, omit to run the stand-in")
+    parser.add_argument("port", nargs="?", type=int, default=5000)
+    parser.add_argument("--total", type=int, default=65536, help="stand-in bytes")
+    args = parser.parse_args()
+    if args.ip:
+        tcp_throughput_client(args.ip, args.port)
+    else:
+        tcp_throughput_standin(args.port, args.total)
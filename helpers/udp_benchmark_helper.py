@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 Justin Myers
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import socket
+import struct
+import time
+
+"""
+Host peer for tests/test_udp_benchmark. Once the test shows "waiting for UDP client connection",
+call udp_benchmark_client with the IP and port from the test, or run:
+-----
+python helpers/udp_benchmark_helper.py 192.168.xx.xx 5000
+-----
+After the "Hello World!" greeting the board sends one command per step:
+    RUN <step> <mode> <count> <rate> <size> - fire <count> datagrams of <size> bytes at <rate>/s
+    END                                     - the run is over
+Every datagram starts with a big endian uint32 sequence number and uint64 send time in
+microseconds, followed by three end-of-stream markers carrying the step number. In "echo" mode the board sends each
+datagram back and the round trip loss is printed here, the board reports the forward direction.
+"""
+
+PACKET_HEADER = ">IQ"
+PACKET_END_OF_STREAM = 0xFFFFFFFF
+ECHO_IDLE = 1
+
+
+def drain_echoes(sock, echoes, wait=0):
+    # collects echoes for up to wait seconds, or until the board's next command comes in
+    timeout = sock.gettimeout()
+    deadline = time.monotonic() + wait
+    try:
+        while True:
+            sock.settimeout(max(deadline - time.monotonic(), 0))
+            data = sock.recv(65535)
+            if data.startswith((b"RUN", b"END")):
+                return data
+            echoes.add(struct.unpack_from(PACKET_HEADER, data)[0])
+    except (BlockingIOError, socket.timeout):
+        return None
+    finally:
+        sock.settimeout(timeout)
+
+
+def fire_packets(sock, address, command):
+    _, step, mode, count, rate, size = command.split()
+    step, count, rate, size = int(step), int(count), int(rate), int(size)
+    echo = mode == b"echo"
+    echoes = set()
+    pending = None
+    packet = bytearray(size)
+    interval = 1 / rate
+    start = time.monotonic()
+    for sequence in range(count):
+        send_at = start + sequence * interval
+        while time.monotonic() < send_at:
+            pass
+        struct.pack_into(
+            PACKET_HEADER, packet, 0, sequence, time.monotonic_ns() // 1000
+        )
+        sock.sendto(packet, address)
+        if echo and pending is None:
+            pending = drain_echoes(sock, echoes)
+    elasped = time.monotonic() - start
+
+    struct.pack_into(PACKET_HEADER, packet, 0, PACKET_END_OF_STREAM, step)
+    for _ in range(3):
+        sock.sendto(packet, address)
+
+    print(f"UDP: Sent {count} x {size} bytes at {count / elasped:.0f}/s", end="")
+    if echo:
+        if pending is None:
+            pending = drain_echoes(sock, echoes, ECHO_IDLE)
+        print(f" - echo loss {100 * (count - len(echoes)) / count:.1f}%", end="")
+    print()
+    return pending
+
+
+def udp_benchmark_client(ip=None, port=None, timeout=60):
+    if ip is None:
+        ip = input("IP? ")
+    if port is None:
+        port = int(input("Port? "))
+    address = (ip, port)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.sendto(b"Hello World!", address)
+        command = None
+        while True:
+            if command is None:
+                command, _ = sock.recvfrom(64)
+            if command == b"END":
+                break
+            command = fire_packets(sock, address, command)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UDP benchmark host peer")
+    parser.add_argument("ip")
+    parser.add_argument("port", type=int, nargs="?", default=5000)
+    args = parser.parse_args()
+    udp_benchmark_client(args.ip, args.port)
@@ -10,9 +10,10 @@ When the UDP server tests are running they will display something like:
 -----
 Running: tests/test_udp_server
 test_esp32spi_udp_server (TestUDPServer) ... skipped: Radio isn't an ESP32SPI
-test_native_udp_server (TestUDPServer) ... Server started at: 192.168.xx.xx:5000 - waiting for UDP client connection.....
+test_native_udp_server (TestUDPServer) ... Server started at: 192.168.xx.xx:5000 [udp] - waiting for UDP client connection.
+....
 -----
-Once you see "waiting for UDP client connection", it will add a "." every second until it get's a connection.
+Once you see "waiting for UDP client connection", it will add a "." on the next line every second until it get's a connection.
 To make the connection, paste this method into a CPython terminal and call it with the IP and port from the test
 """
 
@@ -32,7 +33,7 @@ def udp_client_send(ip=None, port=None, timeout=60, message_loops=3):
             start = time.monotonic()
             while True:
                 elasped = time.monotonic()
-                if int(elasped - start) > timeout:
+                if elasped - start > timeout:
                     break
                 bytes_read, server_ip_address = sock.recvfrom_into(buffer)
                 if bytes_read: